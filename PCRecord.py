@@ -2,151 +2,741 @@ import json
 import socket
 import os
 import time
-import shutil
 import logging
 import threading
-from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from datetime import datetime
 import ctypes
+from ingest_pipeline import IngestPipeline
+from event_coalescer import EventCoalescer
+from lock_probe import create_lock_probe
+from readiness import Backoff, ReadinessDetector
+from scheduler import Scheduler
+import copy_engine
+import dedup
+import job_store
+from job_store import JobStore
+from notifier import create_notifier
+from structured_logging import log_fields, logging_settings, setup_logging
+from bandwidth import create_governor
+from catalog import Catalog, make_entry
+from destination_health import OPEN, STATE_VALUES, CircuitBreaker, DestinationHealthMonitor
+from destination_resolver import DestinationResolver
+from dedup import DedupIndex
+from lease import LEASE_SUFFIX, LeaseManager
+from mappings import MappingFile
+from media_metadata import read_metadata, recording_date
+from metrics import MetricsDumper, MetricsRegistry, MetricsServer
+from snapshot_observer import create_observer
+from spool import Spool
+from watch_config import DEFAULT_CONFIG_PATH, WatchFolder, load_config, load_options, validate_folders
 
-# SETUP LOGGING dengan encoding yang benar
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('file_watcher.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 class MagicSoftFileWatcher(FileSystemEventHandler):
-    def __init__(self, watch_folder, processed_folder, kegiatan_map_path, bahanpustaka_map_path):
-        self.watch_folder = watch_folder
-        self.processed_folder = processed_folder
-        self.kegiatan_map = self.load_mapping(kegiatan_map_path)
-        self.bahanpustaka_map = self.load_mapping(bahanpustaka_map_path)
-        self.processed_files = set()
+    def __init__(self, watch_folder, processed_folder, kegiatan_map_path, bahanpustaka_map_path, options=None,
+                 folders=None):
+        options = options or {}
+        self.options = options
+        # Satu watch folder dari argumen, atau banyak folder (WatchFolder) dari watcher_config.json
+        if folders is None:
+            folders = [WatchFolder("default", watch_folder, processed_folder, kegiatan_map_path,
+                                   bahanpustaka_map_path, recursive=options.get("recursive", False),
+                                   settings=options)]
+            validate_folders(folders)
+        self.folders = folders
+
+        # Nama file -> folder tujuan: mapping tervalidasi + hot reload, cache folder yang sudah dibuat (LRU)
+        self.resolver = DestinationResolver(cache_size=options.get("directory_cache_size", 1024),
+                                            strict_codes=options.get("strict_codes", False))
+        self.mapping_check_interval = options.get("mapping_check_interval", 2)
+        self.mapping_files = {}
+        # Tanggal folder arsip: "metadata" (tanggal rekaman dari header container, fallback mtime),
+        # "mtime" (waktu file terakhir ditulis) atau "now" (waktu diarsipkan)
+        self.archive_date_source = options.get("archive_date_source", "metadata")
+        for folder in self.folders:
+            # Nilai mapping: "NAMA FOLDER" atau {"name": "NAMA FOLDER", "priority": 10}
+            folder.kegiatan_mapping = self.get_mapping_file(folder.kegiatan_map_path)
+            folder.bahanpustaka_mapping = self.get_mapping_file(folder.bahanpustaka_map_path)
         
-        # PARAMETERS - TANPA INITIAL DELAY
-        self.wait_delay = 10  # Delay 10 detik antar pengecekan
+        # PARAMETERS - TANPA INITIAL DELAY (threshold per folder ada di WatchFolder)
+        self.worker_count = sum(folder.worker_count for folder in self.folders)  # Total worker semua shard
+        self.reconcile_on_start = options.get("reconcile_on_start", True)  # Scan file lama saat start
+        self.stop_event = threading.Event()
+        self.copy_chunk_size = options.get("copy_chunk_size", copy_engine.DEFAULT_CHUNK_SIZE)
+        self.hash_algorithm = options.get("hash_algorithm", copy_engine.DEFAULT_HASH_ALGORITHM)  # None = zero-copy tanpa hash
+        self.parallel_copy_threshold = options.get("parallel_copy_threshold", 1024 * 1024 * 1024)  # File >= 1GB
+        self.parallel_copy_streams = options.get("parallel_copy_streams", 4)
+        self.parallel_range_size = options.get("parallel_range_size", copy_engine.DEFAULT_RANGE_SIZE)
+        self.checksum_log_path = options.get("checksum_log_path", "file_watcher_checksums.log")
+        self.checksum_log_lock = threading.Lock()
+        # Copy terputus (share putus sebentar): dicoba lagi dengan backoff, resume dari .partial
+        self.copy_retry_delay = options.get("copy_retry_delay", 5)
+        self.copy_retry_max_delay = options.get("copy_retry_max_delay", 300)
+
+        # Batas bandwidth baca/tulis bersama semua worker (profil jam siaran, back-off latency source)
+        self.bandwidth = create_governor(options)
+
+        # State setiap file disimpan persisten (pengganti set processed_files di memory)
+        # Cek lock tanpa mengubah file: share-mode open (Windows), lease atau /proc (Linux)
+        self.lock_probe = create_lock_probe(options.get("lock_probe", "auto"))
+        self.job_store = JobStore(options.get("job_store_path", "file_watcher_jobs.db"))
+
+        # Multi-node: beberapa PC memproses watch folder bersama, satu lease file per file di lease_dir
+        # (di share). Job store, katalog dan dedup tetap lokal per node. None = satu node saja
+        lease_dir = options.get("lease_dir")
+        self.leases = None
+        if lease_dir:
+            self.leases = LeaseManager(lease_dir, node_id=options.get("node_id"), ttl=options.get("lease_ttl", 60),
+                                       clock_skew=options.get("lease_clock_skew", 5))
+        self.lease_busy_delay = options.get("lease_busy_delay", 2)  # Node sibuk menunda klaim, node idle duluan
+        self.lease_deferred = set()
+
+        # Notifikasi async (popup/log/webhook/file) - tidak pernah memblok pemrosesan
+        self.notifier = create_notifier(options)
+
+        # Katalog arsip (SQLite FTS) - diisi setiap file selesai diarsipkan
+        catalog_path = options.get("catalog_path", "file_watcher_catalog.db")
+        self.catalog = Catalog(catalog_path) if catalog_path else None
+
+        # Dedup konten: policy "skip", "link", "keep-both" atau None (nonaktif)
+        self.dedup_policy = options.get("dedup_policy", dedup.LINK)
+        if self.dedup_policy is not None and self.dedup_policy not in dedup.POLICIES:
+            raise ValueError(f"Unknown dedup_policy: {self.dedup_policy}")
+        self.dedup = DedupIndex(options.get("dedup_index_path", "file_watcher_dedup.db")) if self.dedup_policy else None
+
+        # Store-and-forward: share tujuan diprobe berkala (latency, throughput tulis), circuit breaker
+        # berhenti menyentuh share yang mati, file masuk spool lokal dan disalurkan paralel saat pulih
+        # Satu health monitor + circuit breaker per root tujuan (folder boleh berbagi root)
+        self.destinations = {}
+        for folder in self.folders:
+            key = self.destination_key(folder.processed_folder)
+            if key in self.destinations:
+                continue
+            breaker = CircuitBreaker(failure_threshold=options.get("breaker_failure_threshold", 3),
+                                     reset_timeout=options.get("breaker_reset_timeout", 10),
+                                     max_reset_timeout=options.get("breaker_max_reset_timeout", 300))
+            self.destinations[key] = DestinationHealthMonitor(folder.processed_folder, breaker,
+                                                              interval=options.get("health_interval", 30),
+                                                              probe_bytes=options.get("health_probe_bytes", 1024 * 1024),
+                                                              max_latency=options.get("health_max_latency", 5.0))
+            # Share putus - folder tujuan yang di-cache belum tentu masih ada saat share kembali
+            breaker.add_listener(lambda state, root=folder.processed_folder: self.on_destination_state(root, state))
+        spool_dir = options.get("spool_dir", "file_watcher_spool")  # None = tanpa spool
+        self.spool = None
+        if spool_dir:
+            self.spool = Spool(spool_dir, max_bytes=options.get("spool_max_bytes", 100 * 1024 ** 3),
+                               min_free_bytes=options.get("spool_min_free_bytes", 20 * 1024 ** 3),
+                               drain_workers=options.get("spool_drain_workers", 2),
+                               chunk_size=self.copy_chunk_size, governor=self.bandwidth)
+            for health in self.destinations.values():
+                health.breaker.add_listener(lambda state: self.spool.wake())
+
+        for folder in self.folders:
+            # Deteksi selesai ditulis: event close-after-write, fallback polling dengan backoff
+            folder.readiness = ReadinessDetector(stable_window=folder.stable_window)
+
+            # Observer hanya enqueue, shard worker per folder yang memproses file - folder sibuk
+            # tidak memakai worker folder lain
+            # Urutan job: prioritas per kode kegiatan/bahan pustaka, shortest-job-first, dengan aging
+            has_express = any(priority >= folder.express_priority for priority in
+                              list(folder.kegiatan_priority.values()) + list(folder.bahanpustaka_priority.values()))
+            folder.pipeline = IngestPipeline(self.process_file_immediately,
+                                             worker_count=folder.worker_count,
+                                             max_queue_size=folder.max_queue_size,
+                                             priority_func=self.get_priority,
+                                             priority_seconds=folder.priority_seconds,
+                                             sjf_bytes_per_second=folder.sjf_bytes_per_second,
+                                             express_priority=folder.express_priority if has_express else None,
+                                             express_workers=folder.express_workers,
+                                             name=folder.name if len(self.folders) > 1 else "ingest")
+
+        # Semua pengecekan tertunda (file kecil, tunggu lock, stabilitas) semua folder lewat satu
+        # scheduler - worker tidak ditahan selama file masih ditulis; batas in-flight per folder (fair share)
+        self.wait_states = {}
+        self.scheduler = Scheduler(jitter=options.get("retry_jitter", 0.1),
+                                   max_in_flight=sum(folder.max_inflight_checks for folder in self.folders),
+                                   group_func=self.folder_name_for,
+                                   group_limits={folder.name: folder.max_inflight_checks for folder in self.folders})
+
+        # Event created/modified/moved/closed per path digabung dulu, satu job per file
+        self.coalescer = EventCoalescer(self.submit_new_file, debounce=options.get("event_debounce", 0.25))
+
+        # Metrics per stage - endpoint HTTP lokal (Prometheus) + dump periodik ke file
+        self.detected_at = {}
+        self.metrics = MetricsRegistry()
+        self.setup_metrics()
+        self.metrics_server = None
+        if options.get("metrics_port", 9108) is not None:
+            self.metrics_server = MetricsServer(self.metrics, options.get("metrics_host", "127.0.0.1"),
+                                                options.get("metrics_port", 9108))
+        self.metrics_dumper = None
+        if options.get("metrics_dump_path", "file_watcher_metrics.prom"):
+            self.metrics_dumper = MetricsDumper(self.metrics, options.get("metrics_dump_path", "file_watcher_metrics.prom"),
+                                                options.get("metrics_dump_interval", 60))
          
-        logger.info(f"Watch folder: {watch_folder}") 
+        for folder in self.folders:
+            logger.info(f"Watch folder: {folder.path} ({folder.name}, {folder.worker_count} workers"
+                        f"{', recursive' if folder.recursive else ''}) -> {folder.processed_folder}")
+
+    @classmethod
+    def from_config(cls, config_path, options=None):
+        """Watcher untuk semua folder di file konfigurasi (options argumen menimpa options di file)"""
+        config_options, folders = load_config(config_path)
+        return cls(None, None, None, None, dict(config_options, **(options or {})), folders=folders)
+
+    def folder_for(self, file_path):
+        """WatchFolder yang memuat file (folder paling spesifik), None jika di luar semua watch folder"""
+        best = None
+        for folder in self.folders:
+            if folder.contains(file_path) and (best is None or len(folder.path) > len(best.path)):
+                best = folder
+        return best
+
+    def folder_name_for(self, file_path):
+        folder = self.folder_for(file_path)
+        return folder.name if folder is not None else None
+
+    @staticmethod
+    def destination_key(processed_folder):
+        return os.path.normcase(os.path.abspath(processed_folder))
+
+    def destination_health(self, processed_folder):
+        """Health monitor (dengan circuit breaker) untuk root tujuan"""
+        return self.destinations[self.destination_key(processed_folder)]
+
+    def setup_metrics(self):
+        """Daftarkan semua metric watcher"""
+        m = self.metrics
+        self.m_detect_to_ready = m.histogram("watcher_detect_to_ready_seconds",
+                                             "Waktu dari file terdeteksi sampai siap diproses (bebas lock, selesai ditulis)")
+        self.m_stability_checks = m.counter("watcher_stability_checks_total", "Jumlah pengecekan lock/stabilitas")
+        self.m_checks_per_file = m.histogram("watcher_stability_checks_per_file", "Jumlah pengecekan sampai file siap",
+                                             buckets=(1, 2, 3, 5, 10, 20, 50, 100, 500))
+        self.m_copy_seconds = m.histogram("watcher_copy_seconds", "Durasi copy per file")
+        self.m_copy_throughput = m.histogram("watcher_copy_throughput_mbps", "Throughput copy per file (MB/s)",
+                                             buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500))
+        self.m_copy_bytes = m.counter("watcher_copy_bytes_total", "Total byte yang disalin")
+        self.m_verify_seconds = m.histogram("watcher_verify_seconds", "Durasi verifikasi hasil copy")
+        self.m_delete_seconds = m.histogram("watcher_delete_seconds", "Durasi hapus file original")
+        self.m_move_seconds = m.histogram("watcher_move_seconds", "Durasi fast move (rename) di device yang sama")
+        self.m_archived = m.counter("watcher_files_archived_total", "File yang berhasil diarsipkan", labels=("method",))
+        self.m_failures = m.counter("watcher_failures_total", "Kegagalan per alasan", labels=("reason",))
+        self.m_events = m.counter("watcher_events_total", "Event filesystem yang diterima", labels=("type",))
+        m.gauge("watcher_events_coalesced", "Event yang digabung (tidak jadi job terpisah)").set_function(
+            lambda: self.coalescer.received_count - self.coalescer.emitted_count)
+        m.gauge("watcher_queue_depth", "Jumlah job di antrian").set_function(self.get_queue_depth)
+        m.gauge("watcher_busy_workers", "Worker yang sedang memproses").set_function(
+            lambda: self.get_stats()["busy_workers"])
+        m.gauge("watcher_worker_count", "Jumlah worker").set_function(lambda: self.worker_count)
+        m.gauge("watcher_folder_queue_depth", "Jumlah job di antrian per watch folder", labels=("folder",)).set_function(
+            lambda: {(folder.name,): folder.pipeline.get_queue_depth() for folder in self.folders})
+        m.gauge("watcher_folder_busy_workers", "Worker sibuk per watch folder", labels=("folder",)).set_function(
+            lambda: {(folder.name,): folder.pipeline.get_stats()["busy_workers"] for folder in self.folders})
+        if self.leases is not None:
+            self.m_lease_denied = m.counter("watcher_lease_denied_total", "Klaim file yang ditolak (lease milik node lain)")
+            m.gauge("watcher_leases_held", "Lease file yang dipegang node ini").set_function(
+                lambda: self.leases.get_stats()["held"])
+            m.gauge("watcher_lease_takeovers", "Lease kadaluarsa yang diambil alih dari node lain").set_function(
+                lambda: self.leases.takeover_count)
+        self.m_mapping_reloads = m.counter("watcher_mapping_reloads_total", "File mapping yang dimuat ulang (hot reload)")
+        m.gauge("watcher_directory_cache_hits", "Folder tujuan yang sudah ada di cache (tanpa mkdir)").set_function(
+            lambda: self.resolver.directories.hits)
+        m.gauge("watcher_directory_cache_misses", "Folder tujuan yang harus di-makedirs").set_function(
+            lambda: self.resolver.directories.misses)
+        self.m_metadata_seconds = m.histogram("watcher_metadata_seconds", "Durasi baca metadata header container")
+        self.m_archive_date = m.counter("watcher_archive_date_total", "Sumber tanggal folder arsip",
+                                        labels=("source",))
+        self.m_spooled = m.counter("watcher_spooled_total", "File yang masuk spool lokal karena tujuan tidak tersedia")
+        self.m_drained = m.counter("watcher_spool_drained_total", "File spool yang sudah disalurkan ke tujuan")
+        m.gauge("watcher_destination_circuit_state", "Circuit breaker tujuan (0 closed, 1 half-open, 2 open)",
+                labels=("destination",)).set_function(
+            lambda: {(h.path,): STATE_VALUES[h.breaker.state] for h in self.destinations.values()})
+        m.gauge("watcher_destination_latency_seconds", "Latency stat folder tujuan (probe terakhir)",
+                labels=("destination",)).set_function(
+            lambda: {(h.path,): h.last_latency or 0 for h in self.destinations.values()})
+        m.gauge("watcher_destination_write_mbps", "Throughput tulis file probe ke tujuan (MB/s)",
+                labels=("destination",)).set_function(
+            lambda: {(h.path,): h.last_write_mbps or 0 for h in self.destinations.values()})
+        if self.spool is not None:
+            m.gauge("watcher_spool_files", "File di spool yang menunggu disalurkan").set_function(
+                lambda: self.spool.get_stats()["files"])
+            m.gauge("watcher_spool_bytes", "Ukuran isi spool (byte)").set_function(lambda: self.spool.used_bytes)
+            m.gauge("watcher_spool_drain_mbps", "Laju drain spool ke tujuan (MB/s)").set_function(
+                lambda: self.spool.get_stats()["drain_rate_mbps"])
+        if self.bandwidth is not None:
+            bw = self.bandwidth
+            m.gauge("watcher_bandwidth_read_limit_mbps", "Batas baca source saat ini (MB/s, 0 = tanpa batas)").set_function(
+                lambda: bw.read_limit_mbps or 0)
+            m.gauge("watcher_bandwidth_write_limit_mbps", "Batas tulis tujuan saat ini (MB/s, 0 = tanpa batas)").set_function(
+                lambda: bw.write_limit_mbps or 0)
+            m.gauge("watcher_bandwidth_backoff_factor", "Faktor back-off baca karena latency source").set_function(
+                lambda: bw.factor)
+            m.gauge("watcher_source_read_latency_ms_per_mb", "EWMA latency baca source (ms per MB)").set_function(
+                lambda: bw.latency_ewma_ms or 0)
+            m.gauge("watcher_bandwidth_throttled_read_seconds", "Total waktu worker menunggu jatah baca").set_function(
+                lambda: bw.read_bucket.throttled_seconds)
+            m.gauge("watcher_bandwidth_throttled_write_seconds", "Total waktu worker menunggu jatah tulis").set_function(
+                lambda: bw.write_bucket.throttled_seconds)
+
+    def start(self):
+        """Start worker pool dan lanjutkan job yang belum selesai dari run sebelumnya"""
+        self.stop_event.clear()
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.start()
+        for folder in self.folders:
+            folder.pipeline.start()
+        self.scheduler.start()
+        for health in self.destinations.values():
+            health.start()
+        if self.spool is not None:
+            self.spool.start(self.drain_spooled, self.can_drain)
+        self.coalescer.start()
+        if self.leases is not None:
+            self.leases.start()
+        self.recover_jobs()
+        if self.reconcile_on_start:
+            for folder in self.folders:
+                threading.Thread(target=self.reconcile_backlog, args=(folder,),
+                                 name=f"backlog-reconcile-{folder.name}", daemon=True).start()
+
+    def stop(self):
+        """Stop worker pool"""
+        self.stop_event.set()
+        self.coalescer.stop()
+        self.scheduler.stop()
+        for folder in self.folders:
+            folder.pipeline.stop(timeout=5)
+        if self.spool is not None:
+            self.spool.stop()
+        for health in self.destinations.values():
+            health.stop()
+        if self.leases is not None:
+            # Lease yang masih dipegang dilepas - node lain bisa langsung melanjutkan
+            self.leases.stop()
+        self.job_store.close()
+        self.notifier.close()
+        if self.catalog is not None:
+            self.catalog.close()
+        if self.dedup is not None:
+            self.dedup.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.stop()
+
+    def recover_jobs(self):
+        """Masukkan lagi job in-flight dari job store ke antrian"""
+        recovered = 0
+        for file_path, state in self.job_store.recover():
+            if os.path.exists(file_path):
+                if (self.leases is not None and self.folder_for(file_path) is not None
+                        and not self.leases.acquire(self.lease_key(file_path))):
+                    # Diambil alih node lain selama node ini mati - ikuti lease, cek lagi nanti
+                    logger.warning(f"Recovered job is leased by another node: {file_path}")
+                    self.job_store.update(file_path, job_store.FAILED, error="Leased by another node")
+                    self.scheduler.schedule(file_path, self.leases.ttl / 2, self.recheck_claim, file_path)
+                    continue
+                logger.info(f"RECOVERING JOB ({state}): {os.path.basename(file_path)}",
+                            extra=log_fields("recover", file=file_path, state=state))
+                if self.enqueue_file(file_path):
+                    recovered += 1
+            else:
+                logger.warning(f"Recovered job source missing: {file_path}")
+                self.job_store.update(file_path, job_store.FAILED, error="Source missing on recovery")
+        if recovered:
+            logger.info(f"Recovered {recovered} in-flight jobs")
 
-    def load_mapping(self, path):
-        """Load mapping dari file JSON"""
+    def get_stats(self):
+        """Statistik pipeline semua folder (total + per folder), bandwidth, tujuan dan spool"""
+        folders = {folder.name: folder.pipeline.get_stats() for folder in self.folders}
+        stats = {key: sum(folder_stats[key] for folder_stats in folders.values())
+                 for key in ("queue_depth", "express_queue_depth", "worker_count", "busy_workers", "completed", "failed")}
+        stats["folders"] = folders
+        if self.bandwidth is not None:
+            stats["bandwidth"] = self.bandwidth.get_stats()
+        stats["destinations"] = {health.path: health.get_stats() for health in self.destinations.values()}
+        if self.spool is not None:
+            stats["spool"] = self.spool.get_stats()
+        if self.leases is not None:
+            stats["leases"] = self.leases.get_stats()
+        stats["resolver"] = self.resolver.get_stats()
+        return stats
+
+    def get_queue_depth(self):
+        return sum(folder.pipeline.get_queue_depth() for folder in self.folders)
+
+    def enqueue_file(self, file_path):
+        """Masukkan file ke antrian worker shard folder-nya"""
+        folder = self.folder_for(file_path)
+        if folder is None:
+            # Misal job lama dari folder yang sudah dihapus dari konfigurasi
+            logger.error(f"File is not in any watch folder: {file_path}")
+            self.scheduler.done(file_path)
+            self.job_store.update(file_path, job_store.FAILED, error="Not in any watch folder")
+            self.forget_file(file_path)
+            return False
+        self.detected_at.setdefault(file_path, time.time())
+        if not folder.pipeline.submit(file_path):
+            self.scheduler.done(file_path)
+            self.job_store.update(file_path, job_store.FAILED, error="Queue full")
+            self.m_failures.inc(reason="queue_full")
+            self.forget_file(file_path)
+            return False
+        return True
+
+    def forget_file(self, file_path):
+        """Bersihkan state sementara file setelah selesai/gagal"""
+        folder = self.folder_for(file_path)
+        if folder is not None:
+            folder.readiness.forget(file_path)
+            folder.pipeline.forget(file_path)
+            if self.leases is not None:
+                self.leases.release(self.lease_key(file_path))
+        self.detected_at.pop(file_path, None)
+        self.wait_states.pop(file_path, None)
+        self.scheduler.cancel(file_path)
+
+    def get_priority(self, file_path):
+        """(prioritas, size) file dari kode BAHANPUSTAKA_KEGIATAN di nama file"""
+        parts = os.path.basename(file_path).split('_')
+        folder = self.folder_for(file_path)
+        priority = 0
+        if len(parts) >= 3 and folder is not None:
+            priority = (folder.bahanpustaka_priority.get(parts[0].upper(), 0) +
+                        folder.kegiatan_priority.get(parts[1].upper(), 0))
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                mapping = json.load(f)
-                logger.info(f"Mapping loaded from {path}: {len(mapping)} entries")
-                return mapping
-        except Exception as e:
-            logger.error(f"ERROR loading mapping from {path}: {e}")
-            return {}
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = None
+        return priority, size
+
+    def get_mapping_file(self, path):
+        """MappingFile untuk path (folder yang memakai file mapping sama berbagi satu instance)"""
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in self.mapping_files:
+            self.mapping_files[key] = MappingFile(path, check_interval=self.mapping_check_interval,
+                                                  on_reload=self.on_mapping_reload)
+        return self.mapping_files[key]
+
+    def on_mapping_reload(self, mapping_file):
+        """Mapping berubah - kode yang tadinya tidak dikenal dicek ulang"""
+        self.resolver.unknown_codes.clear()
+        self.m_mapping_reloads.inc()
+
+    def on_destination_state(self, destination_root, state):
+        if state == OPEN:
+            self.resolver.invalidate(destination_root)
 
     def on_created(self, event):
         """Handle ketika file baru dibuat - LANGSUNG PROSES"""
         if not event.is_directory:
-            file_path = event.src_path
-            file_name = os.path.basename(file_path)
-            
-            # Abaikan file temporary
-            if file_name.lower().endswith('.tmp'):
-                #logger.info(f"Ignoring temporary file: {file_name}")
-                return
-                
-            # Abaikan file tanpa ekstensi
-            if '.' not in file_name:
-                #logger.info(f"Ignoring file without extension: {file_name}")
+            self.m_events.inc(type="created")
+            if not self.should_ignore(os.path.basename(event.src_path)):
+                self.coalescer.touch(event.src_path)
+
+    def on_modified(self, event):
+        """Handle file berubah - file yang belum punya job (misal terlewat) ikut diproses"""
+        if not event.is_directory:
+            self.m_events.inc(type="modified")
+            # File yang sedang diproses sudah dipantau lewat readiness (size/mtime)
+            if self.job_store.is_active(event.src_path) or self.should_ignore(os.path.basename(event.src_path)):
                 return
+            self.coalescer.touch(event.src_path)
+
+    def on_moved(self, event):
+        """Handle rename/move - pola tulis ke .tmp lalu rename, atau dipindah lewat Explorer"""
+        if event.is_directory:
+            return
+        self.m_events.inc(type="moved")
+        self.coalescer.cancel(event.src_path)
+        self.cancel_waiting(event.src_path)
+        dest_path = event.dest_path
+        if self.folder_for(dest_path) is not None and not self.should_ignore(os.path.basename(dest_path)):
+            self.coalescer.touch(dest_path)
+
+    def on_deleted(self, event):
+        """Handle file dihapus - buang event yang masih tertunda"""
+        if not event.is_directory:
+            self.m_events.inc(type="deleted")
+            self.coalescer.cancel(event.src_path)
+            self.cancel_waiting(event.src_path)
+
+    def cancel_waiting(self, file_path):
+        """File yang sedang menunggu pengecekan berikutnya hilang - batalkan jadwal dan tutup job"""
+        self.lease_deferred.discard(file_path)
+        # Hanya job lokal - jadwal cek ulang lease file milik node lain cukup dibatalkan
+        if self.scheduler.cancel(file_path) and self.job_store.is_active(file_path):
+            logger.warning(f"File disappeared while waiting: {os.path.basename(file_path)}")
+            self.job_store.update(file_path, job_store.FAILED, error="File disappeared")
+            self.m_failures.inc(reason="disappeared")
+            self.forget_file(file_path)
+
+    def submit_new_file(self, file_path):
+        """Satu job per file logis setelah event digabung"""
+        file_name = os.path.basename(file_path)
+
+        # File sudah hilang (misal rename-balik milik watcher sendiri, atau diarsipkan node lain)
+        folder = self.folder_for(file_path)
+        if not os.path.exists(file_path) or folder is None:
+            self.lease_deferred.discard(file_path)
+            return False
+
+        if self.leases is not None and not self.job_store.is_active(file_path):
+            if file_path not in self.lease_deferred and folder.pipeline.is_saturated():
+                # Node ini sibuk - beri kesempatan node lain yang idle mengklaim file lebih dulu
+                self.lease_deferred.add(file_path)
+                self.scheduler.schedule(file_path, self.lease_busy_delay, self.recheck_claim, file_path)
+                return False
+            self.lease_deferred.discard(file_path)
+
+        # Cek jika file sudah pernah diproses - sekaligus tandai sebagai sedang diproses
+        if not self.claim_file(file_path):
+            logger.debug(f"File already processed: {file_name}")
+            return False
+
+        logger.info(f"New file detected: {file_name}", extra=log_fields("detect", file=file_path))
+
+        # MASUKKAN KE ANTRIAN - worker yang memproses, observer tidak terblok
+        return self.enqueue_file(file_path)
+
+    def lease_key(self, file_path):
+        """Key lease sama di semua node: nama watch folder + path relatif (drive/mount boleh beda)"""
+        folder = self.folder_for(file_path)
+        return f"{folder.name}/{os.path.relpath(file_path, folder.path).replace(os.sep, '/')}"
+
+    def claim_file(self, file_path):
+        """Klaim file: lease antar node (jika aktif) lalu job store lokal"""
+        if self.leases is not None and not self.leases.acquire(self.lease_key(file_path)):
+            self.m_lease_denied.inc()
+            # Node lain sedang memproses - cek lagi nanti, diambil alih jika node itu mati (lease kadaluarsa)
+            self.scheduler.schedule(file_path, self.leases.ttl / 2, self.recheck_claim, file_path)
+            return False
+        return self.job_store.claim(file_path)
+
+    def recheck_claim(self, file_path):
+        """Jadwal cek ulang klaim (lease milik node lain / klaim ditunda karena node sibuk)"""
+        if not self.submit_new_file(file_path):
+            self.scheduler.done(file_path)
+
+    def should_ignore(self, file_name):
+        """File yang tidak perlu diproses"""
+        lower_name = file_name.lower()
+        
+        # Abaikan file temporary (termasuk file sementara milik watcher sendiri)
+        if lower_name.endswith(('.tmp', '.delete_test', '.stale', LEASE_SUFFIX,
+                                copy_engine.PARTIAL_SUFFIX, copy_engine.JOURNAL_SUFFIX)):
+            return True
             
-            # Cek jika file sudah pernah diproses
-            if file_path in self.processed_files:
-                logger.info(f"File already processed: {file_name}")
+        # Abaikan file tanpa ekstensi
+        if '.' not in file_name:
+            return True
+        return False
+
+    def scan_backlog(self, folder):
+        """Scan watch folder (os.scandir, subfolder jika recursive) - file lama diurutkan dari yang paling tua
+
+        Subfolder yang dikecualikan (folder arsip di dalam watch tree) tidak ikut di-scan.
+        """
+        entries = []
+        directories = [folder.path]
+        while directories:
+            directory = directories.pop()
+            if folder.is_excluded(directory):
+                continue
+            entries.extend(self.scan_directory(directory, directories if folder.recursive else None))
+        entries.sort()
+        return [path for _, path in entries]
+
+    def scan_directory(self, directory, subdirectories=None):
+        """(mtime, path) file di satu folder; subfolder ditambahkan ke list subdirectories jika diisi"""
+        entries = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if subdirectories is not None and entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.path)
+                            continue
+                        if entry.name.endswith(".delete_test"):
+                            restored_path = self.restore_delete_test_name(entry.path)
+                            if restored_path and not self.should_ignore(os.path.basename(restored_path)):
+                                entries.append((os.stat(restored_path).st_mtime, restored_path))
+                            continue
+                        if not entry.is_file(follow_symlinks=False) or self.should_ignore(entry.name):
+                            continue
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.error(f"ERROR scanning watch folder {directory}: {e}")
+        return entries
+
+    def reconcile_backlog(self, folder):
+        """Proses file yang masuk saat watcher mati, dengan rate limit supaya event live tidak tertahan"""
+        backlog = self.scan_backlog(folder)
+        queued = 0
+        for file_path in backlog:
+            # Isi antrian hanya sampai backlog_queue_limit, sisa slot untuk event live
+            while not self.stop_event.is_set() and folder.pipeline.get_queue_depth() >= folder.backlog_queue_limit:
+                self.stop_event.wait(0.2)
+            if self.stop_event.is_set():
+                break
+            if not self.claim_file(file_path):
+                continue
+            logger.info(f"BACKLOG FILE: {os.path.basename(file_path)}", extra=log_fields("backlog", file=file_path))
+            if self.enqueue_file(file_path):
+                queued += 1
+        logger.info(f"Backlog reconciliation done ({folder.name}): {queued} of {len(backlog)} files queued")
+        return queued
+
+    def on_closed(self, event):
+        """Handle close-after-write - file selesai ditulis, bangunkan worker"""
+        if not event.is_directory:
+            self.m_events.inc(type="closed")
+            # File sementara (.tmp, probe health tujuan, dll.) tidak perlu state readiness
+            folder = self.folder_for(event.src_path)
+            if folder is None or self.should_ignore(os.path.basename(event.src_path)):
                 return
-                
-            logger.info(f"New file detected: {file_name}")
-            
-            # Tandai sebagai sedang diproses
-            self.processed_files.add(file_path)
-            
-            # LANGSUNG PROSES - TANPA TUNGGU INITIAL DELAY
-            self.process_file_immediately(file_path)
+            folder.readiness.notify_closed(event.src_path)
+            # File yang sedang menunggu langsung dicek ulang
+            self.scheduler.reschedule(event.src_path, 0)
+            # Tidak ada event lagi dari penulis, tidak perlu menunggu debounce
+            if not self.job_store.is_active(event.src_path):
+                self.coalescer.flush(event.src_path)
 
     def process_file_immediately(self, file_path):
         """PROSES FILE LANGSUNG - TANPA INITIAL DELAY"""
+        try:
+            return self.check_file_then_process(file_path)
+        finally:
+            self.scheduler.done(file_path)
+
+    def check_file_then_process(self, file_path):
+        """Satu kali cek; file yang belum siap dijadwalkan ulang lewat scheduler"""
         file_name = os.path.basename(file_path)
         
-        logger.info(f"IMMEDIATE PROCESSING: {file_name}")
+        if file_path not in self.wait_states:
+            logger.info(f"IMMEDIATE PROCESSING: {file_name}", extra=log_fields("wait", file=file_path))
         
         # Cek jika file masih exists
         if not os.path.exists(file_path):
             logger.warning(f"File disappeared: {file_name}")
-            if file_path in self.processed_files:
-                self.processed_files.remove(file_path)
-            return
+            self.job_store.update(file_path, job_store.FAILED, error="File disappeared")
+            self.m_failures.inc(reason="disappeared")
+            self.forget_file(file_path)
+            return False
             
-        # Cek file size minimal
+        # Cek file size minimal - file yang masih ditulis ditunggu di wait loop
+        folder = self.folder_for(file_path)
         try:
             file_size = os.path.getsize(file_path)
-            if file_size < 5 * 1024 * 1024:  # Minimal 5MB
+            if file_size < folder.min_file_size and folder.readiness.is_write_finished(file_path):
                 logger.info(f"File too small ({file_size} bytes), waiting...")
                 self.retry_later(file_path, delay=30)
-                return
+                return None
         except Exception as e:
             logger.error(f"Error checking file size: {e}")
             self.retry_later(file_path, delay=30)
-            return
+            return None
             
         # LANGSUNG CEK APAKAH FILE SUDAH BEBAS DARI SEMUA LOCK
-        self.wait_for_file_completely_unlocked_then_process(file_path)
+        return self.wait_for_file_completely_unlocked_then_process(file_path)
 
     def wait_for_file_completely_unlocked_then_process(self, file_path):
-        """TUNGGU SAMPAI FILE BENAR-BENAR TIDAK ADA LOCK SAMA SEKALI"""
+        """TUNGGU SAMPAI FILE BENAR-BENAR TIDAK ADA LOCK SAMA SEKALI
+
+        Setiap panggilan satu kali cek. Jika masih ada lock, cek berikutnya dijadwalkan
+        dengan backoff (atau langsung saat close-after-write) dan worker dilepas.
+        """
         file_name = os.path.basename(file_path)
-        file_size_mb = self.get_file_size_mb(file_path)
-        
-        logger.info(f"WAITING FOR FILE COMPLETELY UNLOCKED: {file_name} ({file_size_mb})")
-        logger.info(f"Will wait until file is COMPLETELY FREE from all locks...")
-        
-        attempt = 0
-        start_time = time.time()
-        
-        while True:
-            attempt += 1
-            try:
-                # CEK APAKAH FILE SUDAH BENAR-BENAR BEBAS DARI SEMUA LOCK
-                if self.is_file_completely_unlocked(file_path):
-                    total_wait_time = int(time.time() - start_time)
-                    logger.info(f"SUCCESS: File completely unlocked (attempt {attempt}, waited {total_wait_time}s): {file_name}")
-                    
-                    # FILE SUDAH BENAR-BENAR BEBAS, COPY DAN HAPUS SEKALI
-                    success = self.process_file_completely(file_path)
-                    if success:
-                        logger.info(f"COMPLETE SUCCESS: {file_name}")
-                        if file_path in self.processed_files:
-                            self.processed_files.remove(file_path)
-                        return
-                    else:
-                        logger.error(f"PROCESS FAILED: {file_name}")
-                        self.handle_failure(file_path, "Gagal memproses file")
-                        return
+        folder = self.folder_for(file_path)
+        state = self.wait_states.get(file_path)
+        if state is None:
+            logger.info(f"WAITING FOR FILE COMPLETELY UNLOCKED: {file_name} ({self.get_file_size_mb(file_path)})",
+                        extra=log_fields("wait", file=file_path))
+            logger.info(f"Will wait until file is COMPLETELY FREE from all locks...", extra=log_fields("wait", file=file_path))
+            self.job_store.update(file_path, job_store.WAITING)
+            state = {"attempt": 0, "start_time": time.time(),
+                     "backoff": Backoff(initial=folder.poll_initial_delay, maximum=folder.wait_delay)}
+            self.wait_states[file_path] = state
+
+        state["attempt"] += 1
+        attempt = state["attempt"]
+        start_time = state["start_time"]
+        self.m_stability_checks.inc()
+        try:
+            # CEK APAKAH FILE SUDAH BENAR-BENAR BEBAS DARI SEMUA LOCK
+            if self.is_file_completely_unlocked(file_path):
+                self.m_checks_per_file.observe(attempt)
+                self.m_detect_to_ready.observe(time.time() - self.detected_at.get(file_path, start_time))
+                total_wait_time = int(time.time() - start_time)
+                logger.info(f"SUCCESS: File completely unlocked (attempt {attempt}, waited {total_wait_time}s): {file_name}",
+                            extra=log_fields("wait", file=file_path, attempt=attempt,
+                                             duration=round(time.time() - start_time, 3)))
                 
+                if self.leases is not None and not self.leases.is_held(self.lease_key(file_path)):
+                    # Node ini sempat hang melewati ttl, lease sudah diambil alih node lain
+                    logger.error(f"LEASE LOST, file left to other node: {file_name}")
+                    self.job_store.update(file_path, job_store.FAILED, error="Lease lost")
+                    self.m_failures.inc(reason="lease_lost")
+                    self.forget_file(file_path)
+                    return False
+
+                # FILE SUDAH BENAR-BENAR BEBAS, COPY DAN HAPUS SEKALI
+                success = self.process_file_completely(file_path)
+                if success:
+                    logger.info(f"COMPLETE SUCCESS: {file_name}",
+                                extra=log_fields("done", file=file_path, duration=round(time.time() - start_time, 3)))
+                    if success != job_store.SPOOLED:
+                        self.job_store.update(file_path, job_store.DELETED)
+                    self.forget_file(file_path)
+                    return True
+                elif success is None:
+                    # Copy terputus (resume dari .partial) atau tujuan mati dan spool penuh -
+                    # file tetap di watch folder, coba lagi dengan backoff
+                    if "retry_backoff" not in state:
+                        state["retry_backoff"] = Backoff(initial=self.copy_retry_delay,
+                                                         maximum=self.copy_retry_max_delay)
+                    self.retry_later(file_path, delay=state["retry_backoff"].next_delay())
+                    return None
                 else:
-                    # File masih ada lock, tunggu dan coba lagi - TANPA BATAS
-                    total_wait_seconds = int(time.time() - start_time)
-                    total_wait_minutes = total_wait_seconds // 60
-                    
-                    if attempt == 1:
-                        logger.info(f"File still locked, starting wait process...") 
-                    
-                    time.sleep(self.wait_delay)
-                        
-            except Exception as e:
-                logger.error(f"ERROR during wait: {str(e)}")
-                self.handle_failure(file_path, f"Error: {str(e)}")
-                return
+                    logger.error(f"PROCESS FAILED: {file_name}")
+                    self.handle_failure(file_path, "Gagal memproses file")
+                    return False
+
+            if not os.path.exists(file_path):
+                logger.warning(f"File disappeared: {file_name}")
+                self.job_store.update(file_path, job_store.FAILED, error="File disappeared")
+                self.m_failures.inc(reason="disappeared")
+                self.forget_file(file_path)
+                return False
+
+            # File sudah selesai ditulis tapi terlalu kecil - coba lagi nanti
+            if os.path.getsize(file_path) < folder.min_file_size and folder.readiness.is_write_finished(file_path):
+                logger.info(f"File too small ({os.path.getsize(file_path)} bytes), waiting...")
+                self.retry_later(file_path, delay=30)
+                return None
+
+            # File masih ada lock, cek lagi nanti - TANPA BATAS
+            if attempt == 1:
+                logger.info(f"File still locked, starting wait process...", extra=log_fields("wait", file=file_path))
+
+            # Backoff eksponensial, dibatasi sisa waktu stable window; close-after-write memajukan jadwal
+            delay = state["backoff"].next_delay()
+            remaining = folder.readiness.time_until_stable(file_path)
+            if remaining is not None and remaining > 0:
+                delay = min(delay, remaining)
+            self.scheduler.schedule(file_path, delay, self.enqueue_file, file_path)
+            return None
+
+        except Exception as e:
+            logger.error(f"ERROR during wait: {str(e)}")
+            self.m_failures.inc(reason="wait_error")
+            self.handle_failure(file_path, f"Error: {str(e)}")
+            return False
 
     def is_file_completely_unlocked(self, file_path):
         """CEK FILE SUDAH BENAR-BENAR BEBAS DARI SEMUA LOCK (READ & DELETE)"""
@@ -155,23 +745,24 @@ class MagicSoftFileWatcher(FileSystemEventHandler):
             if not os.path.exists(file_path):
                 return False
                 
-            # 2. Cek size minimal (5MB)
+            # 2. Cek selesai ditulis - close-after-write atau size/mtime stabil
+            folder = self.folder_for(file_path)
+            if not folder.readiness.is_write_finished(file_path):
+                return False
+                
+            # 3. Cek size minimal (default 5MB, per folder)
             file_size = os.path.getsize(file_path)
-            if file_size < 5 * 1024 * 1024:
+            if file_size < folder.min_file_size:
                 return False
                 
-            # 3. CEK BISA DIBACA (READ LOCK)
+            # 4. CEK BISA DIBACA (READ LOCK)
             if not self.is_file_readable(file_path):
                 return False
                 
-            # 4. CEK BISA DIHAPUS (DELETE LOCK) - INI YANG PENTING!
+            # 5. CEK BISA DIHAPUS (DELETE LOCK) - INI YANG PENTING!
             if not self.is_file_deletable(file_path):
                 return False
                 
-            # 5. Cek stability - file tidak berubah size
-            if not self.is_file_stable(file_path):
-                return False
-                
             return True
             
         except Exception as e:
@@ -189,109 +780,426 @@ class MagicSoftFileWatcher(FileSystemEventHandler):
     def is_file_deletable(self, file_path):
         """CEK UTAMA: Apakah file bisa dihapus (tidak ada process yang memegang lock)"""
         try:
-            # Coba rename file sementara - jika berhasil berarti tidak ada lock
-            temp_name = file_path + ".delete_test"
-            os.rename(file_path, temp_name)
-            # Kembalikan nama asli
-            os.rename(temp_name, file_path)
-            return True
-        except (IOError, PermissionError, OSError):
-            return False
-        except Exception:
+            # Probe tanpa rename - file tidak diubah dan tidak memicu event observer
+            return not self.lock_probe.is_locked(file_path)
+        except Exception as e:
+            logger.error(f"Lock probe error for {file_path}: {e}")
             return False
 
-    def is_file_stable(self, file_path, check_interval=3):
-        """Cek apakah ukuran file sudah stabil dengan toleransi 1%"""
+    def restore_delete_test_name(self, temp_path):
+        """Kembalikan nama file yang tertinggal .delete_test (crash di tengah cek rename versi lama)"""
+        original_path = temp_path[:-len(".delete_test")]
+        if os.path.exists(original_path):
+            logger.warning(f"Both {original_path} and {temp_path} exist, leaving them as is")
+            return None
         try:
-            size1 = os.path.getsize(file_path)
-            time.sleep(check_interval)
-            size2 = os.path.getsize(file_path)
-            
-            # Toleransi 1% untuk perubahan kecil
-            change_percent = abs(size2 - size1) / max(size1, 1) * 100
-            is_stable = (change_percent < 1.0)
-            
-            if not is_stable:
-                logger.info(f"File size change: {size1} -> {size2} ({change_percent:.2f}%)")
-                    
-            return is_stable
-            
-        except Exception as e:
-            logger.error(f"Error checking stability: {e}")
-            return False
+            os.rename(temp_path, original_path)
+            logger.info(f"Restored file name: {os.path.basename(original_path)}")
+            return original_path
+        except OSError as e:
+            logger.error(f"Could not restore {temp_path}: {e}")
+            return None
 
     def process_file_completely(self, file_path):
-        """PROSES FILE SETELAH BENAR-BENAR BEBAS DARI SEMUA LOCK"""
+        """PROSES FILE SETELAH BENAR-BENAR BEBAS DARI SEMUA LOCK
+
+        Return True jika berhasil, job_store.SPOOLED jika file masuk spool lokal,
+        None jika harus dicoba lagi nanti (copy terputus, spool penuh), False jika gagal.
+        """
         try:
             file_name = os.path.basename(file_path)
             final_size = self.get_file_size_mb(file_path)
-            logger.info(f"PROCESSING COMPLETELY UNLOCKED FILE: {file_name} ({final_size})")
+            logger.info(f"PROCESSING COMPLETELY UNLOCKED FILE: {file_name} ({final_size})",
+                        extra=log_fields("process", file=file_path))
 
-            # Validasi format filename
-            destination_folder, new_file_name = self.get_destination_folder_and_filename(file_name)
+            # Validasi format filename - tujuan dan mapping sesuai watch folder asal file
+            folder = self.folder_for(file_path)
+            destination_folder, new_file_name = self.get_destination_folder_and_filename(file_name, folder)
             if destination_folder is None:
+                self.m_failures.inc(reason="invalid_format")
                 self.handle_invalid_file(file_path, file_name)
                 return False
             
-            # Buat folder tujuan
-            now = datetime.now()
-            year_folder = str(now.year)
-            month_folder = now.strftime("%B")
-            day_folder = now.strftime("%d")
-
-            final_destination = os.path.join(destination_folder, year_folder, month_folder, day_folder)
-            os.makedirs(final_destination, exist_ok=True)
+            # Folder tujuan per tanggal rekaman (nama folder tanggal di-cache per hari)
+            metadata = self.read_file_metadata(file_path)
+            recorded_at = self.archive_date(file_path, metadata)
+            final_destination = self.resolver.dated_folder(destination_folder, recorded_at)
+
+            # Share tujuan sedang mati (circuit open) - langsung ke spool lokal tanpa menyentuh share
+            health = self.destination_health(folder.processed_folder)
+            if self.spool is not None and not health.breaker.is_closed():
+                return self.spool_file(file_path, file_name, final_destination, new_file_name, recorded_at,
+                                       folder.processed_folder, metadata)
+
+            success = self.archive_file(file_path, file_name, final_destination, new_file_name, recorded_at,
+                                        metadata=metadata)
+            if not success and os.path.exists(file_path) and not os.path.isdir(final_destination):
+                # Folder tujuan masih di cache tapi sudah dihapus dari luar - cache sudah dibuang, coba sekali lagi
+                logger.warning(f"Destination folder missing, retrying: {final_destination}")
+                success = self.archive_file(file_path, file_name, final_destination, new_file_name, recorded_at,
+                                            metadata=metadata)
+            if not success and self.spool is not None and os.path.exists(file_path) and not health.probe():
+                # Share putus di tengah proses - file tetap diterima lewat spool
+                return self.spool_file(file_path, file_name, final_destination, new_file_name, recorded_at,
+                                       folder.processed_folder, metadata)
+            return success
+
+        except Exception as ex:
+            logger.error(f"Error in process_file_completely: {ex}")
+            return False
+
+    def read_file_metadata(self, file_path):
+        """Metadata rekaman dari header container (hanya header yang dibaca), None jika tidak ada"""
+        if self.archive_date_source != "metadata":
+            return None
+        start = time.time()
+        metadata = read_metadata(file_path)
+        self.m_metadata_seconds.observe(time.time() - start)
+        if metadata is not None:
+            logger.info(f"METADATA: {os.path.basename(file_path)} recorded {metadata['creation_time']}, "
+                        f"{metadata.get('duration')}s, {metadata.get('width')}x{metadata.get('height')} "
+                        f"{metadata.get('codec')}", extra=log_fields("metadata", file=file_path, **metadata))
+        return metadata
+
+    def archive_date(self, file_path, metadata):
+        """Tanggal folder arsip: tanggal rekaman dari metadata, fallback mtime file"""
+        if self.archive_date_source == "now":
+            self.m_archive_date.inc(source="now")
+            return datetime.now()
+        when = recording_date(metadata)
+        if when is not None:
+            self.m_archive_date.inc(source="metadata")
+            return when
+        self.m_archive_date.inc(source="mtime")
+        return datetime.fromtimestamp(os.path.getmtime(file_path))
+
+    def archive_file(self, file_path, file_name, final_destination, new_file_name, archived_at, source_path=None,
+                     metadata=None):
+        """Simpan file ke folder tujuan final: dedup, fast move atau copy terverifikasi, katalog, hapus file
+
+        source_path: path asal di watch folder untuk katalog/alias (berbeda jika file berasal dari spool).
+        metadata: metadata rekaman untuk katalog (read_file_metadata).
+        """
+        source_path = source_path or file_path
+        try:
+            # Folder yang sudah pernah dibuat tidak di-mkdir lagi (cache LRU)
+            self.resolver.ensure_directory(final_destination)
             final_destination_path = os.path.join(final_destination, new_file_name)
 
-            logger.info(f"Moving to: {final_destination_path}")
+            # DEDUP - isi yang sama sudah ada di arsip, tidak perlu disimpan lagi
+            fingerprint = full_hash = original_path = None
+            if self.dedup is not None:
+                fingerprint, full_hash, original_path = self.find_duplicate(file_path, final_destination_path)
+                if original_path is not None and (self.dedup_policy != dedup.KEEP_BOTH
+                                                  or original_path == final_destination_path):
+                    return self.handle_duplicate(file_path, file_name, original_path, final_destination_path,
+                                                 full_hash, archived_at, source_path, metadata)
+                # Judul sama tapi isi beda - jangan menimpa file arsip yang sudah ada
+                final_destination_path = dedup.unique_path(final_destination_path)
+
+            logger.info(f"Moving to: {final_destination_path}",
+                        extra=log_fields("process", file=file_path, destination=final_destination_path))
+
+            # FAST PATH - satu device/volume yang sama, cukup rename atomic tanpa copy
+            if self.is_same_device(file_path, final_destination):
+                move_start = time.time()
+                if self.fast_move_file(file_path, final_destination_path, file_name):
+                    self.m_move_seconds.observe(time.time() - move_start)
+                    self.m_archived.inc(method="move")
+                    self.catalog_file(source_path, file_name, final_destination_path, archived_at,
+                                      metadata=metadata)
+                    self.register_fingerprint(source_path, final_destination_path, fingerprint, full_hash,
+                                              original_path)
+                    self.job_store.update(source_path, job_store.VERIFIED, destination=final_destination_path,
+                                          size=os.path.getsize(final_destination_path))
+                    logger.info(f"COMPLETE SUCCESS: Moved on same device: {file_name}")
+                    return True
+                logger.warning(f"Fast move failed, falling back to copy: {file_name}")
             
             # COPY FILE - karena sudah dipastikan benar-benar bebas
-            copy_success = self.safe_copy_file(file_path, final_destination_path, file_name)
+            self.job_store.update(source_path, job_store.COPYING, destination=final_destination_path,
+                                  size=os.path.getsize(file_path))
+            copy_success = self.safe_copy_file(file_path, final_destination_path, file_name, job_key=source_path)
             
             if copy_success:
+                if full_hash is None and copy_success.algorithm == dedup.FULL_HASH_ALGORITHM:
+                    full_hash = copy_success.checksum
+                self.catalog_file(source_path, file_name, final_destination_path, archived_at,
+                                  copy_success.checksum, copy_success.algorithm, metadata)
+                self.register_fingerprint(source_path, final_destination_path, fingerprint, full_hash, original_path)
                 # HAPUS ORIGINAL FILE - karena sudah dipastikan bisa dihapus
+                delete_start = time.time()
                 delete_success = self.safe_delete_file(file_path, file_name)
+                self.m_delete_seconds.observe(time.time() - delete_start)
                 if delete_success:
                     logger.info(f"COMPLETE SUCCESS: Copied and deleted original: {file_name}")
+                    self.m_archived.inc(method="copy")
                     return True
                 else:
                     logger.error(f"COPY SUCCESS BUT DELETE FAILED: {file_name}")
+                    self.m_failures.inc(reason="delete_failed")
                     return False
+            elif copy_success is None:
+                # Gangguan sementara - .partial dan journal disimpan, dilanjutkan saat retry
+                logger.warning(f"COPY INTERRUPTED, will resume: {file_name}")
+                self.m_failures.inc(reason="copy_interrupted")
+                self.resolver.invalidate(final_destination)
+                return None
             else:
                 logger.error(f"COPY FAILED: {file_name}")
+                self.m_failures.inc(reason="copy_failed")
+                self.resolver.invalidate(final_destination)
                 return False
 
         except Exception as ex:
-            logger.error(f"Error in process_file_completely: {ex}")
+            logger.error(f"Error in archive_file: {ex}")
+            # Folder tujuan mungkin dihapus dari luar - jangan percaya cache untuk percobaan berikutnya
+            self.resolver.invalidate(final_destination)
+            # I/O error (share putus sebentar) dicoba lagi nanti selama file sumber masih ada
+            return None if isinstance(ex, OSError) and os.path.exists(file_path) else False
+
+    def spool_file(self, file_path, file_name, final_destination, new_file_name, archived_at, destination_root,
+                   metadata=None):
+        """Tujuan tidak tersedia - pindahkan file ke spool lokal, disalurkan saat share pulih"""
+        destination_path = os.path.join(final_destination, new_file_name)
+
+        def staged(entry):
+            # Copy ke spool (beda device) - original masih ada di watch folder. Original harus terhapus
+            # sebelum entry bisa disalurkan, kalau tidak file diarsipkan dua kali (dari spool dan dari
+            # watch folder); job dicatat SPOOLED sebelum drain bisa selesai lebih dulu dan mencatat DELETED
+            if os.path.exists(file_path) and not self.safe_delete_file(file_path, file_name):
+                return False
+            self.job_store.update(file_path, job_store.SPOOLED, destination=destination_path)
+            return True
+
+        entry = self.spool.put(file_path, {"file_name": file_name,
+                                           "destination_root": destination_root,
+                                           "destination_folder": final_destination,
+                                           "new_file_name": new_file_name,
+                                           "archived_at": archived_at.timestamp(),
+                                           "metadata": metadata},
+                               on_staged=staged)
+        if entry is None:
+            self.m_failures.inc(reason="spool_unavailable")
+            return None
+        if entry is False:
+            # Entry spool sudah dibuang - file tetap di watch folder dan job dicatat FAILED
+            self.m_failures.inc(reason="delete_failed")
+            return False
+        self.m_spooled.inc()
+        logger.warning(f"SPOOLED (destination unavailable): {file_name}",
+                       extra=log_fields("spool", file=file_path, spool=entry.path, bytes=entry.size))
+        return job_store.SPOOLED
+
+    def drain_spooled(self, entry):
+        """Salurkan satu file dari spool ke tujuan final (dipanggil worker drain spool)"""
+        meta = entry.meta
+        logger.info(f"DRAINING SPOOL: {meta['file_name']}",
+                    extra=log_fields("drain", file=meta["source_path"], spool=entry.path, bytes=entry.size))
+        if self.archive_file(entry.path, meta["file_name"], meta["destination_folder"], meta["new_file_name"],
+                             datetime.fromtimestamp(meta["archived_at"]), source_path=meta["source_path"],
+                             metadata=meta.get("metadata")):
+            # Job dicatat dengan path asal di watch folder, bukan path spool
+            self.job_store.update(meta["source_path"], job_store.DELETED)
+            self.m_drained.inc()
+            return True
+        # Gagal - cek apakah share yang bermasalah (circuit breaker ikut ter-update)
+        health = self.spool_destination_health(entry)
+        if health is not None:
+            health.probe()
+        return False
+
+    def spool_destination_health(self, entry):
+        """Health monitor root tujuan entry spool, None jika root sudah tidak dikonfigurasi"""
+        root = entry.meta.get("destination_root") or self.folders[0].processed_folder
+        return self.destinations.get(self.destination_key(root))
+
+    def can_drain(self, entry):
+        """Entry spool boleh disalurkan jika circuit tujuannya closed"""
+        health = self.spool_destination_health(entry)
+        return health is None or health.breaker.is_closed()
+
+    def catalog_file(self, src_path, file_name, dst_path, archived_at, checksum=None, algorithm=None, metadata=None):
+        """Catat file yang sudah diarsipkan ke katalog (kode, nama program, judul, tanggal, size, hash, metadata)"""
+        if self.catalog is None:
+            return
+        try:
+            parts = file_name.split('_')
+            bahanpustaka_code = parts[0].upper()
+            kegiatan_code = parts[1].upper()
+            folder = self.folder_for(src_path) or self.folders[0]
+            self.catalog.add(make_entry(
+                dst_path, bahanpustaka_code, folder.bahanpustaka_map.get(bahanpustaka_code, bahanpustaka_code),
+                kegiatan_code, folder.kegiatan_map.get(kegiatan_code, kegiatan_code),
+                archived_at.strftime("%Y-%m-%d"), size=os.path.getsize(dst_path),
+                hash=checksum, hash_algorithm=algorithm if checksum else None,
+                source_path=src_path, metadata=metadata))
+        except Exception as e:
+            logger.error(f"Error writing catalog entry for {file_name}: {e}")
+
+    def find_duplicate(self, file_path, dst_path):
+        """Cari file arsip dengan isi sama: partial hash dulu, full hash hanya jika bertabrakan
+
+        Return (fingerprint, full_hash, original_path).
+        """
+        fingerprint = dedup.partial_fingerprint(file_path)
+        original_path, full_hash = self.dedup.find_duplicate(file_path, fingerprint, self.copy_chunk_size,
+                                                                self.bandwidth)
+        if original_path is None and os.path.exists(dst_path) and os.path.getsize(dst_path) == fingerprint[0]:
+            # Tujuan sudah ada dengan size sama (misal crash setelah publish sebelum hapus original)
+            if full_hash is None:
+                full_hash = copy_engine.hash_file(file_path, dedup.FULL_HASH_ALGORITHM, self.copy_chunk_size,
+                                                  self.bandwidth)
+            if copy_engine.hash_file(dst_path, dedup.FULL_HASH_ALGORITHM, self.copy_chunk_size) == full_hash:
+                self.dedup.add(dst_path, fingerprint, full_hash)
+                original_path = dst_path
+        return fingerprint, full_hash, original_path
+
+    def handle_duplicate(self, file_path, file_name, original_path, dst_path, full_hash, archived_at, source_path=None,
+                         metadata=None):
+        """File duplikat: sesuai policy buat hard link atau catat alias, lalu hapus original"""
+        source_path = source_path or file_path
+        alias_path = None
+        if original_path != dst_path:
+            if self.dedup_policy == dedup.LINK:
+                candidate = dedup.unique_path(dst_path)
+                if dedup.link_file(original_path, candidate):
+                    alias_path = candidate
+                    self.catalog_file(source_path, file_name, alias_path, archived_at, full_hash,
+                                      dedup.FULL_HASH_ALGORITHM, metadata)
+            self.dedup.add_alias(source_path, original_path, self.dedup_policy, alias_path=alias_path,
+                                 full_hash=full_hash)
+
+        logger.info(f"DUPLICATE: {file_name} has the same content as {original_path} "
+                    f"(policy {self.dedup_policy}{', linked ' + alias_path if alias_path else ''})",
+                    extra=log_fields("dedup", file=file_path, original=original_path, alias=alias_path,
+                                     policy=self.dedup_policy, hash=full_hash))
+        self.job_store.update(source_path, job_store.VERIFIED, destination=alias_path or original_path,
+                              hash=full_hash, hash_algorithm=dedup.FULL_HASH_ALGORITHM if full_hash else None)
+        if self.safe_delete_file(file_path, file_name):
+            self.m_archived.inc(method="dedup")
+            return True
+        self.m_failures.inc(reason="delete_failed")
+        return False
+
+    def register_fingerprint(self, file_path, dst_path, fingerprint, full_hash, original_path):
+        """Daftarkan file arsip baru ke index dedup (dan alias untuk policy keep-both)"""
+        if self.dedup is None or fingerprint is None:
+            return
+        try:
+            self.dedup.add(dst_path, fingerprint, full_hash)
+            if original_path is not None:
+                self.dedup.add_alias(file_path, original_path, dedup.KEEP_BOTH, alias_path=dst_path,
+                                     full_hash=full_hash)
+        except Exception as e:
+            logger.error(f"Error updating dedup index for {dst_path}: {e}")
+
+    def is_same_device(self, src_path, dst_folder):
+        """Cek apakah source dan folder tujuan ada di device yang sama (st_dev)"""
+        try:
+            return os.stat(src_path).st_dev == os.stat(dst_folder).st_dev
+        except OSError:
+            return False
+
+    def fast_move_file(self, src_path, dst_path, file_name):
+        """Pindah file dengan os.replace - O(1), tanpa copy data"""
+        try:
+            # Double check: pastikan file tidak sedang dipegang process lain
+            if not self.is_file_deletable(src_path):
+                logger.error(f"FAST MOVE FAILED: File became locked again: {file_name}")
+                return False
+
+            os.replace(src_path, dst_path)
+
+            if os.path.exists(dst_path) and not os.path.exists(src_path):
+                logger.info(f"FAST MOVE VERIFIED: {os.path.getsize(dst_path)} bytes",
+                            extra=log_fields("move", file=src_path, bytes=os.path.getsize(dst_path)))
+                return True
+            logger.error(f"FAST MOVE FAILED: Destination file not created: {file_name}")
             return False
 
-    def safe_copy_file(self, src_path, dst_path, file_name):
-        """Copy file dengan verifikasi"""
+        except OSError as e:
+            # Misal EXDEV (beda filesystem walau st_dev sama) - biarkan jalur copy yang menangani
+            logger.warning(f"FAST MOVE ERROR: {e} for file: {file_name}")
+            return False
+
+    def safe_copy_file(self, src_path, dst_path, file_name, job_key=None):
+        """Copy ke .partial dengan journal (resumable), verifikasi, lalu rename atomic ke nama final
+
+        job_key: path job di job store (path asal di watch folder jika src_path ada di spool).
+        Return CopyResult jika berhasil, None jika terputus (I/O error, bisa di-resume), False jika gagal.
+        """
+        partial_path = copy_engine.partial_path_for(dst_path)
+        journal_path = copy_engine.journal_path_for(dst_path)
         try:
-            logger.info("Copying file...")
+            logger.info("Copying file...", extra=log_fields("copy", file=src_path))
             
-            shutil.copy2(src_path, dst_path)
+            # File besar ke network share: beberapa stream paralel per range
+            if self.parallel_copy_streams > 1 and os.path.getsize(src_path) >= self.parallel_copy_threshold:
+                result = copy_engine.copy_file_parallel(src_path, partial_path, streams=self.parallel_copy_streams,
+                                                        range_size=self.parallel_range_size,
+                                                        chunk_size=self.copy_chunk_size,
+                                                        algorithm=self.hash_algorithm,
+                                                        journal_path=journal_path,
+                                                        governor=self.bandwidth)
+            else:
+                result = copy_engine.copy_file(src_path, partial_path, chunk_size=self.copy_chunk_size,
+                                               algorithm=self.hash_algorithm, journal_path=journal_path,
+                                               range_size=self.parallel_range_size, governor=self.bandwidth)
+            logger.info(f"COPY DONE: {result.bytes_copied} bytes in {result.elapsed:.2f}s "
+                        f"({result.throughput_mbps:.1f} MB/s, {result.method}, resumed {result.resumed_bytes} bytes)",
+                        extra=log_fields("copy", file=src_path, bytes=result.bytes_copied,
+                                         duration=round(result.elapsed, 3), mb_per_s=round(result.throughput_mbps, 1),
+                                         method=result.method, resumed_bytes=result.resumed_bytes))
+            self.m_copy_seconds.observe(result.elapsed)
+            self.m_copy_throughput.observe(result.throughput_mbps)
+            self.m_copy_bytes.inc(result.bytes_copied - result.resumed_bytes)
             
-            # Verify copy success
-            if os.path.exists(dst_path):
+            # Verify copy success - size source/tujuan dan checksum isi tujuan
+            if os.path.exists(partial_path):
                 src_size = os.path.getsize(src_path)
-                dst_size = os.path.getsize(dst_path)
                 
-                if src_size == dst_size:
-                    logger.info(f"COPY VERIFIED: {src_size} bytes")
-                    return True
+                verify_start = time.time()
+                verified = src_size == result.bytes_copied and copy_engine.verify_copy(result, partial_path,
+                                                                                       self.copy_chunk_size)
+                self.m_verify_seconds.observe(time.time() - verify_start)
+                if verified:
+                    # Hanya file yang sudah terverifikasi yang muncul dengan nama final
+                    copy_engine.publish(partial_path, dst_path, journal_path)
+                    if result.checksum:
+                        logger.info(f"COPY VERIFIED: {src_size} bytes, {result.algorithm}={result.checksum}",
+                                    extra=log_fields("verify", file=src_path, bytes=src_size, hash=result.checksum))
+                    else:
+                        logger.info(f"COPY VERIFIED: {src_size} bytes", extra=log_fields("verify", file=src_path, bytes=src_size))
+                    self.record_checksum(dst_path, result)
+                    self.job_store.update(job_key or src_path, job_store.VERIFIED, hash=result.checksum,
+                                          hash_algorithm=result.algorithm, destination=dst_path)
+                    return result
                 else:
-                    logger.error(f"COPY SIZE MISMATCH: {src_size} vs {dst_size}")
-                    if os.path.exists(dst_path):
-                        os.remove(dst_path)
+                    logger.error(f"COPY VERIFY FAILED: {src_size} vs {os.path.getsize(partial_path)} bytes, {file_name}",
+                                 extra=log_fields("verify", file=src_path, bytes=src_size))
+                    copy_engine.discard_partial(dst_path)
                     return False
             else:
                 logger.error("COPY FAILED: Destination file not created")
                 return False
                 
         except Exception as e:
+            # .partial dan journal dibiarkan supaya percobaan berikutnya bisa resume
             logger.error(f"Error in safe_copy_file: {e}")
-            return False
+            return None
+
+    def record_checksum(self, dst_path, result):
+        """Simpan checksum hasil copy untuk audit"""
+        if result.checksum is None:
+            return
+        try:
+            with self.checksum_log_lock:
+                with open(self.checksum_log_path, "a", encoding="utf-8") as f:
+                    f.write(f"{datetime.now().isoformat()}\t{result.algorithm}\t{result.checksum}\t"
+                            f"{result.bytes_copied}\t{dst_path}\n")
+        except Exception as e:
+            logger.error(f"Error writing checksum log: {e}")
 
     def safe_delete_file(self, file_path, file_name):
         """Hapus file dengan confidence tinggi"""
@@ -303,10 +1211,10 @@ class MagicSoftFileWatcher(FileSystemEventHandler):
             # Double check: pastikan file masih bisa dihapus
             if self.is_file_deletable(file_path):
                 os.remove(file_path)
-                logger.info(f"ORIGINAL DELETED: {file_name}")
+                logger.info(f"ORIGINAL DELETED: {file_name}", extra=log_fields("delete", file=file_path))
                 return True
             else:
-                logger.error(f"DELETE FAILED: File became locked again: {file_name}")
+                logger.error(f"DELETE FAILED: File became locked again: {file_name}", extra=log_fields("delete", file=file_path))
                 return False
                 
         except Exception as e:
@@ -314,9 +1222,10 @@ class MagicSoftFileWatcher(FileSystemEventHandler):
             return False
 
     def retry_later(self, file_path, delay=30):
-        """Coba lagi nanti untuk file kecil"""
-        logger.info(f"Retrying small file in {delay}s: {os.path.basename(file_path)}")
-        threading.Timer(delay, self.process_file_immediately, [file_path]).start()
+        """Coba lagi nanti (file kecil, copy terputus, spool penuh)"""
+        logger.info(f"Retrying file in {delay}s: {os.path.basename(file_path)}",
+                    extra=log_fields("wait", file=file_path, delay=delay))
+        self.scheduler.schedule(file_path, delay, self.enqueue_file, file_path)
 
     def get_file_size_mb(self, file_path):
         """Get file size in MB"""
@@ -336,17 +1245,16 @@ class MagicSoftFileWatcher(FileSystemEventHandler):
             logger.error(f"ERROR getting local IP: {e}")
             return "Unknown"
 
-    def show_message_box(self, title, message):
-        """Show Windows message box"""
-        ctypes.windll.user32.MessageBoxW(0, message, title, 0x10) 
+    def show_message_box(self, title, message, category="error"):
+        """Kirim notifikasi (popup/log/webhook) lewat antrian async"""
+        self.notifier.notify(title, message, category)
     
     def handle_invalid_file(self, file_path, file_name):
         """Handle file dengan format tidak valid"""
         msg = f"File '{file_name}' tidak sesuai format.\n\nFormat: BAHANPUSTAKA_KEGIATAN_JUDUL.ext"
         logger.error(msg)
-        self.show_message_box("Format Error", msg)
+        self.show_message_box("Format Error", msg, category="format")
         
-        time.sleep(2)
         if os.path.exists(file_path) and self.is_file_deletable(file_path):
             try:
                 os.remove(file_path)
@@ -357,36 +1265,20 @@ class MagicSoftFileWatcher(FileSystemEventHandler):
     def handle_failure(self, file_path, message):
         """Handle ketika file gagal diproses"""
         file_name = os.path.basename(file_path)
-        logger.error(f"Failed to process: {file_name} - {message}")
+        logger.error(f"Failed to process: {file_name} - {message}", extra=log_fields("failure", file=file_path, reason=message))
         
-        if file_path in self.processed_files:
-            self.processed_files.remove(file_path)
+        self.job_store.update(file_path, job_store.FAILED, error=message)
+        self.forget_file(file_path)
             
         self.show_message_box("File Watcher Error", 
-                             f"Gagal memproses: {file_name}\n\n{message}")
-
-    def get_destination_folder_and_filename(self, file_name):
-        """Parse filename dan tentukan folder tujuan"""
-        parts = file_name.split('_')
-        if len(parts) < 3:
-            logger.error(f"Invalid filename format: {file_name}")
-            return None, None
-        
-        if not '.' in parts[-1]:
-            logger.error(f"File without extension: {file_name}")
-            return None, None
-        
-        bahanpustaka_code = parts[0].upper()
-        kegiatan_code = parts[1].upper()
-        judul_parts = parts[2:]
-        new_file_name = '_'.join(judul_parts)
-        
-        bahanpustaka_folder = self.bahanpustaka_map.get(bahanpustaka_code, bahanpustaka_code)
-        kegiatan_folder = self.kegiatan_map.get(kegiatan_code, kegiatan_code)
-        full_path = os.path.join(self.processed_folder, bahanpustaka_folder, kegiatan_folder)
+                             f"Gagal memproses: {file_name}\n\n{message}", category="failure")
+
+    def get_destination_folder_and_filename(self, file_name, folder=None):
+        """Parse filename dan tentukan folder tujuan (mapping dan root tujuan milik watch folder)"""
+        full_path, new_file_name = self.resolver.destination_folder(file_name, folder or self.folders[0])
         
-        logger.info(f"Destination folder: {full_path}")
-        logger.info(f"New filename: {new_file_name}")
+        logger.debug(f"Destination folder: {full_path}")
+        logger.debug(f"New filename: {new_file_name}")
         
         return full_path, new_file_name
 
@@ -395,7 +1287,7 @@ def create_sample_mapping_files(kegiatan_map_path, bahanpustaka_map_path):
     # Sample kegiatan mapping
     if not os.path.exists(kegiatan_map_path):
         sample_kegiatan = {
-	   			"KHI": "KEPRI HARI INI",
+	   			"KHI": {"name": "KEPRI HARI INI", "priority": 10},
     				"KM": "KEPRI MENYAPA",
     				"NB": "NGAJI BARENG",
     				"MA": "MIMBAR AGAMA",
@@ -421,26 +1313,35 @@ def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     watch_folder = r"C:\TestWatch"
     processed_folder =  watch_folder
+    observer_mode = "auto"  # "native", "polling" (scandir snapshot, untuk share SMB/NFS) atau "auto"
     kegiatan_map_path = os.path.join(script_dir, "kegiatan_map.json")
     bahanpustaka_map_path = os.path.join(script_dir, "bahanpustaka_map.json")
+    config_path = os.path.join(script_dir, DEFAULT_CONFIG_PATH)
 
     logger.info("=== MAGICSOFT FILE WATCHER STARTING ===")  
 
-    # Cek dan buat watch folder jika tidak exist
-    if not os.path.exists(watch_folder):
-        logger.info(f"Watch folder does not exist, creating: {watch_folder}")
-        os.makedirs(watch_folder, exist_ok=True)
-
-    # Buat sample mapping files
-    create_sample_mapping_files(kegiatan_map_path, bahanpustaka_map_path)
+    if os.path.exists(config_path):
+        # Multi folder: semua watch folder, tujuan dan mapping dari satu file konfigurasi
+        logger.info(f"Using config file: {config_path}")
+        event_handler = MagicSoftFileWatcher.from_config(config_path)
+        observer_mode = event_handler.options.get("observer_mode", observer_mode)
+    else:
+        # Buat sample mapping files
+        create_sample_mapping_files(kegiatan_map_path, bahanpustaka_map_path)
+        event_handler = MagicSoftFileWatcher(watch_folder, processed_folder, kegiatan_map_path, bahanpustaka_map_path)
 
-    # Buat processed folder
-    os.makedirs(processed_folder, exist_ok=True) 
+    # Cek dan buat watch folder / processed folder jika tidak exist
+    for folder in event_handler.folders:
+        if not os.path.exists(folder.path):
+            logger.info(f"Watch folder does not exist, creating: {folder.path}")
+            os.makedirs(folder.path, exist_ok=True)
+        os.makedirs(folder.processed_folder, exist_ok=True)
 
-    # Inisialisasi dan start file watcher
-    event_handler = MagicSoftFileWatcher(watch_folder, processed_folder, kegiatan_map_path, bahanpustaka_map_path)
-    observer = Observer()
-    observer.schedule(event_handler, watch_folder, recursive=False)
+    # Inisialisasi dan start file watcher - satu observer untuk semua folder
+    event_handler.start()
+    observer = create_observer([folder.path for folder in event_handler.folders], observer_mode)
+    for folder in event_handler.folders:
+        observer.schedule(event_handler, folder.path, recursive=folder.recursive)
     observer.start()
     logger.info("File watcher started successfully")
 
@@ -448,6 +1349,16 @@ def main():
         # Main loop
         while True:
             time.sleep(10)
+            stats = event_handler.get_stats()
+            if stats["queue_depth"] or stats["busy_workers"]:
+                logger.info(f"PIPELINE: queue={stats['queue_depth']} busy={stats['busy_workers']}/{stats['worker_count']} "
+                            f"done={stats['completed']} failed={stats['failed']}")
+            spool_stats = stats.get("spool")
+            if spool_stats and spool_stats["files"]:
+                circuits = ", ".join(f"{path}={destination['state']}"
+                                     for path, destination in stats["destinations"].items())
+                logger.info(f"SPOOL: files={spool_stats['files']} size={spool_stats['bytes'] / 1024 ** 3:.2f}GB "
+                            f"drain={spool_stats['drain_rate_mbps']}MB/s circuit={circuits}")
     except KeyboardInterrupt:
         logger.info("Service stopped by user")
         observer.stop()
@@ -456,9 +1367,13 @@ def main():
         observer.stop()
     
     observer.join()
+    event_handler.stop()
     logger.info("File watcher stopped")
 
 if __name__ == "__main__":
+    # SETUP LOGGING - async (QueueHandler), JSON lines dengan rotasi; volume per stage dari watcher_config.json
+    config_options = load_options(os.path.join(os.path.dirname(os.path.abspath(__file__)), DEFAULT_CONFIG_PATH))
+    log_service = setup_logging('file_watcher.log', **logging_settings(config_options))
     try:
         main()
     except Exception as e:
@@ -473,4 +1388,6 @@ if __name__ == "__main__":
             
         # Write to error log
         with open('file_watcher_critical.log', 'a', encoding='utf-8') as f:
-            f.write(f"{datetime.now()} - {error_msg}\n")
\ No newline at end of file
+            f.write(f"{datetime.now()} - {error_msg}\n")
+    finally:
+        log_service.stop()
\ No newline at end of file
@@ -0,0 +1,225 @@
+import time
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class TokenBucket:
+    """Token bucket thread-safe; rate None = tanpa batas
+
+    consume(n) boleh lebih besar dari burst: token jadi negatif (utang) dan pemanggil
+    tidur sampai utang terbayar, jadi ukuran chunk copy tidak perlu diubah.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self.lock = threading.Lock()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst or 0
+        self.last = time.monotonic()
+        self.throttled_seconds = 0.0
+        self.consumed = 0
+
+    def set_rate(self, rate, burst=None):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            if burst is not None:
+                self.burst = burst
+            if rate is not None and self.burst is not None:
+                self.tokens = min(self.tokens, self.burst)
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(self.burst or self.rate, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def consume(self, n):
+        with self.lock:
+            self.consumed += n
+            if self.rate is None:
+                return 0.0
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.throttled_seconds += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def _parse_clock(value):
+    hour, minute = value.split(":")
+    return int(hour) * 60 + int(minute)
+
+
+class BandwidthProfile:
+    """Batas bandwidth untuk rentang jam tertentu, misal jam siaran
+
+    {"name": "siaran", "start": "05:00", "end": "23:00", "read_mbps": 30, "write_mbps": 30}
+    Rentang yang melewati tengah malam (start > end) didukung.
+    """
+
+    def __init__(self, name, start, end, read_mbps=None, write_mbps=None):
+        self.name = name
+        self.start = _parse_clock(start)
+        self.end = _parse_clock(end)
+        self.read_mbps = read_mbps
+        self.write_mbps = write_mbps
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("name", f"{data['start']}-{data['end']}"), data["start"], data["end"],
+                   data.get("read_mbps"), data.get("write_mbps"))
+
+    def matches(self, now):
+        minute = now.hour * 60 + now.minute
+        if self.start <= self.end:
+            return self.start <= minute < self.end
+        return minute >= self.start or minute < self.end
+
+
+class BandwidthGovernor:
+    """Batas bandwidth baca (source) dan tulis (tujuan) bersama untuk semua worker copy
+
+    Batas dasar read_mbps/write_mbps bisa diganti per jam lewat profiles. Jika
+    latency_backoff aktif, latency baca source (ms per MB, EWMA) dibandingkan dengan
+    baseline: naik melewati latency_threshold x baseline -> rate baca dikali 0.7
+    (minimal min_fraction), normal lagi -> naik pelan-pelan (AIMD).
+
+    Baseline yang dipelajari adalah minimum yang meluruh: tiap interval baseline bergerak
+    baseline_decay ke arah EWMA, jadi satu read super cepat (page cache) tidak
+    mengunci baseline di dekat nol selamanya.
+    """
+
+    def __init__(self, read_mbps=None, write_mbps=None, profiles=None, latency_backoff=False,
+                 latency_threshold=2.0, latency_baseline_ms=None, min_fraction=0.1, adjust_interval=1.0,
+                 baseline_decay=0.02):
+        self.base_read_mbps = read_mbps
+        self.base_write_mbps = write_mbps
+        self.profiles = [p if isinstance(p, BandwidthProfile) else BandwidthProfile.from_dict(p)
+                         for p in (profiles or [])]
+        self.latency_backoff = latency_backoff
+        self.latency_threshold = latency_threshold
+        self.latency_baseline_ms = latency_baseline_ms
+        self.learn_baseline = latency_baseline_ms is None
+        self.baseline_decay = baseline_decay
+        self.min_fraction = min_fraction
+        self.adjust_interval = adjust_interval
+
+        self.read_bucket = TokenBucket()
+        self.write_bucket = TokenBucket()
+        self.lock = threading.Lock()
+        self.factor = 1.0
+        self.latency_ewma_ms = None
+        self.window_start = time.monotonic()
+        self.window_bytes = 0
+        self.window_throughput = None
+        self.backoff_base_mbps = None
+        self.profile_name = None
+        self.read_limit_mbps = None
+        self.write_limit_mbps = None
+        self._apply_limits()
+
+    def _current_limits(self):
+        now = datetime.now()
+        for profile in self.profiles:
+            if profile.matches(now):
+                return profile.name, profile.read_mbps, profile.write_mbps
+        return None, self.base_read_mbps, self.base_write_mbps
+
+    def _apply_limits(self):
+        """Hitung ulang rate bucket dari profile aktif dan faktor back-off latency"""
+        profile_name, read_mbps, write_mbps = self._current_limits()
+        if profile_name != self.profile_name:
+            logger.info(f"Bandwidth profile: {profile_name or 'default'} (read {read_mbps or '-'} MB/s, "
+                        f"write {write_mbps or '-'} MB/s)")
+            self.profile_name = profile_name
+        if self.factor < 1.0:
+            base = read_mbps or self.backoff_base_mbps
+            read_mbps = max(base * self.factor, base * self.min_fraction) if base else None
+        self.read_limit_mbps = read_mbps
+        self.write_limit_mbps = write_mbps
+        self.read_bucket.set_rate(read_mbps * MB if read_mbps else None, read_mbps * MB if read_mbps else None)
+        self.write_bucket.set_rate(write_mbps * MB if write_mbps else None, write_mbps * MB if write_mbps else None)
+
+    def acquire_read(self, n):
+        self._maybe_adjust()
+        return self.read_bucket.consume(n)
+
+    def acquire_write(self, n):
+        self._maybe_adjust()
+        return self.write_bucket.consume(n)
+
+    def observe_read(self, seconds, n):
+        """Catat latency satu read dari source (dipakai untuk back-off dinamis)"""
+        if not n:
+            return
+        latency = seconds * 1000 / (n / MB)
+        with self.lock:
+            self.window_bytes += n
+            if self.latency_ewma_ms is None:
+                self.latency_ewma_ms = latency
+            else:
+                self.latency_ewma_ms = 0.8 * self.latency_ewma_ms + 0.2 * latency
+
+    def _maybe_adjust(self):
+        now = time.monotonic()
+        with self.lock:
+            elapsed = now - self.window_start
+            if elapsed < self.adjust_interval:
+                return
+            self.window_throughput = self.window_bytes / elapsed / MB
+            self.window_start = now
+            self.window_bytes = 0
+            if self.latency_backoff and self.latency_ewma_ms is not None:
+                if self.learn_baseline:
+                    if self.latency_baseline_ms is None or self.latency_ewma_ms < self.latency_baseline_ms:
+                        self.latency_baseline_ms = self.latency_ewma_ms
+                    else:
+                        self.latency_baseline_ms += (self.latency_ewma_ms - self.latency_baseline_ms) * self.baseline_decay
+                if self.latency_ewma_ms > self.latency_baseline_ms * self.latency_threshold:
+                    if self.factor == 1.0:
+                        self.backoff_base_mbps = self.window_throughput or None
+                        logger.warning(f"SOURCE LATENCY HIGH: {self.latency_ewma_ms:.1f} ms/MB "
+                                       f"(baseline {self.latency_baseline_ms:.1f}), throttling reads")
+                    self.factor = max(self.min_fraction, self.factor * 0.7)
+                elif self.factor < 1.0:
+                    self.factor = min(1.0, self.factor + 0.1)
+        self._apply_limits()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "profile": self.profile_name or "default",
+                "read_limit_mbps": round(self.read_limit_mbps, 1) if self.read_limit_mbps else None,
+                "write_limit_mbps": round(self.write_limit_mbps, 1) if self.write_limit_mbps else None,
+                "factor": round(self.factor, 2),
+                "latency_ms_per_mb": round(self.latency_ewma_ms, 2) if self.latency_ewma_ms is not None else None,
+                "latency_baseline_ms": round(self.latency_baseline_ms, 2) if self.latency_baseline_ms else None,
+                "read_throughput_mbps": round(self.window_throughput, 1) if self.window_throughput else None,
+                "throttled_read_seconds": round(self.read_bucket.throttled_seconds, 3),
+                "throttled_write_seconds": round(self.write_bucket.throttled_seconds, 3),
+                "bytes_read": self.read_bucket.consumed,
+                "bytes_written": self.write_bucket.consumed,
+            }
+
+
+def create_governor(options):
+    """BandwidthGovernor dari options watcher, None jika tidak ada batas yang diatur"""
+    read_mbps = options.get("bandwidth_read_mbps")
+    write_mbps = options.get("bandwidth_write_mbps")
+    profiles = options.get("bandwidth_profiles") or []
+    latency_backoff = options.get("bandwidth_latency_backoff", False)
+    if not (read_mbps or write_mbps or profiles or latency_backoff):
+        return None
+    return BandwidthGovernor(read_mbps, write_mbps, profiles, latency_backoff=latency_backoff,
+                             latency_threshold=options.get("bandwidth_latency_threshold", 2.0),
+                             latency_baseline_ms=options.get("bandwidth_latency_baseline_ms"),
+                             min_fraction=options.get("bandwidth_min_fraction", 0.1),
+                             baseline_decay=options.get("bandwidth_latency_baseline_decay", 0.02))
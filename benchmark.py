@@ -0,0 +1,640 @@
+"""Benchmark MagicSoft File Watcher (jalan di Linux)
+
+Contoh:
+    python benchmark.py copy --size-mb 512 --streams 1 2 4 8
+    python benchmark.py --output e2e.json e2e --count 20 --size-mb 8 32 --writers 4 --write-mbps 20
+    python benchmark.py multinode --nodes 3 --count 60 --kill-node 0 --kill-after 2
+    python benchmark.py metadata --size-mb 16 1024 16384 65536
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import signal
+import struct
+import sqlite3
+import argparse
+import builtins
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+
+import copy_engine
+import media_metadata
+
+
+class ThrottledFile:
+    """Wrapper file yang mensimulasikan share lambat: latency per request + bandwidth per stream"""
+
+    def __init__(self, raw, latency, bandwidth):
+        self.raw = raw
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def _delay(self, n):
+        time.sleep(self.latency + (n / self.bandwidth if self.bandwidth else 0))
+
+    def write(self, data):
+        n = self.raw.write(data)
+        self._delay(n)
+        return n
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        self._delay(n or 0)
+        return n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class ThrottledShare:
+    """Mock share lambat: semua open() di bawah root folder ini di-throttle"""
+
+    def __init__(self, root, latency=0.002, bandwidth_mbps=40):
+        self.root = os.path.abspath(root)
+        self.latency = latency
+        self.bandwidth = bandwidth_mbps * 1024 * 1024
+        self.original_open = builtins.open
+
+    def _open(self, path, *args, **kwargs):
+        raw = self.original_open(path, *args, **kwargs)
+        if isinstance(path, str) and os.path.abspath(path).startswith(self.root):
+            return ThrottledFile(raw, self.latency, self.bandwidth)
+        return raw
+
+    def __enter__(self):
+        copy_engine.open = self._open
+        return self
+
+    def __exit__(self, *exc):
+        del copy_engine.open
+
+
+def make_file(path, size):
+    """Buat file random dengan ukuran tertentu"""
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            n = min(len(block), size - written)
+            f.write(block[:n])
+            written += n
+
+
+def bench_copy(args):
+    """Sequential copy (safe_copy_file) vs copy paralel ke mock share lambat"""
+    work_dir = tempfile.mkdtemp(prefix="bench_copy_")
+    share_dir = os.path.join(work_dir, "share")
+    os.makedirs(share_dir)
+    src = os.path.join(work_dir, "KL_KHI_Benchmark.mp4")
+    size = args.size_mb * 1024 * 1024
+    make_file(src, size)
+
+    results = {"benchmark": "copy", "size_bytes": size, "latency": args.latency,
+               "bandwidth_mbps": args.bandwidth_mbps, "runs": []}
+    try:
+        with ThrottledShare(share_dir, args.latency, args.bandwidth_mbps):
+            for streams in args.streams:
+                dst = os.path.join(share_dir, f"copy_{streams}.mp4")
+                start = time.time()
+                if streams <= 1:
+                    result = copy_engine.copy_file(src, dst, chunk_size=args.chunk_mb * 1024 * 1024)
+                else:
+                    result = copy_engine.copy_file_parallel(src, dst, streams=streams,
+                                                            range_size=args.range_mb * 1024 * 1024,
+                                                            chunk_size=args.chunk_mb * 1024 * 1024)
+                # Waktu total termasuk verifikasi checksum tujuan, sama seperti safe_copy_file
+                ok = copy_engine.verify_copy(result, dst)
+                elapsed = time.time() - start
+                mb_per_s = size / (1024 * 1024) / elapsed
+                results["runs"].append({"streams": streams, "method": result.method,
+                                        "seconds": round(elapsed, 3),
+                                        "mb_per_s": round(mb_per_s, 1), "verified": ok})
+                print(f"streams={streams:<3} {elapsed:8.2f}s {mb_per_s:8.1f} MB/s verified={ok}")
+                os.remove(dst)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    baseline = next((r["seconds"] for r in results["runs"] if r["streams"] <= 1), None)
+    if baseline:
+        for run in results["runs"]:
+            run["speedup"] = round(baseline / run["seconds"], 2) if run["seconds"] else None
+    return results
+
+
+def percentile(values, pct):
+    """Percentile nearest-rank"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb():
+    """Peak RSS proses ini (ru_maxrss dalam KB di Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_codes(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return sorted(json.load(f))
+
+
+def make_recordings(count, sizes_mb, kegiatan_codes, bahanpustaka_codes, seed):
+    """Nama BAHANPUSTAKA_KEGIATAN_JUDUL.ext dan ukuran file sintetis (deterministik per seed)"""
+    rng = random.Random(seed)
+    extensions = [".mp4", ".mov", ".mxf"]
+    recordings = []
+    for i in range(count):
+        name = (f"{rng.choice(bahanpustaka_codes)}_{rng.choice(kegiatan_codes)}_"
+                f"Bench{i:05d}_{rng.randrange(10 ** 6):06d}{rng.choice(extensions)}")
+        recordings.append((name, int(sizes_mb[i % len(sizes_mb)] * 1024 * 1024)))
+    return recordings
+
+
+class SlowWriter(threading.Thread):
+    """Simulasi recorder: buat file di watch folder lalu append per chunk dengan bandwidth terbatas"""
+
+    def __init__(self, jobs, watch_dir, chunk_size, write_mbps, block, records):
+        super().__init__(daemon=True)
+        self.jobs = jobs
+        self.watch_dir = watch_dir
+        self.chunk_size = chunk_size
+        self.bandwidth = write_mbps * 1024 * 1024 if write_mbps else 0
+        self.block = block
+        self.records = records
+
+    def run(self):
+        while True:
+            try:
+                name, size = self.jobs.pop()
+            except IndexError:
+                return
+            path = os.path.join(self.watch_dir, name)
+            record = {"name": name, "size": size, "write_start": time.time()}
+            with open(path, "wb") as f:
+                written = 0
+                while written < size:
+                    n = min(self.chunk_size, size - written)
+                    f.write(self.block[:n])
+                    f.flush()
+                    written += n
+                    if self.bandwidth:
+                        time.sleep(n / self.bandwidth)
+            # Drop = saat recorder menutup file
+            record["dropped"] = time.time()
+            self.records[path] = record
+
+
+def bench_e2e(args):
+    """End-to-end: slow writer -> MagicSoftFileWatcher -> archive, latency drop-to-archive per file"""
+    from watchdog.observers import Observer
+    import PCRecord
+    from structured_logging import setup_logging
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    work_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    watch_dir = os.path.join(work_dir, "watch")
+    archive_dir = args.archive_dir or os.path.join(work_dir, "archive")
+    os.makedirs(watch_dir)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    kegiatan_map_path = args.kegiatan_map or os.path.join(script_dir, "kegiatan_map.json")
+    bahanpustaka_map_path = args.bahanpustaka_map or os.path.join(script_dir, "bahanpustaka_map.json")
+    if not os.path.exists(kegiatan_map_path) or not os.path.exists(bahanpustaka_map_path):
+        kegiatan_map_path = os.path.join(work_dir, "kegiatan_map.json")
+        bahanpustaka_map_path = os.path.join(work_dir, "bahanpustaka_map.json")
+        PCRecord.create_sample_mapping_files(kegiatan_map_path, bahanpustaka_map_path)
+
+    recordings = make_recordings(args.count, args.size_mb, load_codes(kegiatan_map_path),
+                                 load_codes(bahanpustaka_map_path), args.seed)
+    total_bytes = sum(size for _, size in recordings)
+    chunk_size = int(args.chunk_kb * 1024)
+    block = random.Random(args.seed).getrandbits(8 * chunk_size).to_bytes(chunk_size, "little")
+
+    log_service = setup_logging(os.path.join(work_dir, "bench_e2e.log"), console=False)
+    options = {
+        "worker_count": args.workers,
+        "min_file_size": args.min_file_size_mb * 1024 * 1024,
+        "stable_window": args.stable_window,
+        "hash_algorithm": None if args.no_hash else copy_engine.DEFAULT_HASH_ALGORITHM,
+        "job_store_path": os.path.join(work_dir, "jobs.db"),
+        "checksum_log_path": os.path.join(work_dir, "checksums.log"),
+        "catalog_path": os.path.join(work_dir, "catalog.db"),
+        "dedup_index_path": os.path.join(work_dir, "dedup.db"),
+        "spool_dir": os.path.join(work_dir, "spool"),
+        "notify_sinks": ["none"],
+        "metrics_port": None,
+        "metrics_dump_path": None,
+    }
+    watcher = PCRecord.MagicSoftFileWatcher(watch_dir, archive_dir, kegiatan_map_path, bahanpustaka_map_path, options)
+    watcher.start()
+    observer = Observer()
+    observer.schedule(watcher, watch_dir, recursive=False)
+    observer.start()
+
+    records = {}
+    jobs = list(reversed(recordings))
+    writers = [SlowWriter(jobs, watch_dir, chunk_size, args.write_mbps, block, records)
+               for _ in range(max(1, args.writers))]
+    print(f"e2e: {args.count} files, {total_bytes / 1024 ** 3:.2f} GB, {len(writers)} writers, "
+          f"{args.workers} workers -> {work_dir}")
+
+    start = time.time()
+    for writer in writers:
+        writer.start()
+
+    # Tunggu sampai setiap file muncul di archive (tujuan dihitung dengan aturan watcher)
+    latencies = []
+    pending = {}
+    deadline = start + args.timeout
+    while time.time() < deadline:
+        for path, record in list(records.items()):
+            if path in pending or "archived" in record:
+                continue
+            folder, new_name = watcher.get_destination_folder_and_filename(record["name"])
+            now = datetime.now()
+            pending[path] = os.path.join(folder, str(now.year), now.strftime("%B"), now.strftime("%d"), new_name)
+        for path, destination in list(pending.items()):
+            if os.path.exists(destination) and not os.path.exists(path):
+                record = records[path]
+                record["archived"] = time.time()
+                latencies.append(record["archived"] - record["dropped"])
+                del pending[path]
+        if len(latencies) >= len(recordings):
+            break
+        time.sleep(0.01)
+    elapsed = time.time() - start
+
+    observer.stop()
+    observer.join()
+    watcher.stop()
+    log_service.stop()
+
+    archived_bytes = sum(r["size"] for r in records.values() if "archived" in r)
+    minutes = elapsed / 60
+    results = {
+        "benchmark": "e2e",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "python": sys.version.split()[0],
+        "params": {"count": args.count, "size_mb": args.size_mb, "writers": args.writers,
+                   "write_mbps": args.write_mbps, "chunk_kb": args.chunk_kb, "workers": args.workers,
+                   "stable_window": args.stable_window, "hash": not args.no_hash, "seed": args.seed},
+        "files": len(recordings),
+        "archived": len(latencies),
+        "bytes": total_bytes,
+        "seconds": round(elapsed, 3),
+        "files_per_min": round(len(latencies) / minutes, 2) if minutes else None,
+        "gb_per_min": round(archived_bytes / 1024 ** 3 / minutes, 3) if minutes else None,
+        "latency_p50": round(percentile(latencies, 50), 3) if latencies else None,
+        "latency_p95": round(percentile(latencies, 95), 3) if latencies else None,
+        "latency_p99": round(percentile(latencies, 99), 3) if latencies else None,
+        "latency_max": round(max(latencies), 3) if latencies else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    print(f"archived {results['archived']}/{results['files']} in {results['seconds']}s: "
+          f"{results['files_per_min']} files/min, {results['gb_per_min']} GB/min, "
+          f"latency p50={results['latency_p50']}s p95={results['latency_p95']}s p99={results['latency_p99']}s, "
+          f"peak RSS {results['peak_rss_mb']} MB")
+    if not args.keep:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def run_node(args):
+    """Satu node watcher untuk benchmark multinode (dijalankan sebagai subprocess)"""
+    from watchdog.observers import Observer
+    import PCRecord
+    from structured_logging import setup_logging
+
+    os.makedirs(args.node_dir, exist_ok=True)
+    log_service = setup_logging(os.path.join(args.node_dir, "node.log"), console=False)
+    options = {
+        "worker_count": args.workers,
+        "min_file_size": 1,
+        "stable_window": args.stable_window,
+        "job_store_path": os.path.join(args.node_dir, "jobs.db"),
+        "checksum_log_path": os.path.join(args.node_dir, "checksums.log"),
+        "catalog_path": os.path.join(args.node_dir, "catalog.db"),
+        "dedup_index_path": os.path.join(args.node_dir, "dedup.db"),
+        "spool_dir": os.path.join(args.node_dir, "spool"),
+        "notify_sinks": ["none"],
+        "metrics_port": None,
+        "metrics_dump_path": None,
+        "lease_dir": args.lease_dir,
+        "node_id": args.node_id,
+        "lease_ttl": args.lease_ttl,
+        "lease_clock_skew": 0,
+    }
+    watcher = PCRecord.MagicSoftFileWatcher(args.watch_dir, args.archive_dir, args.kegiatan_map,
+                                            args.bahanpustaka_map, options)
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    watcher.start()
+    observer = Observer()
+    observer.schedule(watcher, args.watch_dir, recursive=False)
+    observer.start()
+    stop_event.wait()
+    observer.stop()
+    observer.join()
+    stats = watcher.get_stats()["leases"]
+    watcher.stop()
+    log_service.stop()
+    with open(os.path.join(args.node_dir, "stats.json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+
+
+def bench_multinode(args):
+    """Beberapa proses watcher pada satu watch folder bersama (lease file): setiap file diarsipkan tepat sekali"""
+    import PCRecord
+
+    work_dir = tempfile.mkdtemp(prefix="bench_multinode_")
+    watch_dir = os.path.join(work_dir, "watch")
+    archive_dir = args.archive_dir or os.path.join(work_dir, "archive")
+    lease_dir = os.path.join(work_dir, "leases")
+    os.makedirs(watch_dir)
+    os.makedirs(archive_dir, exist_ok=True)
+    kegiatan_map_path = os.path.join(work_dir, "kegiatan_map.json")
+    bahanpustaka_map_path = os.path.join(work_dir, "bahanpustaka_map.json")
+    PCRecord.create_sample_mapping_files(kegiatan_map_path, bahanpustaka_map_path)
+
+    nodes = []
+    for i in range(args.nodes):
+        node_dir = os.path.join(work_dir, f"node{i}")
+        command = [sys.executable, os.path.abspath(__file__), "node", "--node-id", f"node{i}",
+                   "--node-dir", node_dir, "--watch-dir", watch_dir, "--archive-dir", archive_dir,
+                   "--lease-dir", lease_dir, "--kegiatan-map", kegiatan_map_path,
+                   "--bahanpustaka-map", bahanpustaka_map_path, "--workers", str(args.workers),
+                   "--stable-window", str(args.stable_window), "--lease-ttl", str(args.lease_ttl)]
+        nodes.append((node_dir, subprocess.Popen(command)))
+    print(f"multinode: {args.nodes} nodes x {args.workers} workers, {args.count} files -> {work_dir}")
+    time.sleep(args.startup)
+
+    recordings = make_recordings(args.count, args.size_mb, load_codes(kegiatan_map_path),
+                                 load_codes(bahanpustaka_map_path), args.seed)
+    start = time.time()
+    killed = None
+    for i, (name, size) in enumerate(recordings):
+        make_file(os.path.join(watch_dir, name), size)
+        if args.kill_node is not None and killed is None and time.time() - start >= args.kill_after:
+            # Simulasi node mati mendadak - lease-nya harus diambil alih node lain setelah ttl
+            killed = args.kill_node
+            nodes[killed][1].send_signal(signal.SIGKILL)
+            print(f"killed node{killed} after {i + 1} files")
+        if args.interval:
+            time.sleep(args.interval)
+
+    deadline = start + args.timeout
+    remaining = len(recordings)
+    while time.time() < deadline:
+        remaining = sum(1 for name, _ in recordings if os.path.exists(os.path.join(watch_dir, name)))
+        if not remaining:
+            break
+        time.sleep(0.1)
+    elapsed = time.time() - start
+
+    for i, (_, process) in enumerate(nodes):
+        if i != killed:
+            process.send_signal(signal.SIGTERM)
+    for _, process in nodes:
+        process.wait(30)
+
+    # Hitung hasil dari job store setiap node: file yang diarsipkan lebih dari satu node = double processing
+    archived_by = {}
+    per_node = {}
+    node_stats = {}
+    for i, (node_dir, _) in enumerate(nodes):
+        conn = sqlite3.connect(os.path.join(node_dir, "jobs.db"))
+        paths = [row[0] for row in conn.execute("SELECT path FROM jobs WHERE state = 'deleted'")]
+        conn.close()
+        per_node[f"node{i}"] = len(paths)
+        for path in paths:
+            archived_by.setdefault(path, []).append(f"node{i}")
+        stats_path = os.path.join(node_dir, "stats.json")
+        if os.path.exists(stats_path):
+            with open(stats_path, "r", encoding="utf-8") as f:
+                node_stats[f"node{i}"] = json.load(f)
+    archive_files = sum(len(files) for _, _, files in os.walk(archive_dir))
+    results = {
+        "benchmark": "multinode",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "python": sys.version.split()[0],
+        "params": {"nodes": args.nodes, "workers": args.workers, "count": args.count, "size_mb": args.size_mb,
+                   "lease_ttl": args.lease_ttl, "kill_node": args.kill_node, "seed": args.seed},
+        "files": len(recordings),
+        "left_in_watch": remaining,
+        "archive_files": archive_files,
+        "archived_per_node": per_node,
+        "double_processed": sorted(path for path, owners in archived_by.items() if len(owners) > 1),
+        "takeovers": sum(stats.get("takeovers", 0) for stats in node_stats.values()),
+        "seconds": round(elapsed, 3),
+    }
+    print(f"{len(recordings) - remaining}/{len(recordings)} archived in {results['seconds']}s, "
+          f"archive files={archive_files}, per node={per_node}, "
+          f"double processed={len(results['double_processed'])}, takeovers={results['takeovers']}")
+    if not args.keep:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def _box(box_type, *payload):
+    data = b"".join(payload)
+    return struct.pack(">I4s", 8 + len(data), box_type) + data
+
+
+def _mxf_klv(key, value):
+    return key + b"\x83" + len(value).to_bytes(3, "big") + value
+
+
+def _mxf_set(set_id, tags):
+    value = b"".join(struct.pack(">HH", tag, len(data)) + data for tag, data in tags)
+    return _mxf_klv(media_metadata.MXF_LOCAL_SET_PREFIX + set_id + b"\x00", value)
+
+
+def _mxf_partition(kind, footer_offset, header_byte_count):
+    value = struct.pack(">HHIQQQQQIQI", 1, 3, 1, 0, 0, footer_offset, header_byte_count, 0, 0, 0, 1)
+    value += bytes(16) + struct.pack(">II", 0, 16)  # Operational pattern + batch essence container kosong
+    return _mxf_klv(media_metadata.MXF_PARTITION_PREFIX + bytes([kind, 0x04, 0x00]), value)
+
+
+def make_recording_with_header(path, size, created, container="mp4", moov_at_end=True, width=1920, height=1080,
+                               fps=25, mbps=50):
+    """File rekaman sintetis (sparse) dengan header container asli: MP4 (moov di awal/akhir) atau MXF
+
+    Tabel sample (stsz) ikut membesar sesuai durasi seperti file kamera sungguhan.
+    """
+    duration = max(1, int(size * 8 / (mbps * 1000 * 1000)))
+    frames = duration * fps
+    if container == "mxf":
+        stamp = struct.pack(">HBBBBBB", created.year, created.month, created.day, created.hour, created.minute,
+                            created.second, 0)
+        metadata = b"".join([
+            _mxf_set(media_metadata.MXF_PREFACE, [(0x3B02, stamp)]),
+            _mxf_set(media_metadata.MXF_IDENTIFICATION, [(0x3C06, stamp)]),
+            _mxf_set(media_metadata.MXF_MATERIAL_PACKAGE, [(0x4405, stamp)]),
+            _mxf_set(b"\x01\x28", [(0x3203, struct.pack(">I", width)), (0x3202, struct.pack(">I", height)),
+                                    (0x3001, struct.pack(">ii", fps, 1)), (0x3002, struct.pack(">q", frames)),
+                                    (0x3201, bytes.fromhex("060e2b34040101030401020201041100"))]),
+        ])
+        header = _mxf_partition(0x02, 0, len(metadata))
+        essence_key = bytes.fromhex("060e2b34010201010d01030115010501")
+        essence_offset = len(header) + len(metadata)
+        essence_size = max(0, size - essence_offset - 16 - 9 - 200)
+        footer_offset = essence_offset + 16 + 9 + essence_size
+        header = _mxf_partition(0x02, footer_offset, len(metadata))
+        with open(path, "wb") as f:
+            f.write(header + metadata + essence_key + b"\x88" + essence_size.to_bytes(8, "big"))
+            f.seek(footer_offset)
+            f.write(_mxf_partition(0x04, footer_offset, 0))
+        return
+
+    created_qt = int(created.timestamp()) + media_metadata.QT_EPOCH_OFFSET
+    mvhd = _box(b"mvhd", struct.pack(">IIIII", 0, created_qt, created_qt, 1000, duration * 1000), bytes(80))
+    tkhd = _box(b"tkhd", struct.pack(">IIIIII", 7, created_qt, created_qt, 1, 0, duration * 1000), bytes(52),
+                struct.pack(">II", width << 16, height << 16))
+    sample_entry = struct.pack(">I4s", 86, b"avc1") + bytes(24) + struct.pack(">HH", width, height) + bytes(50)
+    stbl = _box(b"stbl", _box(b"stsd", struct.pack(">II", 0, 1), sample_entry),
+                _box(b"stsz", struct.pack(">III", 0, 0, frames), bytes(4 * frames)))
+    mdia = _box(b"mdia", _box(b"mdhd", bytes(24)), _box(b"hdlr", struct.pack(">II4s", 0, 0, b"vide"), bytes(13)),
+                _box(b"minf", stbl))
+    moov = _box(b"moov", mvhd, _box(b"trak", tkhd, mdia))
+    ftyp = _box(b"ftyp", b"isom", struct.pack(">I", 0), b"isommp42")
+    mdat_size = max(16, size - len(ftyp) - len(moov))
+    mdat_header = struct.pack(">I4sQ", 1, b"mdat", mdat_size)  # largesize (64-bit), file > 4 GB
+    with open(path, "wb") as f:
+        f.write(ftyp)
+        if not moov_at_end:
+            f.write(moov)
+        f.write(mdat_header)
+        f.seek(mdat_size - len(mdat_header), os.SEEK_CUR)  # Isi mdat sparse, tidak ditulis
+        if moov_at_end:
+            f.write(moov)
+        f.truncate()
+
+
+def bench_metadata(args):
+    """Biaya baca metadata header container per ukuran file (harus tetap, tidak tergantung ukuran)"""
+    work_dir = tempfile.mkdtemp(prefix="bench_metadata_")
+    created = datetime(2024, 3, 15, 19, 30, 0, tzinfo=timezone.utc)
+    variants = [("mp4", True), ("mp4", False), ("mxf", False)]
+    results = {"benchmark": "metadata", "repeat": args.repeat, "runs": []}
+    try:
+        for size_mb in args.size_mb:
+            size = int(size_mb * 1024 * 1024)
+            for container, moov_at_end in variants:
+                label = "mp4 (moov end)" if container == "mp4" and moov_at_end else \
+                    "mp4 (moov start)" if container == "mp4" else container
+                path = os.path.join(work_dir, f"KL_KHI_Bench_{size_mb}.{container}")
+                make_recording_with_header(path, size, created, container, moov_at_end)
+                timings = []
+                for _ in range(args.repeat):
+                    stats = {}
+                    start = time.perf_counter()
+                    info = media_metadata.read_metadata(path, stats)
+                    timings.append(time.perf_counter() - start)
+                run = {"size_bytes": os.path.getsize(path), "container": label,
+                       "median_ms": round(percentile(timings, 50) * 1000, 3),
+                       "bytes_read": stats["bytes_read"], "reads": stats["reads"],
+                       "creation_time": info and info["creation_time"], "duration": info and info["duration"],
+                       "resolution": info and f"{info.get('width')}x{info.get('height')}",
+                       "codec": info and info.get("codec")}
+                results["runs"].append(run)
+                print(f"{size_mb:>8} MB {label:<17} {run['median_ms']:8.3f} ms  {run['bytes_read']:>8} bytes "
+                      f"in {run['reads']:>3} reads  {run['creation_time']} {run['duration']}s "
+                      f"{run['resolution']} {run['codec']}")
+                os.remove(path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MagicSoft File Watcher benchmarks")
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_copy = sub.add_parser("copy", help="Sequential vs parallel copy ke mock share lambat")
+    p_copy.add_argument("--size-mb", type=int, default=256)
+    p_copy.add_argument("--streams", type=int, nargs="+", default=[1, 2, 4, 8])
+    p_copy.add_argument("--range-mb", type=int, default=16)
+    p_copy.add_argument("--chunk-mb", type=int, default=1)
+    p_copy.add_argument("--latency", type=float, default=0.002, help="Latency per request (detik)")
+    p_copy.add_argument("--bandwidth-mbps", type=float, default=40, help="Bandwidth per stream (MB/s)")
+    p_copy.set_defaults(func=bench_copy)
+
+    p_e2e = sub.add_parser("e2e", help="Slow writer -> watcher -> archive, latency drop-to-archive")
+    p_e2e.add_argument("--count", type=int, default=20, help="Jumlah file sintetis")
+    p_e2e.add_argument("--size-mb", type=float, nargs="+", default=[8, 32], help="Ukuran file (dipakai bergiliran)")
+    p_e2e.add_argument("--writers", type=int, default=4, help="Jumlah recorder yang menulis bersamaan")
+    p_e2e.add_argument("--write-mbps", type=float, default=50, help="Bandwidth tulis per recorder (MB/s, 0 = tanpa batas)")
+    p_e2e.add_argument("--chunk-kb", type=float, default=1024, help="Ukuran chunk append recorder")
+    p_e2e.add_argument("--workers", type=int, default=4)
+    p_e2e.add_argument("--min-file-size-mb", type=float, default=1)
+    p_e2e.add_argument("--stable-window", type=float, default=3)
+    p_e2e.add_argument("--no-hash", action="store_true", help="Copy tanpa checksum (zero-copy)")
+    p_e2e.add_argument("--archive-dir", help="Folder archive (misal di device lain supaya jalur copy ikut diukur)")
+    p_e2e.add_argument("--kegiatan-map")
+    p_e2e.add_argument("--bahanpustaka-map")
+    p_e2e.add_argument("--seed", type=int, default=1)
+    p_e2e.add_argument("--timeout", type=float, default=600)
+    p_e2e.add_argument("--keep", action="store_true", help="Jangan hapus folder kerja")
+    p_e2e.set_defaults(func=bench_e2e)
+
+    p_multi = sub.add_parser("multinode", help="Beberapa proses watcher pada satu watch folder (koordinasi lease)")
+    p_multi.add_argument("--nodes", type=int, default=3)
+    p_multi.add_argument("--workers", type=int, default=2, help="Worker per node")
+    p_multi.add_argument("--count", type=int, default=60)
+    p_multi.add_argument("--size-mb", type=float, nargs="+", default=[2, 8])
+    p_multi.add_argument("--interval", type=float, default=0.05, help="Jeda antar file yang dijatuhkan")
+    p_multi.add_argument("--stable-window", type=float, default=0.5)
+    p_multi.add_argument("--lease-ttl", type=float, default=5)
+    p_multi.add_argument("--kill-node", type=int, help="Index node yang di-SIGKILL di tengah jalan")
+    p_multi.add_argument("--kill-after", type=float, default=1, help="Detik setelah file pertama")
+    p_multi.add_argument("--archive-dir")
+    p_multi.add_argument("--startup", type=float, default=2, help="Waktu tunggu node siap")
+    p_multi.add_argument("--seed", type=int, default=1)
+    p_multi.add_argument("--timeout", type=float, default=300)
+    p_multi.add_argument("--keep", action="store_true", help="Jangan hapus folder kerja")
+    p_multi.set_defaults(func=bench_multinode)
+
+    p_meta = sub.add_parser("metadata", help="Biaya baca metadata header MP4/MOV/MXF per ukuran file")
+    p_meta.add_argument("--size-mb", type=float, nargs="+", default=[16, 1024, 16384, 65536],
+                        help="Ukuran file sintetis (sparse, tidak memakai ruang disk)")
+    p_meta.add_argument("--repeat", type=int, default=50)
+    p_meta.set_defaults(func=bench_metadata)
+
+    # Dipakai internal oleh multinode (satu subprocess per node)
+    p_node = sub.add_parser("node")
+    for name in ("--node-id", "--node-dir", "--watch-dir", "--archive-dir", "--lease-dir",
+                 "--kegiatan-map", "--bahanpustaka-map"):
+        p_node.add_argument(name, required=True)
+    p_node.add_argument("--workers", type=int, default=2)
+    p_node.add_argument("--stable-window", type=float, default=0.5)
+    p_node.add_argument("--lease-ttl", type=float, default=5)
+    p_node.set_defaults(func=run_node)
+
+    args = parser.parse_args(argv)
+    results = args.func(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
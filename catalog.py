@@ -0,0 +1,405 @@
+"""Katalog arsip (SQLite + FTS5): cari klip tanpa browsing share
+
+Contoh:
+    python catalog.py search banjir --kegiatan KHI --month March
+    python catalog.py index Z:\\Arsip --workers 8
+    python catalog.py stats
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from mappings import split_mapping
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = "file_watcher_catalog.db"
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    bahanpustaka_code TEXT,
+    bahanpustaka_name TEXT,
+    kegiatan_code TEXT,
+    kegiatan_name TEXT,
+    title TEXT,
+    extension TEXT,
+    archived_date TEXT,
+    size INTEGER,
+    hash TEXT,
+    hash_algorithm TEXT,
+    source_path TEXT,
+    indexed_at REAL NOT NULL,
+    recorded_at TEXT,
+    duration REAL,
+    width INTEGER,
+    height INTEGER,
+    codec TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_archive_kegiatan_date ON archive(kegiatan_code, archived_date);
+CREATE INDEX IF NOT EXISTS idx_archive_bahanpustaka_date ON archive(bahanpustaka_code, archived_date);
+CREATE INDEX IF NOT EXISTS idx_archive_date ON archive(archived_date);
+CREATE INDEX IF NOT EXISTS idx_archive_hash ON archive(hash);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS archive_fts USING fts5(
+    title, kegiatan_name, bahanpustaka_name, content='archive', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS archive_ai AFTER INSERT ON archive BEGIN
+    INSERT INTO archive_fts(rowid, title, kegiatan_name, bahanpustaka_name)
+    VALUES (new.id, new.title, new.kegiatan_name, new.bahanpustaka_name);
+END;
+CREATE TRIGGER IF NOT EXISTS archive_ad AFTER DELETE ON archive BEGIN
+    INSERT INTO archive_fts(archive_fts, rowid, title, kegiatan_name, bahanpustaka_name)
+    VALUES ('delete', old.id, old.title, old.kegiatan_name, old.bahanpustaka_name);
+END;
+CREATE TRIGGER IF NOT EXISTS archive_au AFTER UPDATE ON archive BEGIN
+    INSERT INTO archive_fts(archive_fts, rowid, title, kegiatan_name, bahanpustaka_name)
+    VALUES ('delete', old.id, old.title, old.kegiatan_name, old.bahanpustaka_name);
+    INSERT INTO archive_fts(rowid, title, kegiatan_name, bahanpustaka_name)
+    VALUES (new.id, new.title, new.kegiatan_name, new.bahanpustaka_name);
+END;
+"""
+
+ENTRY_FIELDS = ("path", "bahanpustaka_code", "bahanpustaka_name", "kegiatan_code", "kegiatan_name", "title",
+                "extension", "archived_date", "size", "hash", "hash_algorithm", "source_path",
+                "recorded_at", "duration", "width", "height", "codec")
+
+# Kolom yang ditambahkan setelah katalog pertama kali dibuat (ALTER TABLE untuk database lama)
+ADDED_COLUMNS = (("recorded_at", "TEXT"), ("duration", "REAL"), ("width", "INTEGER"), ("height", "INTEGER"),
+                 ("codec", "TEXT"))
+
+
+def title_text(file_name):
+    """Judul dari nama file: tanpa ekstensi, '_' dan '-' jadi spasi supaya jadi token FTS"""
+    stem = os.path.splitext(file_name)[0]
+    return re.sub(r"[_\-.]+", " ", stem).strip()
+
+
+def parse_month(value):
+    """Bulan sebagai angka 1-12 dari angka atau nama ('3', 'March', 'Mar')"""
+    if value is None:
+        return None
+    if isinstance(value, int) or str(value).isdigit():
+        return int(value)
+    for fmt in ("%B", "%b"):
+        try:
+            return datetime.strptime(str(value).capitalize(), fmt).month
+        except ValueError:
+            continue
+    raise ValueError(f"Unknown month: {value}")
+
+
+def make_entry(path, bahanpustaka_code, bahanpustaka_name, kegiatan_code, kegiatan_name, archived_date,
+               size=None, hash=None, hash_algorithm=None, source_path=None, metadata=None):
+    """Satu baris katalog untuk file di <BAHANPUSTAKA>/<KEGIATAN>/YYYY/Month/DD/<JUDUL>
+
+    metadata: hasil media_metadata.read_metadata (tanggal rekaman, durasi, resolusi, codec)
+    """
+    file_name = os.path.basename(path)
+    metadata = metadata or {}
+    return {
+        "path": os.path.abspath(path),
+        "bahanpustaka_code": bahanpustaka_code,
+        "bahanpustaka_name": bahanpustaka_name,
+        "kegiatan_code": kegiatan_code,
+        "kegiatan_name": kegiatan_name,
+        "title": title_text(file_name),
+        "extension": os.path.splitext(file_name)[1].lower().lstrip("."),
+        "archived_date": archived_date,
+        "size": size,
+        "hash": hash,
+        "hash_algorithm": hash_algorithm,
+        "source_path": source_path,
+        "recorded_at": metadata.get("creation_time"),
+        "duration": metadata.get("duration"),
+        "width": metadata.get("width"),
+        "height": metadata.get("height"),
+        "codec": metadata.get("codec"),
+    }
+
+
+class Catalog:
+    """Index arsip di SQLite lokal (WAL) dengan full-text search pada judul dan nama program"""
+
+    def __init__(self, db_path=DEFAULT_CATALOG_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            # SQLite tanpa FTS5 - pencarian judul pakai LIKE
+            logger.warning(f"FTS5 not available, catalog search falls back to LIKE: {e}")
+            self.fts = False
+        self.conn.commit()
+
+    def _migrate(self):
+        """Tambah kolom baru ke katalog lama (CREATE TABLE IF NOT EXISTS tidak menambah kolom)"""
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(archive)")}
+        for column, column_type in ADDED_COLUMNS:
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE archive ADD COLUMN {column} {column_type}")
+
+    def add(self, entry):
+        """Tambah/ganti satu file (dipanggil saat file selesai diarsipkan)"""
+        self.add_many([entry])
+
+    def add_many(self, entries):
+        """Tambah/ganti banyak file dalam satu transaksi"""
+        now = time.time()
+        rows = [tuple(entry.get(field) for field in ENTRY_FIELDS) + (now,) for entry in entries]
+        if not rows:
+            return 0
+        columns = ", ".join(ENTRY_FIELDS + ("indexed_at",))
+        updates = ", ".join(f"{field} = COALESCE(excluded.{field}, {field})" for field in ENTRY_FIELDS[1:])
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    f"INSERT INTO archive ({columns}) VALUES ({', '.join('?' * (len(ENTRY_FIELDS) + 1))}) "
+                    f"ON CONFLICT(path) DO UPDATE SET {updates}, indexed_at = excluded.indexed_at", rows)
+        return len(rows)
+
+    def remove(self, path):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM archive WHERE path = ?", (path,))
+
+    def search(self, text=None, kegiatan=None, bahanpustaka=None, year=None, month=None, day=None,
+               date_from=None, date_to=None, limit=100):
+        """Cari file arsip, misal search("banjir", kegiatan="KHI", month="March")
+
+        text dicocokkan ke judul/nama program (FTS5, prefix 'banj*' didukung).
+        date_from/date_to format YYYY-MM-DD (inklusif).
+        """
+        clauses = []
+        params = []
+        source = "archive a"
+        if text:
+            if self.fts:
+                source = "archive_fts JOIN archive a ON a.id = archive_fts.rowid"
+                clauses.append("archive_fts MATCH ?")
+                params.append(self._fts_query(text))
+            else:
+                for word in text.split():
+                    clauses.append("(a.title LIKE ? OR a.kegiatan_name LIKE ? OR a.bahanpustaka_name LIKE ?)")
+                    params.extend([f"%{word}%"] * 3)
+        if kegiatan:
+            clauses.append("a.kegiatan_code = ?")
+            params.append(kegiatan.upper())
+        if bahanpustaka:
+            clauses.append("a.bahanpustaka_code = ?")
+            params.append(bahanpustaka.upper())
+        if year is not None:
+            clauses.append("substr(a.archived_date, 1, 4) = ?")
+            params.append(f"{int(year):04d}")
+        if month is not None:
+            clauses.append("substr(a.archived_date, 6, 2) = ?")
+            params.append(f"{parse_month(month):02d}")
+        if day is not None:
+            clauses.append("substr(a.archived_date, 9, 2) = ?")
+            params.append(f"{int(day):02d}")
+        if date_from:
+            clauses.append("a.archived_date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("a.archived_date <= ?")
+            params.append(date_to)
+
+        sql = f"SELECT a.* FROM {source}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY a.archived_date DESC, a.id DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _fts_query(text):
+        """Setiap kata jadi token FTS (dikutip), akhiran '*' tetap jadi prefix search"""
+        terms = []
+        for word in text.split():
+            prefix = word.endswith("*")
+            word = word.rstrip("*").replace('"', '""')
+            if word:
+                terms.append(f'"{word}"' + ("*" if prefix else ""))
+        return " ".join(terms)
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+
+    def stats(self):
+        """Jumlah file dan total ukuran per kegiatan"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT kegiatan_code, kegiatan_name, COUNT(*) AS files, COALESCE(SUM(size), 0) AS bytes, "
+                "MIN(archived_date) AS first, MAX(archived_date) AS last "
+                "FROM archive GROUP BY kegiatan_code ORDER BY files DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def load_checksums(checksum_log_path):
+    """Path tujuan -> (algorithm, checksum) dari file_watcher_checksums.log"""
+    checksums = {}
+    if not checksum_log_path or not os.path.exists(checksum_log_path):
+        return checksums
+    with open(checksum_log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) >= 5:
+                checksums[os.path.normcase(os.path.abspath(parts[4]))] = (parts[1], parts[2])
+    return checksums
+
+
+def _scan_program(root, bahanpustaka_folder, kegiatan_folder, bahanpustaka_codes, kegiatan_codes, checksums):
+    """Scan satu <BAHANPUSTAKA>/<KEGIATAN> (YYYY/Month/DD/<JUDUL>) dengan os.scandir"""
+    entries = []
+    program_dir = os.path.join(root, bahanpustaka_folder, kegiatan_folder)
+    for year_entry in _subdirs(program_dir):
+        if not (year_entry.name.isdigit() and len(year_entry.name) == 4):
+            continue
+        for month_entry in _subdirs(year_entry.path):
+            if month_entry.name not in MONTHS:
+                continue
+            month = MONTHS.index(month_entry.name) + 1
+            for day_entry in _subdirs(month_entry.path):
+                if not day_entry.name.isdigit():
+                    continue
+                archived_date = f"{year_entry.name}-{month:02d}-{int(day_entry.name):02d}"
+                with os.scandir(day_entry.path) as files:
+                    for file_entry in files:
+                        if not file_entry.is_file() or file_entry.name.endswith((".partial", ".journal")):
+                            continue
+                        algorithm, checksum = checksums.get(os.path.normcase(os.path.abspath(file_entry.path)),
+                                                            (None, None))
+                        entries.append(make_entry(
+                            file_entry.path,
+                            bahanpustaka_codes.get(bahanpustaka_folder, bahanpustaka_folder), bahanpustaka_folder,
+                            kegiatan_codes.get(kegiatan_folder, kegiatan_folder), kegiatan_folder,
+                            archived_date, size=file_entry.stat().st_size, hash=checksum, hash_algorithm=algorithm))
+    return entries
+
+
+def _subdirs(path):
+    try:
+        with os.scandir(path) as it:
+            return [entry for entry in it if entry.is_dir()]
+    except OSError as e:
+        logger.warning(f"Cannot scan {path}: {e}")
+        return []
+
+
+def bulk_index(catalog, processed_folder, kegiatan_map, bahanpustaka_map, workers=8, checksum_log_path=None):
+    """Index sekali jalan untuk pohon arsip yang sudah ada
+
+    Setiap folder <BAHANPUSTAKA>/<KEGIATAN> di-scan paralel (latency SMB saling tumpang tindih),
+    hasilnya ditulis batch per program. Kode dicari balik dari nama folder di mapping.
+    """
+    start = time.time()
+    bahanpustaka_codes = {name: code for code, name in split_mapping(bahanpustaka_map)[0].items()}
+    kegiatan_codes = {name: code for code, name in split_mapping(kegiatan_map)[0].items()}
+    checksums = load_checksums(checksum_log_path)
+
+    programs = [(bp.name, kg.name) for bp in _subdirs(processed_folder) for kg in _subdirs(bp.path)]
+    indexed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_scan_program, processed_folder, bp, kg, bahanpustaka_codes, kegiatan_codes, checksums)
+                   for bp, kg in programs]
+        for future in futures:
+            try:
+                indexed += catalog.add_many(future.result())
+            except Exception as e:
+                logger.error(f"Bulk index error: {e}")
+    elapsed = time.time() - start
+    logger.info(f"CATALOG BULK INDEX: {indexed} files from {len(programs)} programs in {elapsed:.1f}s")
+    return indexed
+
+
+def _load_json(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Katalog arsip MagicSoft File Watcher")
+    parser.add_argument("--db", default=os.path.join(script_dir, DEFAULT_CATALOG_PATH))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_search = sub.add_parser("search", help="Cari file arsip")
+    p_search.add_argument("text", nargs="*", help="Kata di judul/nama program ('banj*' untuk prefix)")
+    p_search.add_argument("--kegiatan")
+    p_search.add_argument("--bahanpustaka")
+    p_search.add_argument("--year", type=int)
+    p_search.add_argument("--month")
+    p_search.add_argument("--day", type=int)
+    p_search.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+    p_search.add_argument("--to", dest="date_to", help="YYYY-MM-DD")
+    p_search.add_argument("--limit", type=int, default=100)
+    p_search.add_argument("--json", action="store_true")
+
+    p_index = sub.add_parser("index", help="Bulk index pohon arsip yang sudah ada")
+    p_index.add_argument("processed_folder")
+    p_index.add_argument("--workers", type=int, default=8)
+    p_index.add_argument("--kegiatan-map", default=os.path.join(script_dir, "kegiatan_map.json"))
+    p_index.add_argument("--bahanpustaka-map", default=os.path.join(script_dir, "bahanpustaka_map.json"))
+    p_index.add_argument("--checksum-log", default=os.path.join(script_dir, "file_watcher_checksums.log"))
+
+    sub.add_parser("stats", help="Ringkasan per kegiatan")
+
+    args = parser.parse_args(argv)
+    catalog = Catalog(args.db)
+    try:
+        if args.command == "search":
+            start = time.perf_counter()
+            rows = catalog.search(" ".join(args.text) or None, kegiatan=args.kegiatan, bahanpustaka=args.bahanpustaka,
+                                  year=args.year, month=args.month, day=args.day, date_from=args.date_from,
+                                  date_to=args.date_to, limit=args.limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if args.json:
+                print(json.dumps(rows, ensure_ascii=False, indent=2))
+            else:
+                for row in rows:
+                    print(f"{row['archived_date']}  {row['kegiatan_code']:<5} {row['title']:<50} {row['path']}")
+                print(f"{len(rows)} results in {elapsed_ms:.1f} ms")
+        elif args.command == "index":
+            logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+            indexed = bulk_index(catalog, args.processed_folder, _load_json(args.kegiatan_map),
+                                 _load_json(args.bahanpustaka_map), workers=args.workers,
+                                 checksum_log_path=args.checksum_log)
+            print(f"{indexed} files indexed, catalog now has {catalog.count()} files")
+        elif args.command == "stats":
+            for row in catalog.stats():
+                print(f"{row['kegiatan_code']:<5} {row['kegiatan_name'] or '':<25} {row['files']:>7} files "
+                      f"{row['bytes'] / 1024 ** 3:8.2f} GB  {row['first']} .. {row['last']}")
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB per chunk
+DEFAULT_HASH_ALGORITHM = "blake2b"
+DEFAULT_RANGE_SIZE = 64 * 1024 * 1024  # 64MB per range (copy paralel dan commit journal)
+PARTIAL_SUFFIX = ".partial"
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_SAMPLE_SIZE = 64 * 1024  # Block awal/akhir untuk identitas isi di journal
+
+
+class CopyResult:
+    """Hasil copy: jumlah byte, checksum, durasi dan throughput"""
+
+    def __init__(self, bytes_copied, checksum, algorithm, elapsed, method, range_hashes=None, resumed_bytes=0,
+                 range_size=None):
+        self.bytes_copied = bytes_copied
+        self.checksum = checksum
+        self.algorithm = algorithm
+        self.elapsed = elapsed
+        self.method = method
+        self.range_hashes = range_hashes  # Checksum per range (copy paralel)
+        self.range_size = range_size
+        self.resumed_bytes = resumed_bytes  # Byte yang tidak perlu dikirim ulang (resume dari journal)
+
+    @property
+    def throughput_mbps(self):
+        if self.elapsed <= 0:
+            return 0.0
+        return (self.bytes_copied - self.resumed_bytes) / (1024 * 1024) / self.elapsed
+
+    def __repr__(self):
+        return (f"CopyResult({self.bytes_copied} bytes, {self.method}, {self.throughput_mbps:.1f} MB/s, "
+                f"{self.algorithm}={self.checksum})")
+
+
+class CopyJournal:
+    """Journal range yang sudah committed (fsync) ke file .partial, untuk resume copy"""
+
+    def __init__(self, path, identity):
+        self.path = path
+        self.identity = identity
+        self.ranges = {}  # offset -> [length, checksum]
+        self.lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path, src_path, size, mode, algorithm, range_size):
+        """Buka journal, range lama hanya dipakai jika isi source dan parameter copy sama
+
+        Identitas dari isi (size, mtime, hash block awal/akhir), bukan path: copy yang terputus
+        dari watch folder tetap bisa dilanjutkan dari file yang sama setelah dipindah ke spool.
+        """
+        st = os.stat(src_path)
+        identity = {
+            "size": size,
+            "mtime_ns": st.st_mtime_ns,
+            "sample": content_sample(src_path, size),
+            "mode": mode,
+            "algorithm": algorithm,
+            "range_size": range_size,
+        }
+        journal = cls(path, identity)
+        journal.load()
+        return journal
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("identity") != self.identity:
+            logger.info(f"Journal does not match source, starting fresh: {self.path}")
+            return False
+        self.ranges = {int(offset): value for offset, value in data.get("ranges", {}).items()}
+        return True
+
+    def commit(self, offset, length, checksum):
+        """Catat range yang datanya sudah di-fsync ke tujuan"""
+        with self.lock:
+            self.ranges[offset] = [length, checksum]
+            self._save()
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"identity": self.identity, "ranges": self.ranges}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def contiguous_offset(self):
+        """Offset terakhir yang committed berurutan dari byte 0"""
+        offset = 0
+        while offset in self.ranges:
+            offset += self.ranges[offset][0]
+        return offset
+
+    def reset(self):
+        with self.lock:
+            self.ranges = {}
+            self.remove()
+
+    def remove(self):
+        for path in (self.path, self.path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def content_sample(path, size, sample_size=JOURNAL_SAMPLE_SIZE):
+    """Hash size + block awal + block akhir (2 read kecil)"""
+    hasher = hashlib.blake2b(str(size).encode("ascii"), digest_size=16)
+    with open(path, "rb") as f:
+        hasher.update(f.read(sample_size))
+        if size > sample_size:
+            f.seek(max(sample_size, size - sample_size))
+            hasher.update(f.read(sample_size))
+    return hasher.hexdigest()
+
+
+def partial_path_for(dst_path):
+    """Nama sementara di samping tujuan selama copy berjalan"""
+    return dst_path + PARTIAL_SUFFIX
+
+
+def journal_path_for(dst_path):
+    return dst_path + PARTIAL_SUFFIX + JOURNAL_SUFFIX
+
+
+def publish(partial_path, dst_path, journal_path=None):
+    """Rename atomic .partial ke nama final setelah terverifikasi"""
+    os.replace(partial_path, dst_path)
+    if journal_path and os.path.exists(journal_path):
+        os.remove(journal_path)
+
+
+def discard_partial(dst_path):
+    """Hapus .partial dan journal (misal setelah verifikasi gagal)"""
+    for path in (partial_path_for(dst_path), journal_path_for(dst_path), journal_path_for(dst_path) + ".tmp"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def new_hasher(algorithm=DEFAULT_HASH_ALGORITHM):
+    """Buat object hash (default BLAKE2b)"""
+    return hashlib.new(algorithm)
+
+
+def preallocate(fd, size):
+    """Alokasikan ukuran file tujuan di awal (mengurangi fragmentasi)"""
+    if size <= 0:
+        return
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, size)
+        else:
+            os.ftruncate(fd, size)
+    except OSError as e:
+        logger.warning(f"Preallocate failed ({e}), continuing without")
+
+
+def _read_into(f, view, governor=None):
+    """readinto dengan jatah baca dari governor (jika ada) dan pencatatan latency source"""
+    if governor is None:
+        return f.readinto(view)
+    governor.acquire_read(len(view))
+    started = time.perf_counter()
+    n = f.readinto(view)
+    governor.observe_read(time.perf_counter() - started, n)
+    return n
+
+
+def hash_file(path, algorithm=DEFAULT_HASH_ALGORITHM, chunk_size=DEFAULT_CHUNK_SIZE, governor=None):
+    """Hitung checksum file secara streaming (governor hanya untuk file di disk source)"""
+    hasher = new_hasher(algorithm)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = _read_into(f, view, governor)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+
+def split_ranges(size, range_size=DEFAULT_RANGE_SIZE):
+    """Bagi file menjadi list (offset, length)"""
+    ranges = []
+    offset = 0
+    while offset < size:
+        length = min(range_size, size - offset)
+        ranges.append((offset, length))
+        offset += length
+    return ranges
+
+
+def _copy_streaming(src, dst, length, chunk_size, hashers=(), governor=None):
+    """Copy tepat `length` byte per chunk sambil hashing - source hanya dibaca sekali"""
+    buffer = bytearray(min(chunk_size, max(length, 1)))
+    view = memoryview(buffer)
+    remaining = length
+    while remaining > 0:
+        n = _read_into(src, view[:min(len(buffer), remaining)], governor)
+        if not n:
+            raise IOError(f"Unexpected EOF, {remaining} bytes missing")
+        chunk = view[:n]
+        for hasher in hashers:
+            if hasher is not None:
+                hasher.update(chunk)
+        if governor is not None:
+            governor.acquire_write(n)
+        written = 0
+        while written < n:
+            written += dst.write(chunk[written:])
+        remaining -= n
+
+
+def _acquire_zero_copy(governor, n):
+    """Jatah baca + tulis untuk satu chunk yang disalin di kernel"""
+    if governor is not None:
+        governor.acquire_read(n)
+        governor.acquire_write(n)
+
+
+def _copy_zero_copy(src_fd, dst_fd, offset, length, chunk_size, governor=None):
+    """Copy satu range di kernel (copy_file_range/sendfile), return None jika tidak didukung"""
+    if hasattr(os, "copy_file_range"):
+        copied = 0
+        try:
+            while copied < length:
+                _acquire_zero_copy(governor, min(chunk_size, length - copied))
+                n = os.copy_file_range(src_fd, dst_fd, min(chunk_size, length - copied),
+                                       offset + copied, offset + copied)
+                if n == 0:
+                    raise IOError(f"Unexpected EOF at offset {offset + copied}")
+                copied += n
+            return "copy_file_range"
+        except OSError as e:
+            # Misal EXDEV di kernel lama - coba sendfile
+            if copied:
+                raise
+            logger.info(f"copy_file_range not available ({e})")
+
+    if hasattr(os, "sendfile") and os.name == "posix":
+        copied = 0
+        try:
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            while copied < length:
+                _acquire_zero_copy(governor, min(chunk_size, length - copied))
+                n = os.sendfile(dst_fd, src_fd, offset + copied, min(chunk_size, length - copied))
+                if n == 0:
+                    raise IOError(f"Unexpected EOF at offset {offset + copied}")
+                copied += n
+            return "sendfile"
+        except OSError as e:
+            if copied:
+                raise
+            logger.info(f"sendfile not available ({e}), using streaming copy")
+    return None
+
+
+def _hash_range(f, offset, length, chunk_size, algorithm, hasher=None, governor=None):
+    range_hasher = new_hasher(algorithm)
+    buffer = bytearray(min(chunk_size, max(length, 1)))
+    view = memoryview(buffer)
+    f.seek(offset)
+    remaining = length
+    while remaining > 0:
+        n = _read_into(f, view[:min(len(buffer), remaining)], governor)
+        if not n:
+            break
+        range_hasher.update(view[:n])
+        if hasher is not None:
+            hasher.update(view[:n])
+        remaining -= n
+    return range_hasher.hexdigest()
+
+
+def _rehash_prefix(src, journal, resume_offset, chunk_size, algorithm, hasher, governor=None):
+    """Bangun ulang hash streaming dari source lokal dan cocokkan dengan checksum di journal"""
+    for offset, _ in split_ranges(resume_offset, journal.identity["range_size"]):
+        length, expected = journal.ranges[offset]
+        if hasher is None and expected is None:
+            continue
+        digest = _hash_range(src, offset, length, chunk_size, algorithm or DEFAULT_HASH_ALGORITHM, hasher, governor)
+        if expected is not None and digest != expected:
+            return False
+    return True
+
+
+def copy_file(src_path, dst_path, chunk_size=DEFAULT_CHUNK_SIZE, algorithm=DEFAULT_HASH_ALGORITHM,
+              journal_path=None, range_size=DEFAULT_RANGE_SIZE, governor=None):
+    """Copy file per chunk dengan preallocate dan checksum inline
+
+    Jika algorithm None, dipakai jalur zero-copy (copy_file_range/sendfile) tanpa checksum.
+    Jika journal_path diisi, setiap range di-fsync lalu dicatat sehingga copy bisa dilanjutkan.
+    governor (BandwidthGovernor) membatasi byte yang dibaca dari source dan ditulis ke tujuan.
+    """
+    start = time.time()
+    size = os.path.getsize(src_path)
+    method = "stream"
+    hasher = new_hasher(algorithm) if algorithm else None
+
+    journal = None
+    resume_offset = 0
+    if journal_path:
+        journal = CopyJournal.open(journal_path, src_path, size, "sequential", algorithm, range_size)
+        if os.path.exists(dst_path):
+            resume_offset = journal.contiguous_offset()
+        else:
+            journal.reset()
+
+    with open(src_path, "rb", buffering=0) as src, \
+            open(dst_path, "r+b" if resume_offset else "wb", buffering=0) as dst:
+        if resume_offset:
+            if _rehash_prefix(src, journal, resume_offset, chunk_size, algorithm, hasher, governor):
+                logger.info(f"RESUMING COPY at {resume_offset} / {size} bytes: {os.path.basename(dst_path)}")
+            else:
+                logger.warning(f"Partial copy does not match source, restarting: {os.path.basename(dst_path)}")
+                journal.reset()
+                resume_offset = 0
+                hasher = new_hasher(algorithm) if algorithm else None
+                dst.truncate(0)
+        if not resume_offset:
+            preallocate(dst.fileno(), size)
+
+        use_zero_copy = hasher is None
+        for offset, length in split_ranges(size, range_size):
+            if offset < resume_offset:
+                continue
+            digest = None
+            zero_copy = None
+            if use_zero_copy:
+                zero_copy = _copy_zero_copy(src.fileno(), dst.fileno(), offset, length, chunk_size, governor)
+                use_zero_copy = zero_copy is not None
+            if zero_copy is not None:
+                method = zero_copy
+            else:
+                range_hasher = new_hasher(algorithm) if journal is not None and algorithm else None
+                src.seek(offset)
+                dst.seek(offset)
+                _copy_streaming(src, dst, length, chunk_size, (hasher, range_hasher), governor)
+                digest = range_hasher.hexdigest() if range_hasher is not None else None
+            if journal is not None:
+                os.fsync(dst.fileno())
+                journal.commit(offset, length, digest)
+
+        # Potong jika preallocate lebih besar dari data yang benar-benar tersalin
+        dst.truncate(size)
+
+    shutil.copystat(src_path, dst_path)
+    checksum = hasher.hexdigest() if hasher is not None else None
+    return CopyResult(size, checksum, algorithm, time.time() - start, method, resumed_bytes=resume_offset)
+
+
+def _copy_range(src_path, dst_path, offset, length, chunk_size, algorithm, durable=False, governor=None):
+    """Copy satu range dengan handle sendiri (seek + write posisional), return checksum range source
+
+    Tujuan tidak dibaca ulang di sini (isinya masih dari page cache); verifikasi penuh di verify_copy.
+    """
+    hasher = new_hasher(algorithm)
+    with open(src_path, "rb", buffering=0) as src, open(dst_path, "r+b", buffering=0) as dst:
+        src.seek(offset)
+        dst.seek(offset)
+        _copy_streaming(src, dst, length, chunk_size, (hasher,), governor)
+        if durable:
+            os.fsync(dst.fileno())
+    return hasher.hexdigest()
+
+
+def copy_file_parallel(src_path, dst_path, streams=4, range_size=DEFAULT_RANGE_SIZE,
+                       chunk_size=DEFAULT_CHUNK_SIZE, algorithm=DEFAULT_HASH_ALGORITHM, journal_path=None,
+                       governor=None):
+    """Copy file besar dengan beberapa stream paralel per range byte
+
+    Checksum file = hash dari daftar checksum per range (urutan offset), verify_copy
+    membandingkan setiap range tujuan dengan range_hashes.
+    Jika journal_path diisi, range yang sudah committed dilewati saat resume.
+    """
+    start = time.time()
+    algorithm = algorithm or DEFAULT_HASH_ALGORITHM
+    size = os.path.getsize(src_path)
+    ranges = split_ranges(size, range_size)
+
+    journal = None
+    if journal_path:
+        journal = CopyJournal.open(journal_path, src_path, size, "parallel", algorithm, range_size)
+        if not os.path.exists(dst_path):
+            journal.reset()
+
+    done = dict(journal.ranges) if journal is not None else {}
+    if not done:
+        with open(dst_path, "wb", buffering=0) as dst:
+            preallocate(dst.fileno(), size)
+            dst.truncate(size)
+    resumed_bytes = sum(length for length, _ in done.values())
+    if resumed_bytes:
+        logger.info(f"RESUMING PARALLEL COPY: {resumed_bytes} / {size} bytes already verified")
+
+    def copy_task(offset, length):
+        digest = _copy_range(src_path, dst_path, offset, length, chunk_size, algorithm,
+                             durable=journal is not None, governor=governor)
+        if journal is not None:
+            journal.commit(offset, length, digest)
+        return digest
+
+    with ThreadPoolExecutor(max_workers=max(1, streams)) as executor:
+        futures = {offset: executor.submit(copy_task, offset, length)
+                   for offset, length in ranges if offset not in done}
+        range_hashes = [done[offset][1] if offset in done else futures[offset].result()
+                        for offset, _ in ranges]
+
+    shutil.copystat(src_path, dst_path)
+    tree_hasher = new_hasher(algorithm)
+    for digest in range_hashes:
+        tree_hasher.update(bytes.fromhex(digest))
+    return CopyResult(size, tree_hasher.hexdigest(), f"{algorithm}-ranges-{range_size}",
+                      time.time() - start, f"parallel x{streams}", range_hashes=range_hashes,
+                      resumed_bytes=resumed_bytes, range_size=range_size)
+
+
+def verify_copy(result, dst_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Bandingkan checksum hasil streaming dengan isi file tujuan
+
+    Tujuan di-fsync dan page cache-nya dibuang dulu (jika didukung OS), supaya yang dibaca
+    adalah isi di disk/share, bukan data yang baru saja ditulis di memory.
+    """
+    if os.path.getsize(dst_path) != result.bytes_copied:
+        return False
+    if result.checksum is None:
+        return True
+    algorithm = (result.algorithm or DEFAULT_HASH_ALGORITHM).split("-ranges-")[0]
+    with open(dst_path, "rb", buffering=0) as dst:
+        drop_cache(dst.fileno())
+        if result.range_hashes is None:
+            return hash_file(dst_path, result.algorithm, chunk_size) == result.checksum
+        # Copy paralel: setiap range tujuan dibandingkan dengan checksum range source
+        for (offset, length), digest in zip(split_ranges(result.bytes_copied, result.range_size),
+                                            result.range_hashes):
+            if _hash_range(dst, offset, length, chunk_size, algorithm) != digest:
+                logger.error(f"Range verify failed at offset {offset} ({length} bytes): {dst_path}")
+                return False
+    return True
+
+
+def drop_cache(fd):
+    """fsync lalu buang page cache file (POSIX_FADV_DONTNEED), no-op jika tidak didukung"""
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
@@ -0,0 +1,160 @@
+import os
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+
+import copy_engine
+
+logger = logging.getLogger(__name__)
+
+# Policy untuk file yang isinya sudah ada di arsip
+SKIP = "skip"            # Tidak disimpan lagi, hanya dicatat sebagai alias
+LINK = "link"            # Hard link di path tujuan ke file yang sudah ada (fallback: alias)
+KEEP_BOTH = "keep-both"  # Tetap disalin, relasi duplikat dicatat
+POLICIES = (SKIP, LINK, KEEP_BOTH)
+
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024  # Head/tail block untuk partial hash
+FULL_HASH_ALGORITHM = copy_engine.DEFAULT_HASH_ALGORITHM
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    partial_hash TEXT NOT NULL,
+    full_hash TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_partial ON fingerprints(size, partial_hash);
+CREATE TABLE IF NOT EXISTS aliases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_path TEXT NOT NULL,
+    alias_path TEXT,
+    original_path TEXT NOT NULL,
+    policy TEXT NOT NULL,
+    full_hash TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_aliases_original ON aliases(original_path);
+"""
+
+
+def partial_fingerprint(path, block_size=FINGERPRINT_BLOCK_SIZE):
+    """Filter cepat: (size, hash dari size + block awal + block akhir), cukup 2 read per file"""
+    size = os.path.getsize(path)
+    hasher = hashlib.blake2b(str(size).encode("ascii"), digest_size=16)
+    with open(path, "rb") as f:
+        hasher.update(f.read(block_size))
+        if size > block_size:
+            f.seek(max(block_size, size - block_size))
+            hasher.update(f.read(block_size))
+    return size, hasher.hexdigest()
+
+
+class DedupIndex:
+    """Index fingerprint konten (SQLite) untuk mendeteksi rekaman yang sama
+
+    Lookup lewat index (size, partial_hash) di disk, jadi memory tetap kecil
+    (dibatasi cache_size) walau arsip berisi ratusan ribu file. Full hash hanya
+    dihitung saat partial hash bertabrakan, lalu disimpan untuk lookup berikutnya.
+    """
+
+    def __init__(self, db_path, cache_size_kb=16 * 1024):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA cache_size=-{int(cache_size_kb)}")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def find_duplicate(self, path, fingerprint=None, chunk_size=copy_engine.DEFAULT_CHUNK_SIZE, governor=None):
+        """Path arsip dengan isi yang sama persis, atau None
+
+        Return (original_path, full_hash). full_hash hanya terisi jika ada tabrakan partial hash.
+        governor hanya membatasi pembacaan file source (path), bukan file arsip.
+        """
+        size, partial_hash = fingerprint or partial_fingerprint(path)
+        with self.lock:
+            candidates = self.conn.execute(
+                "SELECT path, full_hash FROM fingerprints WHERE size = ? AND partial_hash = ?",
+                (size, partial_hash)).fetchall()
+        if not candidates:
+            return None, None
+
+        full_hash = copy_engine.hash_file(path, FULL_HASH_ALGORITHM, chunk_size, governor)
+        for candidate_path, candidate_hash in candidates:
+            if not os.path.exists(candidate_path):
+                self.remove(candidate_path)
+                continue
+            if candidate_hash is None:
+                candidate_hash = copy_engine.hash_file(candidate_path, FULL_HASH_ALGORITHM, chunk_size)
+                self.set_full_hash(candidate_path, candidate_hash)
+            if candidate_hash == full_hash:
+                return candidate_path, full_hash
+        return None, full_hash
+
+    def add(self, path, fingerprint, full_hash=None):
+        """Daftarkan file arsip baru"""
+        size, partial_hash = fingerprint
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO fingerprints (path, size, partial_hash, full_hash, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)", (path, size, partial_hash, full_hash, time.time()))
+
+    def set_full_hash(self, path, full_hash):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("UPDATE fingerprints SET full_hash = ? WHERE path = ?", (full_hash, path))
+
+    def remove(self, path):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM fingerprints WHERE path = ?", (path,))
+
+    def add_alias(self, source_path, original_path, policy, alias_path=None, full_hash=None):
+        """Catat bahwa source_path adalah duplikat dari original_path"""
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO aliases (source_path, alias_path, original_path, policy, full_hash, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (source_path, alias_path, original_path, policy, full_hash, time.time()))
+
+    def get_aliases(self, original_path):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT source_path, alias_path, policy, created_at FROM aliases WHERE original_path = ? ORDER BY id",
+                (original_path,)).fetchall()
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def link_file(original_path, alias_path):
+    """Hard link alias_path -> original_path, False jika filesystem/share tidak mendukung"""
+    try:
+        os.link(original_path, alias_path)
+        return True
+    except (OSError, NotImplementedError) as e:
+        logger.warning(f"Hard link not possible ({e}), recording alias only: {alias_path}")
+        return False
+
+
+def unique_path(path):
+    """Path yang belum dipakai: JUDUL.mp4 -> JUDUL_2.mp4, JUDUL_3.mp4, ..."""
+    if not os.path.exists(path):
+        return path
+    stem, ext = os.path.splitext(path)
+    n = 2
+    while os.path.exists(f"{stem}_{n}{ext}"):
+        n += 1
+    return f"{stem}_{n}{ext}"
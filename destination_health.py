@@ -0,0 +1,189 @@
+import os
+import time
+import socket
+import logging
+import threading
+
+from readiness import Backoff
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Nilai numerik untuk metrics
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Nama file probe unik per proses - beberapa node bisa memprobe tujuan yang sama
+PROBE_FILE_NAME = f"file_watcher_health_probe_{socket.gethostname()}_{os.getpid()}.tmp"
+
+
+class CircuitBreaker:
+    """Circuit breaker untuk share tujuan
+
+    closed: tujuan dipakai normal. failure_threshold kegagalan berturut-turut -> open:
+    tujuan tidak disentuh sama sekali. Setelah reset timeout (naik eksponensial sampai
+    max_reset_timeout) -> half-open: satu probe percobaan, sukses -> closed, gagal -> open lagi.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=10, max_reset_timeout=300):
+        self.failure_threshold = failure_threshold
+        self.backoff = Backoff(initial=reset_timeout, maximum=max_reset_timeout)
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0
+        self.opened_count = 0
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """callback(state) dipanggil setiap state berubah"""
+        self.listeners.append(callback)
+
+    def is_closed(self):
+        with self.lock:
+            return self.state == CLOSED
+
+    def allow_probe(self):
+        """True jika probe boleh dijalankan (closed, atau open yang sudah lewat reset timeout)"""
+        changed = None
+        with self.lock:
+            if self.state == OPEN and time.monotonic() >= self.open_until:
+                changed = self._set_state(HALF_OPEN)
+            allowed = self.state != OPEN
+        self._notify(changed)
+        return allowed
+
+    def record_success(self):
+        changed = None
+        with self.lock:
+            self.failures = 0
+            self.backoff.reset()
+            if self.state != CLOSED:
+                changed = self._set_state(CLOSED)
+        self._notify(changed)
+
+    def record_failure(self):
+        changed = None
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.open_until = time.monotonic() + self.backoff.next_delay()
+                self.opened_count += 1
+                changed = self._set_state(OPEN)
+        self._notify(changed)
+
+    def _set_state(self, state):
+        """Ganti state (dipanggil dengan self.lock), return state untuk _notify setelah lock dilepas"""
+        logger.warning(f"DESTINATION CIRCUIT {self.state.upper()} -> {state.upper()}")
+        self.state = state
+        return state
+
+    def _notify(self, state):
+        """Panggil listener di luar self.lock - listener boleh mengambil lock lain (misal spool.wake)"""
+        if state is None:
+            return
+        for callback in self.listeners:
+            try:
+                callback(state)
+            except Exception as e:
+                logger.error(f"Circuit breaker listener failed: {e}")
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "opened": self.opened_count,
+                "retry_in": round(max(0, self.open_until - time.monotonic()), 1) if self.state == OPEN else None,
+            }
+
+
+class DestinationHealthMonitor:
+    """Probe berkala ke folder tujuan: latency stat + throughput tulis file probe kecil
+
+    Hasil probe diteruskan ke circuit breaker. Probe yang gagal atau lebih lambat dari
+    max_latency dihitung sebagai kegagalan. probe() juga bisa dipanggil langsung,
+    misal setelah copy gagal, untuk memastikan apakah share yang bermasalah.
+    """
+
+    def __init__(self, path, breaker, interval=30, probe_bytes=1024 * 1024, max_latency=5.0):
+        self.path = path
+        self.breaker = breaker
+        self.interval = interval
+        self.probe_bytes = probe_bytes
+        self.max_latency = max_latency
+        self.probe_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+        self.last_latency = None
+        self.last_write_mbps = None
+        self.last_error = None
+        self.last_probe_at = None
+        self.probe_count = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="destination-health", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        self.running = False
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _run(self):
+        while self.running:
+            if self.breaker.allow_probe():
+                self.probe()
+            # Saat open, cek lagi segera setelah reset timeout lewat
+            stats = self.breaker.get_stats()
+            delay = self.interval if stats["retry_in"] is None else min(self.interval, stats["retry_in"] + 0.1)
+            self.wakeup.wait(delay)
+            self.wakeup.clear()
+
+    def probe(self):
+        """Satu probe ke tujuan, True jika sehat"""
+        with self.probe_lock:
+            self.probe_count += 1
+            self.last_probe_at = time.time()
+            probe_path = os.path.join(self.path, PROBE_FILE_NAME)
+            try:
+                start = time.perf_counter()
+                os.stat(self.path)
+                self.last_latency = time.perf_counter() - start
+
+                start = time.perf_counter()
+                with open(probe_path, "wb") as f:
+                    f.write(os.urandom(self.probe_bytes))
+                    f.flush()
+                    os.fsync(f.fileno())
+                elapsed = time.perf_counter() - start
+                os.remove(probe_path)
+                self.last_write_mbps = self.probe_bytes / (1024 * 1024) / elapsed if elapsed > 0 else None
+
+                if self.last_latency > self.max_latency or elapsed > self.max_latency:
+                    raise IOError(f"destination too slow (stat {self.last_latency:.2f}s, write {elapsed:.2f}s)")
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"DESTINATION PROBE FAILED: {self.path}: {e}")
+                self.breaker.record_failure()
+                return False
+            self.last_error = None
+            self.breaker.record_success()
+            return True
+
+    def get_stats(self):
+        stats = self.breaker.get_stats()
+        stats.update({
+            "latency_seconds": round(self.last_latency, 4) if self.last_latency is not None else None,
+            "write_mbps": round(self.last_write_mbps, 1) if self.last_write_mbps is not None else None,
+            "last_error": self.last_error,
+            "probes": self.probe_count,
+        })
+        return stats
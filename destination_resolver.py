@@ -0,0 +1,129 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class DirectoryCache:
+    """LRU folder tujuan yang sudah pasti ada
+
+    Folder yang ada di cache tidak di-stat/mkdir lagi (di SMB setiap level path
+    makedirs = beberapa round trip). Entry dibuang lewat invalidate() saat tulis ke
+    folder itu gagal atau share tujuan putus (folder bisa saja dihapus dari luar).
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def ensure(self, path):
+        """Pastikan folder ada (mkdir hanya jika belum ada di cache)"""
+        key = os.path.normcase(os.path.abspath(path))
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return
+            self.misses += 1
+        os.makedirs(path, exist_ok=True)
+        with self.lock:
+            self.entries[key] = True
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, path=None):
+        """Buang folder (beserta subfolder-nya) dari cache, semua jika path None"""
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+                return
+            key = os.path.normcase(os.path.abspath(path))
+            prefix = key.rstrip(os.sep) + os.sep
+            for cached in [k for k in self.entries if k == key or k.startswith(prefix)]:
+                del self.entries[cached]
+
+    def get_stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+class DestinationResolver:
+    """Nama file -> folder tujuan <root>/<BAHANPUSTAKA>/<KEGIATAN>/YYYY/Month/DD
+
+    Mapping dibaca dari MappingFile watch folder (hot reload), nama folder tanggal
+    di-cache per hari, dan folder dibuat lewat DirectoryCache.
+    strict_codes: kode yang tidak ada di mapping dianggap format tidak valid
+    (default: nama folder = kode, seperti sebelumnya).
+    """
+
+    def __init__(self, cache_size=1024, strict_codes=False):
+        self.directories = DirectoryCache(cache_size)
+        self.strict_codes = strict_codes
+        self.date_cache = (None, None)  # (tanggal, (YYYY, Month, DD))
+        self.unknown_codes = set()
+
+    def parse(self, file_name):
+        """(kode bahan pustaka, kode kegiatan, nama file baru) atau None jika format tidak valid"""
+        parts = file_name.split('_')
+        if len(parts) < 3:
+            logger.error(f"Invalid filename format: {file_name}")
+            return None
+        if '.' not in parts[-1]:
+            logger.error(f"File without extension: {file_name}")
+            return None
+        return parts[0].upper(), parts[1].upper(), '_'.join(parts[2:])
+
+    def folder_names(self, folder, bahanpustaka_code, kegiatan_code):
+        """(folder bahan pustaka, folder kegiatan) atau None jika kode tidak dikenal (strict_codes)"""
+        bahanpustaka_map = folder.bahanpustaka_mapping.get()
+        kegiatan_map = folder.kegiatan_mapping.get()
+        for code, mapping in ((bahanpustaka_code, bahanpustaka_map), (kegiatan_code, kegiatan_map)):
+            if code not in mapping and (folder.name, code) not in self.unknown_codes:
+                # Dicatat sekali per kode supaya log tidak banjir
+                self.unknown_codes.add((folder.name, code))
+                logger.warning(f"Unknown code {code} in {folder.name} mapping"
+                               + (", file rejected" if self.strict_codes else ", using code as folder name"))
+        if self.strict_codes and (bahanpustaka_code not in bahanpustaka_map or kegiatan_code not in kegiatan_map):
+            return None
+        return (bahanpustaka_map.get(bahanpustaka_code, bahanpustaka_code),
+                kegiatan_map.get(kegiatan_code, kegiatan_code))
+
+    def destination_folder(self, file_name, folder):
+        """(<root>/<BAHANPUSTAKA>/<KEGIATAN>, nama file baru) atau (None, None)"""
+        parsed = self.parse(file_name)
+        if parsed is None:
+            return None, None
+        bahanpustaka_code, kegiatan_code, new_file_name = parsed
+        names = self.folder_names(folder, bahanpustaka_code, kegiatan_code)
+        if names is None:
+            return None, None
+        return os.path.join(folder.processed_folder, *names), new_file_name
+
+    def date_folders(self, when):
+        """(YYYY, Month, DD) - strftime hanya sekali per hari"""
+        day = when.date()
+        cached_day, folders = self.date_cache
+        if cached_day != day:
+            folders = (str(when.year), when.strftime("%B"), when.strftime("%d"))
+            self.date_cache = (day, folders)
+        return folders
+
+    def dated_folder(self, destination_folder, when):
+        return os.path.join(destination_folder, *self.date_folders(when))
+
+    def ensure_directory(self, path):
+        self.directories.ensure(path)
+
+    def invalidate(self, path=None):
+        self.directories.invalidate(path)
+
+    def get_stats(self):
+        stats = self.directories.get_stats()
+        stats["unknown_codes"] = len(self.unknown_codes)
+        return stats
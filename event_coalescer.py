@@ -0,0 +1,82 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class EventCoalescer:
+    """Gabungkan event filesystem per path dalam debounce window
+
+    Event created/modified/moved/closed untuk path yang sama digabung; callback
+    dipanggil sekali setelah path diam selama `debounce` detik (atau langsung lewat
+    flush). Satu thread untuk semua path.
+    """
+
+    def __init__(self, callback, debounce=0.25):
+        self.callback = callback
+        self.debounce = debounce
+        self.pending = {}  # path -> deadline
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.received_count = 0
+        self.emitted_count = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="event-coalescer", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def touch(self, path):
+        """Catat event untuk path, geser deadline"""
+        with self.condition:
+            self.received_count += 1
+            self.pending[path] = time.monotonic() + self.debounce
+            self.condition.notify()
+
+    def flush(self, path):
+        """Kirim path secepatnya (misal setelah close-after-write)"""
+        with self.condition:
+            self.received_count += 1
+            self.pending[path] = 0
+            self.condition.notify()
+
+    def cancel(self, path):
+        """Buang event yang tertunda (file dihapus/dipindah keluar)"""
+        with self.condition:
+            self.pending.pop(path, None)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if not self.running:
+                    return
+                now = time.monotonic()
+                due = [path for path, deadline in self.pending.items() if deadline <= now]
+                for path in due:
+                    del self.pending[path]
+                if not due:
+                    timeout = min(self.pending.values()) - now if self.pending else None
+                    self.condition.wait(timeout)
+                    continue
+            for path in due:
+                self.emitted_count += 1
+                try:
+                    self.callback(path)
+                except Exception as e:
+                    logger.error(f"Error handling coalesced event for {path}: {e}")
+
+    def get_stats(self):
+        with self.condition:
+            pending = len(self.pending)
+        return {"received": self.received_count, "emitted": self.emitted_count, "pending": pending}
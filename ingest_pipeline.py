@@ -0,0 +1,219 @@
+import time
+import heapq
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class IngestJob:
+    """Satu job pemrosesan file di dalam antrian
+
+    queued_at: waktu file pertama kali masuk antrian (tetap sama walau dicek ulang berkali-kali),
+    enqueued_at: waktu masuk antrian untuk pengecekan ini.
+    """
+
+    def __init__(self, file_path, priority=0, size=None, queued_at=None, checks=1):
+        self.file_path = file_path
+        self.priority = priority
+        self.size = size
+        self.enqueued_at = time.time()
+        self.queued_at = queued_at or self.enqueued_at
+        self.checks = checks
+        self.started_at = None
+        self.finished_at = None
+        self.success = None
+
+    def get_timings(self):
+        """Durasi tunggu di antrian, durasi proses dan total sejak pertama masuk (detik)"""
+        wait_time = (self.started_at or time.time()) - self.enqueued_at
+        run_time = None
+        total_time = None
+        if self.started_at is not None and self.finished_at is not None:
+            run_time = self.finished_at - self.started_at
+            total_time = self.finished_at - self.queued_at
+        return {
+            "file": self.file_path,
+            "priority": self.priority,
+            "queue_wait": round(wait_time, 3),
+            "run_time": round(run_time, 3) if run_time is not None else None,
+            "total_time": round(total_time, 3) if total_time is not None else None,
+            "checks": self.checks,
+            "success": self.success,
+        }
+
+
+class IngestPipeline:
+    """Antrian job + worker pool, supaya thread observer hanya enqueue
+
+    Urutan job berdasarkan virtual deadline: waktu masuk - priority * priority_seconds
+    (+ size / sjf_bytes_per_second jika shortest-job-first aktif). Job lama otomatis
+    "menua" karena job baru selalu mendapat deadline lebih akhir, jadi tidak ada yang
+    kelaparan. Job dengan priority >= express_priority masuk lane express yang
+    juga dilayani express_workers worker khusus.
+
+    process_func(file_path) return True (selesai), False (gagal/tidak valid) atau None
+    (belum siap, dijadwalkan cek ulang). Hanya hasil final yang dihitung completed/failed;
+    file yang dicek ulang tetap memakai waktu masuk pertama (aging deadline tidak reset).
+    """
+
+    def __init__(self, process_func, worker_count=4, max_queue_size=10000, history_size=100,
+                 priority_func=None, priority_seconds=60, sjf_bytes_per_second=None,
+                 express_priority=None, express_workers=0, name="ingest"):
+        self.process_func = process_func
+        self.name = name
+        self.worker_count = max(1, int(worker_count))
+        self.max_queue_size = max_queue_size
+        self.priority_func = priority_func
+        self.priority_seconds = priority_seconds
+        self.sjf_bytes_per_second = sjf_bytes_per_second
+        self.express_priority = express_priority
+        self.express_workers = min(int(express_workers), self.worker_count - 1) if express_priority is not None else 0
+        self.normal_lane = []
+        self.express_lane = []
+        self.seq = 0
+        self.condition = threading.Condition()
+        self.workers = []
+        self.active_jobs = {}
+        self.recent_jobs = deque(maxlen=history_size)
+        self.first_queued = {}  # file_path -> (waktu masuk pertama, jumlah pengecekan)
+        self.completed_count = 0
+        self.failed_count = 0
+        self.lock = threading.Lock()
+        self.running = False
+
+    def start(self):
+        """Start semua worker thread"""
+        if self.running:
+            return
+        self.running = True
+        for i in range(self.worker_count):
+            express_only = i < self.express_workers
+            name = f"{self.name}-express-{i + 1}" if express_only else f"{self.name}-worker-{i + 1}"
+            worker = threading.Thread(target=self._worker_loop, args=(express_only,), name=name, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        logger.info(f"Ingest pipeline {self.name} started with {self.worker_count} workers "
+                    f"({self.express_workers} express)")
+
+    def stop(self, timeout=None):
+        """Hentikan worker setelah job yang sedang berjalan selesai"""
+        if not self.running:
+            return
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.join(timeout)
+        self.workers = []
+        logger.info(f"Ingest pipeline {self.name} stopped")
+
+    def submit(self, file_path):
+        """Masukkan file ke antrian tanpa memblok thread pemanggil"""
+        priority, size = 0, None
+        if self.priority_func is not None:
+            try:
+                priority, size = self.priority_func(file_path)
+            except Exception as e:
+                logger.error(f"Priority lookup failed for {file_path}: {e}")
+        with self.lock:
+            queued_at, checks = self.first_queued.get(file_path, (None, 0))
+            job = IngestJob(file_path, priority, size, queued_at=queued_at, checks=checks + 1)
+            self.first_queued[file_path] = (job.queued_at, job.checks)
+
+        deadline = job.queued_at - priority * self.priority_seconds
+        if self.sjf_bytes_per_second and size:
+            deadline += size / self.sjf_bytes_per_second
+        express = self.express_priority is not None and priority >= self.express_priority
+
+        with self.condition:
+            if len(self.normal_lane) + len(self.express_lane) >= self.max_queue_size:
+                logger.error(f"QUEUE FULL ({self.max_queue_size}), job rejected: {file_path}")
+                return False
+            self.seq += 1
+            heapq.heappush(self.express_lane if express else self.normal_lane, (deadline, self.seq, job))
+            self.condition.notify_all()
+        return True
+
+    def _next_job(self, express_only):
+        """Ambil job berikutnya (express lebih dulu), None saat pipeline berhenti"""
+        with self.condition:
+            while True:
+                if not self.running:
+                    return None
+                if self.express_lane:
+                    return heapq.heappop(self.express_lane)[2]
+                if self.normal_lane and not express_only:
+                    return heapq.heappop(self.normal_lane)[2]
+                self.condition.wait()
+
+    def _worker_loop(self, express_only=False):
+        while True:
+            job = self._next_job(express_only)
+            if job is None:
+                return
+
+            job.started_at = time.time()
+            with self.lock:
+                self.active_jobs[threading.current_thread().name] = job
+            result = False
+            try:
+                result = self.process_func(job.file_path)
+            except Exception as e:
+                logger.error(f"Worker error for {job.file_path}: {e}")
+            finally:
+                job.finished_at = time.time()
+                with self.lock:
+                    self.active_jobs.pop(threading.current_thread().name, None)
+                    if result is not None:
+                        # Hasil final file ini (bukan pengecekan yang dijadwalkan ulang)
+                        job.success = result is not False
+                        self.first_queued.pop(job.file_path, None)
+                        self.recent_jobs.append(job.get_timings())
+                        if job.success:
+                            self.completed_count += 1
+                        else:
+                            self.failed_count += 1
+
+    def forget(self, file_path):
+        """Buang waktu masuk pertama file yang batal diproses (dipindah/dihapus saat menunggu)"""
+        with self.lock:
+            self.first_queued.pop(file_path, None)
+
+    def is_saturated(self):
+        """True jika semua worker sibuk atau ada job yang mengantri"""
+        with self.lock:
+            busy = len(self.active_jobs)
+        with self.condition:
+            depth = len(self.normal_lane) + len(self.express_lane)
+        return busy + depth >= self.worker_count
+
+    def get_queue_depth(self):
+        with self.condition:
+            return len(self.normal_lane) + len(self.express_lane)
+
+    def get_stats(self):
+        """Snapshot statistik antrian, worker dan timing job terakhir"""
+        with self.lock:
+            recent = list(self.recent_jobs)
+            active = [job.get_timings() for job in self.active_jobs.values()]
+            completed = self.completed_count
+            failed = self.failed_count
+        with self.condition:
+            express_depth = len(self.express_lane)
+            normal_depth = len(self.normal_lane)
+
+        run_times = [job["run_time"] for job in recent if job["run_time"] is not None]
+        return {
+            "queue_depth": express_depth + normal_depth,
+            "express_queue_depth": express_depth,
+            "worker_count": self.worker_count,
+            "busy_workers": len(active),
+            "completed": completed,
+            "failed": failed,
+            "active_jobs": active,
+            "recent_jobs": recent,
+            "avg_run_time": round(sum(run_times) / len(run_times), 3) if run_times else None,
+            "max_run_time": round(max(run_times), 3) if run_times else None,
+        }
@@ -0,0 +1,174 @@
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# State job per file
+DETECTED = "detected"
+WAITING = "waiting"
+COPYING = "copying"
+VERIFIED = "verified"
+DELETED = "deleted"
+SPOOLED = "spooled"  # Dipindah ke spool lokal, disalurkan ke tujuan saat share pulih
+FAILED = "failed"
+
+ACTIVE_STATES = (DETECTED, WAITING, COPYING, VERIFIED)
+TERMINAL_STATES = (DELETED, SPOOLED, FAILED)
+
+# Kolom yang boleh diisi lewat update()
+JOB_FIELDS = ("size", "hash", "hash_algorithm", "destination", "error")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    state TEXT NOT NULL,
+    size INTEGER,
+    hash TEXT,
+    hash_algorithm TEXT,
+    destination TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    detected_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_path ON jobs(path);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state);
+"""
+
+
+class JobStore:
+    """Job store persisten (SQLite WAL) untuk state setiap file
+
+    Cek duplikat memakai set path aktif di memory, semua perubahan state
+    ditulis batch oleh satu thread flusher dalam satu transaksi.
+    """
+
+    def __init__(self, db_path, flush_interval=0.5, batch_size=200):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+        self.db_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.pending = []
+        self.wakeup = threading.Event()
+        self.running = True
+
+        self.active_paths = set(row[0] for row in self.conn.execute(
+            f"SELECT DISTINCT path FROM jobs WHERE state IN ({','.join('?' * len(ACTIVE_STATES))})",
+            ACTIVE_STATES))
+        self.flusher = threading.Thread(target=self._flush_loop, name="job-store-flusher", daemon=True)
+        self.flusher.start()
+        logger.info(f"Job store opened: {db_path} ({len(self.active_paths)} in-flight jobs)")
+
+    def claim(self, path, size=None):
+        """Daftarkan file baru, False jika file sudah punya job aktif"""
+        now = time.time()
+        with self.lock:
+            if path in self.active_paths:
+                return False
+            self.active_paths.add(path)
+            self.pending.append(("insert", path, DETECTED, {"size": size}, now))
+        self._maybe_wake()
+        return True
+
+    def is_active(self, path):
+        with self.lock:
+            return path in self.active_paths
+
+    def update(self, path, state, **fields):
+        """Catat transisi state (ditulis batch)"""
+        now = time.time()
+        fields = {key: value for key, value in fields.items() if key in JOB_FIELDS and value is not None}
+        with self.lock:
+            if state in TERMINAL_STATES:
+                self.active_paths.discard(path)
+            self.pending.append(("update", path, state, fields, now))
+        self._maybe_wake()
+
+    def recover(self):
+        """Path job yang belum selesai saat proses terakhir berhenti"""
+        self.flush()
+        with self.db_lock:
+            rows = self.conn.execute(
+                f"SELECT path, state FROM jobs WHERE state IN ({','.join('?' * len(ACTIVE_STATES))}) ORDER BY id",
+                ACTIVE_STATES).fetchall()
+        return rows
+
+    def get_job(self, path):
+        """Job terakhir untuk path (dict) atau None"""
+        self.flush()
+        with self.db_lock:
+            cursor = self.conn.execute("SELECT * FROM jobs WHERE path = ? ORDER BY id DESC LIMIT 1", (path,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([col[0] for col in cursor.description], row))
+
+    def count_by_state(self):
+        self.flush()
+        with self.db_lock:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def _maybe_wake(self):
+        if len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    def _flush_loop(self):
+        while self.running:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Tulis semua transisi yang tertunda dalam satu transaksi"""
+        with self.db_lock:
+            with self.lock:
+                batch = self.pending
+                self.pending = []
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        try:
+            with self.conn:
+                for op, path, state, fields, ts in batch:
+                    if op == "insert":
+                        self.conn.execute(
+                            "INSERT INTO jobs (path, state, size, detected_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                            (path, state, fields.get("size"), ts, ts))
+                        continue
+                    assignments = ["state = ?", "updated_at = ?"]
+                    values = [state, ts]
+                    for key, value in fields.items():
+                        assignments.append(f"{key} = ?")
+                        values.append(value)
+                    if state in TERMINAL_STATES:
+                        assignments.append("finished_at = ?")
+                        values.append(ts)
+                    if state == WAITING:
+                        assignments.append("attempts = attempts + 1")
+                    self.conn.execute(
+                        f"UPDATE jobs SET {', '.join(assignments)} "
+                        f"WHERE id = (SELECT id FROM jobs WHERE path = ? ORDER BY id DESC LIMIT 1)",
+                        values + [path])
+        except sqlite3.Error as e:
+            logger.error(f"Job store flush failed ({len(batch)} transitions): {e}")
+
+    def close(self):
+        self.running = False
+        self.wakeup.set()
+        self.flusher.join(timeout=5)
+        self.flush()
+        with self.db_lock:
+            self.conn.close()
@@ -0,0 +1,308 @@
+import os
+import json
+import time
+import socket
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+LEASE_SUFFIX = ".lease"
+
+
+def default_node_id():
+    """Nama komputer + pid - unik walau beberapa proses jalan di satu mesin"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseManager:
+    """Koordinasi beberapa node (PC ingest) pada satu watch folder bersama
+
+    Satu lease file per file sumber di lease_dir (di share, terlihat semua node).
+    Lease dibuat atomic dengan O_CREAT | O_EXCL: hanya satu node yang berhasil.
+    Pemegang lease memperbarui expires_at setiap renew_interval (thread heartbeat);
+    lease yang lewat ttl (+ toleransi clock_skew antar PC) boleh diambil alih node lain:
+    lease lama di-rename ke nama unik per node dulu (hanya satu rename yang berhasil),
+    baru lease baru dibuat dengan O_EXCL lagi. Selama rename itu lease file sempat hilang,
+    jadi pemegang yang lease-nya belum kadaluarsa membaca ulang / membuat ulang lease-nya
+    sebelum menganggap lease hilang.
+    """
+
+    def __init__(self, lease_dir, node_id=None, ttl=60, renew_interval=None, clock_skew=5,
+                 cleanup_after=3600):
+        self.lease_dir = lease_dir
+        self.node_id = node_id or default_node_id()
+        self.ttl = ttl
+        self.renew_interval = renew_interval or max(1.0, ttl / 3.0)
+        self.clock_skew = clock_skew
+        self.cleanup_after = cleanup_after
+        os.makedirs(self.lease_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.held = {}  # key -> lease path
+        self.held_until = {}  # key -> expires_at terakhir yang ditulis node ini
+        self.wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+        self.acquired_count = 0
+        self.denied_count = 0
+        self.takeover_count = 0
+        self.lost_count = 0
+        self.last_cleanup = 0.0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self.thread.start()
+        logger.info(f"Lease coordination enabled: node {self.node_id}, lease dir {self.lease_dir} (ttl {self.ttl}s)")
+
+    def stop(self, timeout=5):
+        """Stop heartbeat dan lepas semua lease (node lain bisa langsung mengambil alih)"""
+        self.running = False
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        with self.lock:
+            keys = list(self.held)
+        for key in keys:
+            self.release(key)
+
+    def lease_path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.lease_dir, digest + LEASE_SUFFIX)
+
+    def _lease_data(self, key):
+        now = time.time()
+        return {"key": key, "node": self.node_id, "acquired_at": now, "expires_at": now + self.ttl}
+
+    def _create(self, path, data):
+        """Buat lease file baru secara atomic, False jika sudah ada"""
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+    def _create_own(self, key, path):
+        """Buat lease baru milik node ini, False jika sudah ada"""
+        data = self._lease_data(key)
+        if not self._create(path, data):
+            return False
+        with self.lock:
+            self.held_until[key] = data["expires_at"]
+        return True
+
+    def _read(self, path):
+        """Isi lease file, None jika tidak ada atau belum selesai ditulis"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, data):
+        """Tulis ulang lease milik sendiri (tmp + replace, pembaca tidak pernah melihat file setengah jadi)"""
+        tmp_path = f"{path}.{self.node_id}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def is_expired(self, data, path=None):
+        if data is None:
+            # Lease rusak/kosong (node mati saat menulis) - pakai mtime file
+            try:
+                return time.time() - os.path.getmtime(path) > self.ttl + self.clock_skew
+            except OSError:
+                return True
+        return data.get("expires_at", 0) + self.clock_skew < time.time()
+
+    def acquire(self, key):
+        """Ambil lease untuk key, True jika node ini pemegangnya"""
+        path = self.lease_path(key)
+        try:
+            if self._create_own(key, path):
+                return self._acquired(key, path)
+            current = self._read(path)
+            if current is not None and current.get("node") == self.node_id:
+                # Lease milik sendiri (misal dua event untuk file yang sama)
+                with self.lock:
+                    self.held_until[key] = current.get("expires_at", 0)
+                return self._acquired(key, path)
+            if not self.is_expired(current, path):
+                with self.lock:
+                    self.denied_count += 1
+                return False
+            return self._takeover(key, path, current)
+        except OSError as e:
+            logger.error(f"Lease acquire failed for {key}: {e}")
+            return False
+
+    def _takeover(self, key, path, expected):
+        """Ambil alih lease kadaluarsa (node pemegang mati/hang)"""
+        stale_path = f"{path}.{self.node_id}.stale"
+        # Cek ulang tepat sebelum rename - lease yang baru diperbarui/dibuat node lain tidak disentuh
+        current = self._read(path)
+        if current != expected and (current is not None or os.path.exists(path)):
+            with self.lock:
+                self.denied_count += 1
+            return False
+        try:
+            os.replace(path, stale_path)
+        except FileNotFoundError:
+            # Sudah dilepas/diambil node lain - coba buat baru
+            if self._create_own(key, path):
+                return self._acquired(key, path)
+            return False
+        moved = self._read(stale_path)
+        if moved != expected:
+            # Lease diperbarui/diambil node lain di antara baca dan rename - kembalikan
+            if moved is not None and not self.is_expired(moved):
+                self._create(path, moved)
+                self._remove(stale_path)
+                with self.lock:
+                    self.denied_count += 1
+                return False
+        self._remove(stale_path)
+        if not self._create_own(key, path):
+            return False
+        previous = expected.get("node") if expected else "unknown"
+        logger.warning(f"LEASE TAKEOVER: {key} (expired lease from {previous})")
+        with self.lock:
+            self.takeover_count += 1
+        return self._acquired(key, path)
+
+    def _acquired(self, key, path):
+        with self.lock:
+            if key not in self.held:
+                self.acquired_count += 1
+            self.held[key] = path
+        return True
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def is_held(self, key):
+        """True jika lease masih milik node ini (cek ke file, bukan hanya memory)"""
+        with self.lock:
+            path = self.held.get(key)
+        if path is None:
+            return False
+        data = self._read(path)
+        return data is not None and data.get("node") == self.node_id
+
+    def release(self, key):
+        """Lepas lease (file selesai/gagal), hanya jika masih milik node ini"""
+        with self.lock:
+            path = self.held.pop(key, None)
+            self.held_until.pop(key, None)
+        if path is None:
+            return
+        data = self._read(path)
+        if data is not None and data.get("node") == self.node_id:
+            self._remove(path)
+
+    def renew_all(self):
+        """Perpanjang semua lease yang dipegang; lease yang sudah diambil node lain dibuang"""
+        with self.lock:
+            held = dict(self.held)
+        for key, path in held.items():
+            data = self._read(path)
+            if data is None:
+                data = self._recover(key, path)
+            if data is None or data.get("node") != self.node_id:
+                logger.error(f"LEASE LOST: {key} (now held by {data.get('node') if data else 'nobody'})")
+                with self.lock:
+                    if self.held.get(key) == path:
+                        del self.held[key]
+                        self.held_until.pop(key, None)
+                    self.lost_count += 1
+                continue
+            data["expires_at"] = time.time() + self.ttl
+            try:
+                self._write(path, data)
+                with self.lock:
+                    if self.held.get(key) == path:
+                        self.held_until[key] = data["expires_at"]
+            except OSError as e:
+                # Share putus sebentar - dicoba lagi di heartbeat berikutnya (masih ada sisa ttl)
+                logger.warning(f"Lease renew failed for {key}: {e}")
+
+    def _recover(self, key, path, attempts=3, delay=0.2):
+        """Lease file milik sendiri tidak terbaca - bisa sedang di-rename node lain yang mengira lease
+        kadaluarsa (dikembalikan sesaat lagi), atau baru dibuat ulang dan belum selesai ditulis.
+
+        Baca ulang beberapa kali; jika file tetap hilang dan lease node ini belum kadaluarsa,
+        buat ulang. Return isi lease, None jika lease memang hilang.
+        """
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(delay)
+            data = self._read(path)
+            if data is not None:
+                return data
+            with self.lock:
+                until = self.held_until.get(key, 0)
+            if os.path.exists(path) or until <= time.time():
+                continue
+            if self._create_own(key, path):
+                logger.warning(f"LEASE RESTORED: {key} (lease file was missing)")
+                return self._read(path)
+        return None
+
+    def cleanup(self):
+        """Buang lease yang sudah lama kadaluarsa (sisa node yang mati, file sumbernya sudah tidak ada)"""
+        removed = 0
+        now = time.time()
+        try:
+            with os.scandir(self.lease_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(LEASE_SUFFIX):
+                        continue
+                    try:
+                        if now - entry.stat().st_mtime < self.ttl + self.cleanup_after:
+                            continue
+                    except OSError:
+                        continue
+                    data = self._read(entry.path)
+                    if data is None or data.get("expires_at", 0) + self.cleanup_after < now:
+                        self._remove(entry.path)
+                        removed += 1
+        except OSError as e:
+            logger.warning(f"Lease cleanup failed: {e}")
+        if removed:
+            logger.info(f"Removed {removed} stale leases from {self.lease_dir}")
+        return removed
+
+    def _run(self):
+        while self.running:
+            self.wakeup.wait(self.renew_interval)
+            self.wakeup.clear()
+            if not self.running:
+                return
+            self.renew_all()
+            if time.time() - self.last_cleanup >= self.cleanup_after:
+                self.last_cleanup = time.time()
+                self.cleanup()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "node": self.node_id,
+                "held": len(self.held),
+                "acquired": self.acquired_count,
+                "denied": self.denied_count,
+                "takeovers": self.takeover_count,
+                "lost": self.lost_count,
+            }
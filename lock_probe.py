@@ -0,0 +1,284 @@
+import os
+import sys
+import time
+import errno
+import signal
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LockProbe:
+    """Cek apakah file masih dibuka/di-lock proses lain, tanpa mengubah file"""
+
+    name = "base"
+
+    def is_locked(self, path):
+        return self.probe_many([path]).get(path, True)
+
+    def probe_many(self, paths):
+        """{path: locked} untuk beberapa file sekaligus"""
+        return {path: self.is_locked(path) for path in paths}
+
+
+class WindowsShareModeProbe(LockProbe):
+    """Windows: buka dengan share mode 0 - gagal (sharing violation) jika ada handle lain
+
+    Handle langsung ditutup, jadi penulis yang sudah membuka file tidak terganggu.
+    Bekerja juga untuk file di share SMB (dicek oleh server).
+    """
+
+    name = "sharemode"
+
+    GENERIC_READ = 0x80000000
+    OPEN_EXISTING = 3
+    FILE_ATTRIBUTE_NORMAL = 0x80
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self.kernel32.CreateFileW.restype = wintypes.HANDLE
+        self.kernel32.CreateFileW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                                              wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+        self.kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self.get_last_error = ctypes.get_last_error
+        self.invalid_handle = wintypes.HANDLE(-1).value
+
+    def is_locked(self, path):
+        handle = self.kernel32.CreateFileW(path, self.GENERIC_READ, 0, None, self.OPEN_EXISTING,
+                                           self.FILE_ATTRIBUTE_NORMAL, None)
+        if handle is None or handle == self.invalid_handle:
+            error = self.get_last_error()
+            if error not in (32, 33):  # ERROR_SHARING_VIOLATION, ERROR_LOCK_VIOLATION
+                logger.debug(f"Lock probe open failed ({error}): {path}")
+            return True
+        self.kernel32.CloseHandle(handle)
+        return False
+
+
+class LinuxProbe(LockProbe):
+    """Linux: write lease (F_SETLEASE) hanya bisa diambil jika tidak ada fd lain yang membuka file
+
+    Jika lease tidak didukung (NFS/CIFS, file milik user lain) fallback ke /proc/locks
+    (advisory lock) dan scan /proc/<pid>/fd - satu scan /proc untuk semua file di batch.
+    Proses milik user lain hanya terlihat jika watcher jalan sebagai root.
+
+    Selama lease dipegang, open() dari proses lain membuat kernel mengirim SIGIO ke
+    watcher - default action SIGIO adalah terminate, jadi SIGIO harus di-ignore dulu.
+    """
+
+    name = "lease"
+
+    def __init__(self):
+        import fcntl
+        self.fcntl = fcntl
+        self.lease_enabled = self._ignore_sigio()
+
+    @staticmethod
+    def _ignore_sigio():
+        """True jika SIGIO aman (di-ignore/ada handler), False jika lease tidak boleh dipakai"""
+        sigio = getattr(signal, "SIGIO", None)
+        if sigio is None:
+            return False
+        try:
+            if signal.getsignal(sigio) == signal.SIG_DFL:
+                signal.signal(sigio, signal.SIG_IGN)
+            return True
+        except (ValueError, OSError) as e:
+            # signal.signal hanya bisa dari main thread
+            logger.warning(f"LOCK PROBE: cannot ignore SIGIO, using /proc scan instead of leases: {e}")
+            return False
+
+    def probe_many(self, paths):
+        results = {}
+        unknown = []
+        for path in paths:
+            locked = self._probe_lease(path)
+            if locked is None:
+                unknown.append(path)
+            else:
+                results[path] = locked
+        if unknown:
+            results.update(self._probe_proc(unknown))
+        return results
+
+    def _probe_lease(self, path):
+        """True/False dari lease, None jika lease tidak bisa dipakai untuk file ini"""
+        if not self.lease_enabled:
+            return None
+        try:
+            fd = os.open(path, os.O_RDONLY | getattr(os, "O_NONBLOCK", 0))
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return None
+        try:
+            self.fcntl.fcntl(fd, self.fcntl.F_SETLEASE, self.fcntl.F_WRLCK)
+            self.fcntl.fcntl(fd, self.fcntl.F_SETLEASE, self.fcntl.F_UNLCK)
+            return False
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EBUSY):
+                return True
+            if e.errno == errno.EINVAL:
+                # Filesystem tidak mendukung lease sama sekali (misal kernel tanpa lease)
+                logger.debug(f"File leases not supported, using /proc scan: {e}")
+            return None
+        finally:
+            os.close(fd)
+
+    def _probe_proc(self, paths):
+        targets = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            targets[(st.st_dev, st.st_ino)] = path
+        results = {path: path not in targets.values() for path in paths}
+        if not targets:
+            return results
+
+        for key in self._locked_inodes(targets):
+            results[targets[key]] = True
+
+        real_paths = {os.path.realpath(path): path for path in targets.values()}
+        own_pid = str(os.getpid())
+        try:
+            pids = [entry.name for entry in os.scandir("/proc") if entry.name.isdigit() and entry.name != own_pid]
+        except OSError:
+            return results
+        for pid in pids:
+            try:
+                fds = os.scandir(f"/proc/{pid}/fd")
+            except OSError:
+                continue
+            with fds:
+                for fd_entry in fds:
+                    try:
+                        target = os.readlink(fd_entry.path)
+                    except OSError:
+                        continue
+                    path = real_paths.get(target)
+                    if path is not None:
+                        results[path] = True
+        return results
+
+    @staticmethod
+    def _locked_inodes(targets):
+        """(dev, ino) dari targets yang punya advisory lock di /proc/locks"""
+        locked = set()
+        try:
+            with open("/proc/locks", "r") as f:
+                lines = f.readlines()
+        except OSError:
+            return locked
+        for line in lines:
+            parts = line.split()
+            # "1: POSIX  ADVISORY  WRITE 1234 08:01:5678 0 EOF" (baris "->" = menunggu lock)
+            if len(parts) < 6 or parts[1] == "->":
+                continue
+            try:
+                major, minor, inode = parts[5].split(":")
+                dev = os.makedev(int(major, 16), int(minor, 16))
+                key = (dev, int(inode))
+            except ValueError:
+                continue
+            if key in targets:
+                locked.add(key)
+        return locked
+
+
+class FlockProbe(LockProbe):
+    """Platform lain: hanya mendeteksi flock() eksklusif milik proses lain"""
+
+    name = "flock"
+
+    def is_locked(self, path):
+        import fcntl
+        try:
+            with open(path, "rb") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            return False
+        except OSError:
+            return True
+
+
+class RenameProbe(LockProbe):
+    """Cara lama: rename ke .delete_test lalu kembali (mengubah file, hanya untuk kompatibilitas)"""
+
+    name = "rename"
+
+    def is_locked(self, path):
+        temp_name = path + ".delete_test"
+        try:
+            os.rename(path, temp_name)
+        except OSError:
+            return True
+        try:
+            os.rename(temp_name, path)
+        except OSError as e:
+            logger.error(f"Lock probe could not restore name {temp_name}: {e}")
+        return False
+
+
+class BatchedLockProbe(LockProbe):
+    """Kumpulkan permintaan dari beberapa worker dalam window singkat, lalu probe sekaligus"""
+
+    def __init__(self, probe, window=0.02):
+        self.probe = probe
+        self.name = f"{probe.name}+batch"
+        self.window = window
+        self.lock = threading.Lock()
+        self.pending = []
+        self.collecting = False
+        self.cycles = 0
+
+    def is_locked(self, path):
+        request = [path, threading.Event(), True]
+        with self.lock:
+            self.pending.append(request)
+            leader = not self.collecting
+            self.collecting = True
+        if leader:
+            time.sleep(self.window)
+            with self.lock:
+                batch, self.pending = self.pending, []
+                self.collecting = False
+                self.cycles += 1
+            try:
+                results = self.probe.probe_many(list({item[0] for item in batch}))
+            except Exception as e:
+                logger.error(f"Lock probe failed: {e}")
+                results = {}
+            for item in batch:
+                item[2] = results.get(item[0], True)
+                item[1].set()
+        request[1].wait()
+        return request[2]
+
+    def probe_many(self, paths):
+        return self.probe.probe_many(paths)
+
+
+def create_lock_probe(mode="auto", batch_window=0.02):
+    """Lock probe sesuai platform: "auto", "sharemode", "lease", "flock" atau "rename" (cara lama)"""
+    if mode == "auto":
+        if sys.platform == "win32":
+            mode = "sharemode"
+        elif sys.platform.startswith("linux"):
+            mode = "lease"
+        else:
+            mode = "flock"
+    if mode == "sharemode":
+        return WindowsShareModeProbe()
+    if mode == "lease":
+        # Fallback /proc scan lebih murah jika beberapa file diperiksa dalam satu scan
+        return BatchedLockProbe(LinuxProbe(), batch_window) if batch_window else LinuxProbe()
+    if mode == "flock":
+        return FlockProbe()
+    if mode == "rename":
+        return RenameProbe()
+    raise ValueError(f"Unknown lock probe: {mode}")
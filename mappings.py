@@ -0,0 +1,163 @@
+"""Mapping kode -> folder
+
+Nilai mapping boleh string (nama folder) atau dict dengan field tambahan:
+
+    {"KHI": {"name": "KEPRI HARI INI", "priority": 10}, "RM": "RUMAH MUSIK"}
+
+MappingFile memuat file mapping JSON, memvalidasi dan meng-compile-nya, lalu memuat
+ulang otomatis saat file diubah (tanpa restart watcher).
+"""
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def mapping_name(code, value):
+    """Nama folder untuk kode"""
+    if isinstance(value, dict):
+        return value.get("name", code)
+    return value
+
+
+def mapping_priority(value):
+    """Bobot prioritas untuk kode (default 0)"""
+    if isinstance(value, dict):
+        return int(value.get("priority", 0))
+    return 0
+
+
+def split_mapping(raw):
+    """Pisahkan mapping mentah menjadi (kode -> nama folder, kode -> prioritas)"""
+    names = {}
+    priorities = {}
+    for code, value in raw.items():
+        names[code] = mapping_name(code, value)
+        priority = mapping_priority(value)
+        if priority:
+            priorities[code] = priority
+    return names, priorities
+
+
+# Karakter yang tidak boleh ada di nama folder (Windows/SMB)
+INVALID_FOLDER_CHARS = set('<>:"/\\|?*')
+
+
+def validate_mapping(raw, source="mapping"):
+    """Cek mapping mentah, raise ValueError berisi semua masalah yang ditemukan"""
+    if not isinstance(raw, dict):
+        raise ValueError(f"{source}: mapping must be a JSON object")
+    errors = []
+    seen = {}
+    for code, value in raw.items():
+        if not code or code != code.strip() or "_" in code or any(c in INVALID_FOLDER_CHARS for c in code):
+            # Kode dipisah dengan "_" di nama file, jadi tidak boleh mengandung "_"
+            errors.append(f"invalid code {code!r}")
+        elif code.upper() in seen:
+            errors.append(f"duplicate code {code!r} (same as {seen[code.upper()]!r})")
+        seen.setdefault(code.upper(), code)
+        if not isinstance(value, (str, dict)):
+            errors.append(f"{code}: value must be a folder name or object")
+            continue
+        name = mapping_name(code, value)
+        if (not isinstance(name, str) or not name.strip() or name in (".", "..")
+                or name[-1] in ". " or any(c in INVALID_FOLDER_CHARS for c in name)):
+            errors.append(f"{code}: invalid folder name {name!r}")
+        try:
+            mapping_priority(value)
+        except (TypeError, ValueError):
+            errors.append(f"{code}: priority must be a number")
+    if errors:
+        raise ValueError(f"{source}: " + "; ".join(errors))
+
+
+class CompiledMapping:
+    """Mapping tervalidasi, kode dinormalisasi ke huruf besar untuk lookup cepat"""
+
+    def __init__(self, raw=None, source="mapping"):
+        raw = raw or {}
+        validate_mapping(raw, source)
+        names, priorities = split_mapping(raw)
+        self.names = {code.upper(): name for code, name in names.items()}
+        self.priorities = {code.upper(): priority for code, priority in priorities.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, code):
+        return code in self.names
+
+    def get(self, code, default=None):
+        """Nama folder untuk kode (kode sudah huruf besar)"""
+        return self.names.get(code, default)
+
+
+class MappingFile:
+    """Mapping dari file JSON yang dimuat ulang otomatis saat mtime/size file berubah
+
+    Pengecekan dilakukan saat mapping dipakai, paling sering setiap check_interval
+    detik. File yang rusak/tidak valid ditolak dan mapping lama tetap dipakai.
+    Pergantian mapping berupa satu assignment, jadi worker tidak pernah ditahan
+    dan tidak pernah melihat mapping setengah jadi.
+    """
+
+    def __init__(self, path, check_interval=2.0, on_reload=None):
+        self.path = path
+        self.check_interval = check_interval
+        self.on_reload = on_reload
+        self.lock = threading.Lock()
+        self.signature = None
+        self.last_check = 0.0
+        self.reload_count = 0
+        self.error_count = 0
+        self.last_error = None
+        self.compiled = CompiledMapping()
+        self.reload(initial=True)
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def reload(self, initial=False):
+        """Baca dan compile ulang file, True jika mapping baru dipakai"""
+        signature = self._signature()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                compiled = CompiledMapping(json.load(f), self.path)
+        except Exception as e:
+            self.signature = signature  # Jangan dicoba ulang sampai file berubah lagi
+            self.error_count += 1
+            self.last_error = str(e)
+            logger.error(f"ERROR loading mapping from {self.path}: {e}"
+                         + ("" if initial else " (keeping previous mapping)"))
+            return False
+        self.compiled = compiled
+        self.signature = signature
+        self.last_error = None
+        if initial:
+            logger.info(f"Mapping loaded from {self.path}: {len(compiled)} entries")
+        else:
+            self.reload_count += 1
+            logger.info(f"MAPPING RELOADED: {self.path} ({len(compiled)} entries)")
+            if self.on_reload is not None:
+                self.on_reload(self)
+        return True
+
+    def get(self):
+        """CompiledMapping saat ini (cek perubahan file jika sudah waktunya)"""
+        now = time.monotonic()
+        if now - self.last_check >= self.check_interval and self.lock.acquire(blocking=False):
+            # Hanya satu thread yang cek/reload, thread lain langsung memakai mapping lama
+            try:
+                self.last_check = now
+                if self._signature() != self.signature:
+                    self.reload()
+            finally:
+                self.lock.release()
+        return self.compiled
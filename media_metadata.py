@@ -0,0 +1,326 @@
+"""Metadata rekaman dari header container MP4/MOV (ISO BMFF) dan MXF
+
+Hanya header yang dibaca (seek + read kecil), isi essence/mdat tidak pernah dibaca,
+jadi biaya tetap sama untuk file 100 MB maupun 100 GB:
+- MP4/MOV: box top-level dilompati dengan seek sampai moov, lalu hanya mvhd, tkhd,
+  hdlr dan entry pertama stsd yang dibaca (tabel sample yang besar dilewati).
+- MXF: partition pack header (boleh didahului run-in), header metadata (local set
+  Preface, Package, Descriptor); jika header belum lengkap (file growing) header
+  metadata di footer partition ikut dibaca.
+
+read_metadata() return dict {container, creation_time (ISO, waktu lokal), duration
+(detik), width, height, codec} atau None jika format tidak dikenal/rusak.
+"""
+import os
+import struct
+import logging
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+BMFF_EXTENSIONS = (".mp4", ".mov", ".m4v", ".3gp", ".qt")
+MXF_EXTENSIONS = (".mxf",)
+
+# Detik antara epoch QuickTime (1904-01-01) dan epoch Unix
+QT_EPOCH_OFFSET = 2082844800
+MAX_TOP_LEVEL_BOXES = 1024
+MAX_HEADER_METADATA = 16 * 1024 * 1024
+MXF_RUN_IN_LIMIT = 65536
+
+MXF_UL_PREFIX = b"\x06\x0e\x2b\x34"
+MXF_PARTITION_PREFIX = b"\x06\x0e\x2b\x34\x02\x05\x01\x01\x0d\x01\x02\x01\x01"
+MXF_LOCAL_SET_PREFIX = b"\x06\x0e\x2b\x34\x02\x53\x01\x01\x0d\x01\x01\x01\x01"
+
+# key[13:15] local set MXF yang dipakai
+MXF_PREFACE = b"\x01\x2f"
+MXF_IDENTIFICATION = b"\x01\x30"
+MXF_MATERIAL_PACKAGE = b"\x01\x36"
+MXF_SOURCE_PACKAGE = b"\x01\x37"
+MXF_PICTURE_DESCRIPTORS = (b"\x01\x27", b"\x01\x28", b"\x01\x29", b"\x01\x51")  # generic, CDCI, RGBA, MPEG
+
+# PictureEssenceCoding UL byte 12-13 -> nama codec
+MXF_CODECS = {(0x01, 0x32): "h264", (0x01, 0x31): "h264", (0x03, 0x01): "jpeg2000", (0x71, None): "vc3",
+              (0x02, None): "dv", (0x01, None): "mpeg2", (0x06, None): "prores"}
+
+
+class _Reader:
+    """File wrapper yang menghitung byte yang benar-benar dibaca"""
+
+    def __init__(self, f):
+        self.f = f
+        self.bytes_read = 0
+        self.reads = 0
+        self.size = os.fstat(f.fileno()).st_size
+
+    def read_at(self, offset, n):
+        self.f.seek(offset)
+        data = self.f.read(n)
+        self.bytes_read += len(data)
+        self.reads += 1
+        return data
+
+
+def _plausible(when):
+    """Tanggal 0/rusak dari kamera (misal 1904 atau jauh di masa depan) dianggap tidak ada"""
+    if when is None or when.year < 1990 or when > datetime.now() + timedelta(days=1):
+        return None
+    return when
+
+
+# ---------------------------------------------------------------- MP4 / MOV
+
+def _boxes(reader, start, end):
+    """(type, offset payload, offset akhir box) untuk box di [start, end) - hanya header yang dibaca"""
+    pos = start
+    count = 0
+    while pos + 8 <= end and count < MAX_TOP_LEVEL_BOXES:
+        header = reader.read_at(pos, 16)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header[:8])
+        payload = pos + 8
+        if size == 1:
+            if len(header) < 16:
+                return
+            size = struct.unpack(">Q", header[8:16])[0]
+            payload = pos + 16
+        elif size == 0:
+            size = end - pos  # Box terakhir sampai akhir file
+        if size < payload - pos:
+            return  # Rusak
+        yield box_type, payload, min(pos + size, end)
+        pos += size
+        count += 1
+
+
+def _parse_mvhd(data, info):
+    version = data[0]
+    if version == 1:
+        created, _, timescale, duration = struct.unpack(">QQIQ", data[4:32])
+    else:
+        created, _, timescale, duration = struct.unpack(">IIII", data[4:20])
+    if created:
+        info["creation_time"] = _plausible(datetime.fromtimestamp(created - QT_EPOCH_OFFSET))
+    if timescale and duration and duration not in (0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF):
+        info["duration"] = duration / timescale
+
+
+def _parse_trak(reader, start, end, info):
+    track = {}
+    for box_type, payload, box_end in _boxes(reader, start, end):
+        if box_type == b"tkhd":
+            data = reader.read_at(payload, min(96, box_end - payload))
+            offset = 88 if data[:1] == b"\x01" else 76
+            if len(data) >= offset + 8:
+                width, height = struct.unpack(">II", data[offset:offset + 8])
+                track["width"], track["height"] = width >> 16, height >> 16
+        elif box_type == b"mdia":
+            for mdia_type, mdia_payload, mdia_end in _boxes(reader, payload, box_end):
+                if mdia_type == b"hdlr":
+                    track["handler"] = reader.read_at(mdia_payload + 8, 4)
+                elif mdia_type == b"minf":
+                    for minf_type, minf_payload, minf_end in _boxes(reader, mdia_payload, mdia_end):
+                        if minf_type != b"stbl":
+                            continue
+                        for stbl_type, stbl_payload, stbl_end in _boxes(reader, minf_payload, minf_end):
+                            if stbl_type == b"stsd":
+                                # verflags(4) + entry_count(4) + entry pertama: size(4) + format(4) + ... + width/height
+                                data = reader.read_at(stbl_payload, min(44, stbl_end - stbl_payload))
+                                if len(data) >= 16:
+                                    track["codec"] = data[12:16].decode("latin-1").strip()
+                                if len(data) >= 44 and not track.get("width"):
+                                    track["width"], track["height"] = struct.unpack(">HH", data[40:44])
+                                break
+    if track.get("handler") == b"vide":
+        for key in ("codec", "width", "height"):
+            if track.get(key):
+                info[key] = track[key]
+    elif track.get("handler") == b"soun" and track.get("codec"):
+        info.setdefault("audio_codec", track["codec"])
+
+
+def parse_bmff(reader):
+    """Metadata MP4/MOV, None jika tidak ada moov"""
+    info = {"container": "mp4"}
+    for box_type, payload, box_end in _boxes(reader, 0, reader.size):
+        if box_type == b"ftyp":
+            if reader.read_at(payload, 4) == b"qt  ":
+                info["container"] = "mov"
+        elif box_type == b"moov":
+            for child_type, child_payload, child_end in _boxes(reader, payload, box_end):
+                if child_type == b"mvhd":
+                    _parse_mvhd(reader.read_at(child_payload, min(32, child_end - child_payload)), info)
+                elif child_type == b"trak":
+                    _parse_trak(reader, child_payload, child_end, info)
+            return info
+    return None
+
+
+# ---------------------------------------------------------------- MXF
+
+def _ber_length(data, pos):
+    """(panjang, posisi setelah field panjang) - BER short/long form"""
+    first = data[pos]
+    if first < 0x80:
+        return first, pos + 1
+    n = first & 0x7F
+    if n == 0 or n > 8:
+        raise ValueError("invalid BER length")
+    return int.from_bytes(data[pos + 1:pos + 1 + n], "big"), pos + 1 + n
+
+
+def _mxf_timestamp(value):
+    """Timestamp MXF (UTC) -> waktu lokal, None jika kosong"""
+    if len(value) < 8:
+        return None
+    year, month, day, hour, minute, second, quarter_ms = struct.unpack(">HBBBBBB", value[:8])
+    if not year or not month or not day:
+        return None
+    try:
+        when = datetime(year, month, day, hour, minute, second, quarter_ms * 4000, tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return _plausible(when.astimezone().replace(tzinfo=None))
+
+
+def _mxf_codec(ul):
+    if len(ul) < 14:
+        return None
+    for (major, minor), name in MXF_CODECS.items():
+        if ul[12] == major and (minor is None or ul[13] == minor):
+            return name
+    return ul[8:16].hex(".")
+
+
+def _local_tags(value):
+    pos = 0
+    while pos + 4 <= len(value):
+        tag, length = struct.unpack(">HH", value[pos:pos + 4])
+        yield tag, value[pos + 4:pos + 4 + length]
+        pos += 4 + length
+
+
+def _parse_mxf_header_metadata(data, info, dates):
+    pos = 0
+    while pos + 17 <= len(data):
+        key = data[pos:pos + 16]
+        if key[:4] != MXF_UL_PREFIX or key[:13] == MXF_PARTITION_PREFIX:
+            break  # Sudah lewat header metadata (essence / partition berikutnya)
+        length, value_pos = _ber_length(data, pos + 16)
+        value = data[value_pos:value_pos + length]
+        pos = value_pos + length
+        if key[:13] != MXF_LOCAL_SET_PREFIX:
+            continue  # Primer pack, fill, dll.
+        set_id = key[13:15]
+        for tag, tag_value in _local_tags(value):
+            if set_id == MXF_PREFACE and tag == 0x3B02:
+                dates.setdefault("preface", _mxf_timestamp(tag_value))
+            elif set_id == MXF_IDENTIFICATION and tag == 0x3C06:
+                dates.setdefault("identification", _mxf_timestamp(tag_value))
+            elif set_id in (MXF_MATERIAL_PACKAGE, MXF_SOURCE_PACKAGE) and tag == 0x4405:
+                dates.setdefault("material" if set_id == MXF_MATERIAL_PACKAGE else "source",
+                                 _mxf_timestamp(tag_value))
+            elif set_id in MXF_PICTURE_DESCRIPTORS:
+                if tag == 0x3203 and len(tag_value) == 4:
+                    info.setdefault("width", struct.unpack(">I", tag_value)[0])
+                elif tag == 0x3202 and len(tag_value) == 4:
+                    info.setdefault("height", struct.unpack(">I", tag_value)[0])
+                elif tag == 0x3001 and len(tag_value) == 8:
+                    info.setdefault("_rate", struct.unpack(">ii", tag_value))
+                elif tag == 0x3002 and len(tag_value) == 8 and struct.unpack(">q", tag_value)[0] > 0:
+                    info.setdefault("_frames", struct.unpack(">q", tag_value)[0])
+                elif tag == 0x3201 and len(tag_value) == 16:
+                    info.setdefault("codec", _mxf_codec(tag_value))
+
+
+def _read_mxf_partition(reader, offset):
+    """(header_byte_count, footer_offset, offset header metadata) partition pack di offset"""
+    head = reader.read_at(offset, 16 + 9 + 64)
+    if head[:13] != MXF_PARTITION_PREFIX:
+        raise ValueError("not an MXF partition pack")
+    length, value_pos = _ber_length(head, 16)
+    value = head[value_pos:value_pos + 40]
+    if len(value) < 40:
+        raise ValueError("truncated partition pack")
+    footer_offset, header_byte_count = struct.unpack(">QQ", value[24:40])
+    return header_byte_count, footer_offset, offset + value_pos + length
+
+
+def _read_mxf_metadata_block(reader, offset, header_byte_count, info, dates):
+    # Fill item (KAG) boleh ada di antara partition pack dan header metadata
+    size = min(header_byte_count + 1024, MAX_HEADER_METADATA, reader.size - offset)
+    if header_byte_count and size > 0:
+        _parse_mxf_header_metadata(reader.read_at(offset, size), info, dates)
+
+
+def parse_mxf(reader):
+    """Metadata MXF, None jika header partition tidak ditemukan"""
+    start = 0
+    if reader.read_at(0, 16)[:13] != MXF_PARTITION_PREFIX:
+        # Ada run-in sebelum header partition (maksimal 64 KB)
+        start = reader.read_at(0, MXF_RUN_IN_LIMIT + 16).find(MXF_PARTITION_PREFIX)
+        if start < 0:
+            return None
+    info = {"container": "mxf"}
+    dates = {}
+    header_byte_count, footer_offset, metadata_offset = _read_mxf_partition(reader, start)
+    _read_mxf_metadata_block(reader, metadata_offset, header_byte_count, info, dates)
+    if footer_offset and ("_frames" not in info or not any(dates.values())):
+        # Header terbuka (file growing) - metadata final ada di footer partition
+        try:
+            footer_bytes, _, footer_metadata = _read_mxf_partition(reader, start + footer_offset)
+            _read_mxf_metadata_block(reader, footer_metadata, footer_bytes, info, dates)
+        except (ValueError, struct.error, IndexError) as e:
+            logger.debug(f"MXF footer partition unreadable: {e}")
+    for source in ("material", "source", "identification", "preface"):
+        if dates.get(source):
+            info["creation_time"] = dates[source]
+            break
+    rate = info.pop("_rate", None)
+    frames = info.pop("_frames", None)
+    if rate and rate[0] > 0 and rate[1] > 0 and frames:
+        info["duration"] = frames * rate[1] / rate[0]
+    return info
+
+
+# ---------------------------------------------------------------- API
+
+def read_metadata(path, stats=None):
+    """Metadata header container (dict) atau None; stats diisi bytes_read/reads jika diberikan"""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, "rb") as f:
+            reader = _Reader(f)
+            if extension in MXF_EXTENSIONS:
+                info = parse_mxf(reader)
+            elif extension in BMFF_EXTENSIONS:
+                info = parse_bmff(reader)
+            else:
+                # Ekstensi lain: kenali dari isi (ftyp di byte 4 atau partition pack MXF)
+                magic = reader.read_at(0, 16)
+                if magic[4:8] == b"ftyp":
+                    info = parse_bmff(reader)
+                elif magic[:4] == MXF_UL_PREFIX:
+                    info = parse_mxf(reader)
+                else:
+                    info = None
+            if stats is not None:
+                stats["bytes_read"] = reader.bytes_read
+                stats["reads"] = reader.reads
+    except (OSError, ValueError, struct.error, IndexError) as e:
+        logger.warning(f"Could not read metadata from {os.path.basename(path)}: {e}")
+        return None
+    if info is None:
+        return None
+    creation_time = info.get("creation_time")
+    info["creation_time"] = creation_time.isoformat(timespec="seconds") if creation_time else None
+    if info.get("duration") is not None:
+        info["duration"] = round(info["duration"], 3)
+    return info
+
+
+def recording_date(metadata):
+    """Tanggal rekaman (datetime lokal) dari hasil read_metadata, None jika tidak ada"""
+    if metadata and metadata.get("creation_time"):
+        return datetime.fromisoformat(metadata["creation_time"])
+    return None
@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+import urllib.request
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class Notification:
+    """Satu notifikasi (atau ringkasan beberapa notifikasi yang digabung)"""
+
+    def __init__(self, title, message, category="error", count=1):
+        self.title = title
+        self.message = message
+        self.category = category
+        self.count = count
+        self.timestamp = time.time()
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "message": self.message,
+            "category": self.category,
+            "count": self.count,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+        }
+
+
+class LogSink:
+    """Tulis notifikasi ke log"""
+
+    def send(self, notification):
+        logger.warning(f"NOTIFY [{notification.category}] {notification.title}: {notification.message}")
+
+
+class NullSink:
+    """Tidak melakukan apa-apa (test/headless)"""
+
+    def send(self, notification):
+        pass
+
+
+class PopupSink:
+    """Windows message box, tiap popup di thread sendiri supaya tidak memblok"""
+
+    def __init__(self, max_open=3):
+        self.max_open = max_open
+        self.open_count = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def available():
+        return sys.platform == "win32"
+
+    def send(self, notification):
+        with self.lock:
+            if self.open_count >= self.max_open:
+                logger.info(f"Popup skipped, {self.open_count} still open: {notification.title}")
+                return
+            self.open_count += 1
+        threading.Thread(target=self._show, args=(notification,), daemon=True).start()
+
+    def _show(self, notification):
+        import ctypes
+        try:
+            ctypes.windll.user32.MessageBoxW(0, notification.message, notification.title, 0x10)
+        finally:
+            with self.lock:
+                self.open_count -= 1
+
+
+class WebhookSink:
+    """POST JSON ke webhook lokal"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, notification):
+        data = json.dumps(notification.to_dict()).encode("utf-8")
+        request = urllib.request.Request(self.url, data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class FileDropSink:
+    """Tulis setiap notifikasi sebagai file JSON di folder drop"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def send(self, notification):
+        name = f"{datetime.fromtimestamp(notification.timestamp).strftime('%Y%m%d_%H%M%S_%f')}_{notification.category}.json"
+        tmp_path = os.path.join(self.folder, name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(notification.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(self.folder, name))
+
+
+class Notifier:
+    """Antrian notifikasi async dengan sink pluggable dan penggabungan error berulang
+
+    Notifikasi pertama per kategori langsung dikirim, sisanya dalam coalesce_window
+    digabung menjadi satu ringkasan (misal "37 notifikasi dalam 5 menit").
+    """
+
+    def __init__(self, sinks, coalesce_window=300, max_queue_size=1000):
+        self.sinks = list(sinks)
+        self.coalesce_window = coalesce_window
+        self.notifications = queue.Queue(maxsize=max_queue_size)
+        self.windows = {}  # category -> [window_start, suppressed_count, last_notification]
+        self.sent_count = 0
+        self.suppressed_count = 0
+        self.dropped_count = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self.thread.start()
+
+    def notify(self, title, message, category="error"):
+        """Kirim notifikasi tanpa memblok pemanggil"""
+        try:
+            self.notifications.put_nowait(Notification(title, message, category))
+        except queue.Full:
+            self.dropped_count += 1
+            logger.warning(f"Notification queue full, dropped: {title}")
+
+    def _run(self):
+        while self.running or not self.notifications.empty():
+            try:
+                notification = self.notifications.get(timeout=1)
+            except queue.Empty:
+                notification = None
+            now = time.time()
+            if notification is not None:
+                self._handle(notification, now)
+            self._flush_windows(now)
+
+    def _handle(self, notification, now):
+        window = self.windows.get(notification.category)
+        if window is not None and now - window[0] < self.coalesce_window:
+            window[1] += 1
+            window[2] = notification
+            self.suppressed_count += 1
+            return
+        if window is not None:
+            self._send_summary(notification.category, window)
+        self.windows[notification.category] = [now, 0, notification]
+        self._dispatch(notification)
+
+    def _flush_windows(self, now, force=False):
+        for category, window in list(self.windows.items()):
+            if force or now - window[0] >= self.coalesce_window:
+                self._send_summary(category, window)
+                del self.windows[category]
+
+    def _send_summary(self, category, window):
+        start, count, last = window
+        if count <= 0:
+            return
+        minutes = max(1, int(round((time.time() - start) / 60)))
+        message = f"{count} notifikasi '{category}' lagi dalam {minutes} menit.\n\nTerakhir: {last.message}"
+        self._dispatch(Notification(last.title, message, category, count=count))
+        window[1] = 0
+
+    def _dispatch(self, notification):
+        self.sent_count += 1
+        for sink in self.sinks:
+            try:
+                sink.send(notification)
+            except Exception as e:
+                logger.error(f"Notification sink {type(sink).__name__} failed: {e}")
+
+    def get_stats(self):
+        return {
+            "queued": self.notifications.qsize(),
+            "sent": self.sent_count,
+            "suppressed": self.suppressed_count,
+            "dropped": self.dropped_count,
+        }
+
+    def close(self, timeout=5):
+        """Kirim sisa antrian dan ringkasan yang tertunda"""
+        self.running = False
+        self.thread.join(timeout)
+        self._flush_windows(time.time(), force=True)
+
+
+def create_notifier(options):
+    """Buat Notifier dari options watcher
+
+    notify_sinks: list dari "popup", "log", "webhook", "file", "none".
+    Default: popup + log di Windows, log saja di platform lain.
+    """
+    names = options.get("notify_sinks")
+    if names is None:
+        names = ["popup", "log"] if PopupSink.available() else ["log"]
+
+    sinks = []
+    for name in names:
+        if name == "popup":
+            if PopupSink.available():
+                sinks.append(PopupSink())
+            else:
+                logger.info("Popup notifications not available on this platform")
+        elif name == "log":
+            sinks.append(LogSink())
+        elif name == "webhook" and options.get("notify_webhook_url"):
+            sinks.append(WebhookSink(options["notify_webhook_url"]))
+        elif name == "file" and options.get("notify_drop_folder"):
+            sinks.append(FileDropSink(options["notify_drop_folder"]))
+        elif name == "none":
+            sinks.append(NullSink())
+        else:
+            logger.warning(f"Unknown or unconfigured notification sink: {name}")
+    return Notifier(sinks, coalesce_window=options.get("notify_coalesce_window", 300))
@@ -0,0 +1,99 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Backoff:
+    """Exponential backoff untuk polling fallback"""
+
+    def __init__(self, initial=0.2, maximum=10, factor=2.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.current = initial
+
+    def next_delay(self):
+        delay = self.current
+        self.current = min(self.current * self.factor, self.maximum)
+        return delay
+
+    def reset(self):
+        self.current = self.initial
+
+
+class _FileState:
+    def __init__(self):
+        self.closed_stat = None
+        self.last_stat = None
+        self.stable_since = None
+
+
+class ReadinessDetector:
+    """Deteksi 'file selesai ditulis' dari event close-after-write, fallback ke polling stabilitas
+
+    Event close hanya ada di platform yang mendukung (inotify IN_CLOSE_WRITE di Linux),
+    di Windows selalu memakai fallback size/mtime stabil.
+    """
+
+    def __init__(self, stable_window=3):
+        self.stable_window = stable_window  # Detik size/mtime harus tetap sama (mode polling)
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def _get_state(self, file_path):
+        with self.lock:
+            state = self.states.get(file_path)
+            if state is None:
+                state = _FileState()
+                self.states[file_path] = state
+            return state
+
+    @staticmethod
+    def _stat_key(file_path):
+        st = os.stat(file_path)
+        return (st.st_size, st.st_mtime_ns)
+
+    def notify_closed(self, file_path):
+        """Dipanggil dari on_closed (inotify IN_CLOSE_WRITE)"""
+        state = self._get_state(file_path)
+        try:
+            state.closed_stat = self._stat_key(file_path)
+        except OSError:
+            state.closed_stat = None
+
+    def is_write_finished(self, file_path):
+        """True jika file sudah selesai ditulis (close event, atau size/mtime stabil)"""
+        state = self._get_state(file_path)
+        try:
+            current = self._stat_key(file_path)
+        except OSError:
+            return False
+
+        # Close-after-write dan tidak ada perubahan sejak close -> selesai
+        if state.closed_stat is not None and state.closed_stat == current:
+            return True
+
+        # Fallback: size dan mtime tidak berubah selama stable_window
+        now = time.time()
+        if current != state.last_stat:
+            if state.last_stat is not None:
+                logger.info(f"File size change: {state.last_stat[0]} -> {current[0]}")
+            state.last_stat = current
+            state.stable_since = now
+            return False
+        return now - state.stable_since >= self.stable_window
+
+    def time_until_stable(self, file_path):
+        """Sisa detik sampai stable_window terpenuhi (None jika belum ada observasi)"""
+        state = self._get_state(file_path)
+        if state.stable_since is None:
+            return None
+        return max(0.0, self.stable_window - (time.time() - state.stable_since))
+
+    def forget(self, file_path):
+        """Hapus state file setelah selesai/gagal diproses"""
+        with self.lock:
+            self.states.pop(file_path, None)
@@ -1,8 +1,15 @@
 @echo off
 set SERVER=10.10.0.113
 set DRIVE_LETTER=Z:
+set SHARE=\\%SERVER%\Produksi TVRI
 set USERNAME=admin
 set PASSWORD=adminkepri
+set RETRY_COUNT=5
+set RETRY_DELAY=10
+set REMAP_INTERVAL=30
+
+rem Dipanggil ulang oleh start di bawah: loop latar belakang yang memetakan ulang Z:
+if "%~1"==":REMAP" goto REMAP
 
 echo === Network Drive Connection ===
 
@@ -10,30 +17,47 @@ echo [1/4] Cleaning up any existing connections...
 net use %DRIVE_LETTER% /delete /y >nul 2>&1
 net use \\%SERVER% /delete /y >nul 2>&1
 
-echo [2/4] Testing connectivity to %SERVER%...
+echo Username: %USERNAME%
+echo Password: %PASSWORD%
+set ATTEMPT=0
+
+:CONNECT
+set /a ATTEMPT+=1
+echo [2/4] Testing connectivity to %SERVER% (attempt %ATTEMPT%/%RETRY_COUNT%)...
 ping -n 1 %SERVER% >nul
 if %errorlevel% neq 0 (
-    echo ERROR: Cannot ping %SERVER%
-    pause
-    exit /b 1
+    echo WARNING: Cannot ping %SERVER%
+    goto CONNECT_FAILED
 )
 
-echo Username: %USERNAME%
-echo Password: %PASSWORD%
 echo [3/4]Connecting with credentials...
-net use %DRIVE_LETTER% "\\%SERVER%\Produksi TVRI" "%PASSWORD%" /user:"%USERNAME%" /persistent:no
-
+net use %DRIVE_LETTER% "%SHARE%" "%PASSWORD%" /user:"%USERNAME%" /persistent:no
 if %errorlevel% == 0 (
     echo Successfully connected to %DRIVE_LETTER% with credentials
     goto RUNSCRIPT
-) else (
-    echo Failed to connect. Error code: %errorlevel%
-    pause
-    exit /b 1
 )
+echo WARNING: Failed to connect. Error code: %errorlevel%
+
+:CONNECT_FAILED
+if %ATTEMPT% geq %RETRY_COUNT% (
+    echo WARNING: %DRIVE_LETTER% belum terhubung - file akan ditampung di spool lokal, koneksi dicoba ulang tiap %REMAP_INTERVAL% detik
+    goto RUNSCRIPT
+)
+timeout /t %RETRY_DELAY% /nobreak >nul
+goto CONNECT
 
 :RUNSCRIPT
+rem Share bisa putus saat watcher jalan: petakan ulang Z: di latar belakang supaya spool bisa di-drain
+start "File Watcher remap" /min cmd /c ""%~f0" :REMAP"
 echo [4/4] Running Python script...
 cd /d "C:\CPNS\app\File Watcher py"
 pythonw PCRecord.py
- 
\ No newline at end of file
+taskkill /fi "WINDOWTITLE eq File Watcher remap*" /t /f >nul 2>&1
+goto :EOF
+
+:REMAP
+timeout /t %REMAP_INTERVAL% /nobreak >nul
+if exist %DRIVE_LETTER%\ goto REMAP
+net use %DRIVE_LETTER% /delete /y >nul 2>&1
+net use %DRIVE_LETTER% "%SHARE%" "%PASSWORD%" /user:"%USERNAME%" /persistent:no >nul 2>&1
+goto REMAP
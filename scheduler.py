@@ -0,0 +1,161 @@
+import time
+import heapq
+import random
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Satu thread + heap untuk semua pengecekan tertunda (retry file kecil, tunggu lock, cek stabilitas)
+
+    Satu entry per key (path): schedule ulang menggantikan jadwal lama, cancel membuang jadwal.
+    max_in_flight membatasi jumlah key yang sudah dijalankan tapi belum selesai (done),
+    sisanya ditahan di heap sampai ada slot kosong. group_func(key) + group_limits memberi
+    batas in-flight per grup (fair share per watch folder): grup yang penuh dilewati dan
+    jadwal grup lain tetap jalan.
+    """
+
+    def __init__(self, jitter=0.1, max_in_flight=None, group_func=None, group_limits=None):
+        self.jitter = jitter
+        self.max_in_flight = max_in_flight
+        self.group_func = group_func
+        self.group_limits = group_limits or {}
+        self.heap = []       # (due, seq, key)
+        self.entries = {}    # key -> (due, seq, callback, args)
+        self.in_flight = {}  # key -> grup
+        self.group_counts = {}
+        self.seq = 0
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.fired_count = 0
+        self.deferred_count = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def schedule(self, key, delay, callback, *args):
+        """Jalankan callback(*args) setelah delay detik (dengan jitter), ganti jadwal lama untuk key"""
+        if self.jitter and delay > 0:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        with self.condition:
+            self.seq += 1
+            due = time.monotonic() + delay
+            self.entries[key] = (due, self.seq, callback, args)
+            heapq.heappush(self.heap, (due, self.seq, key))
+            self.condition.notify()
+
+    def reschedule(self, key, delay=0):
+        """Majukan jadwal key yang sudah ada (misal ada event close-after-write), False jika tidak ada"""
+        with self.condition:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False
+            due = time.monotonic() + delay
+            if due >= entry[0]:
+                return True
+            self.seq += 1
+            self.entries[key] = (due, self.seq, entry[2], entry[3])
+            heapq.heappush(self.heap, (due, self.seq, key))
+            self.condition.notify()
+            return True
+
+    def cancel(self, key):
+        """Buang jadwal key, True jika tadinya ada"""
+        with self.condition:
+            return self.entries.pop(key, None) is not None
+
+    def is_scheduled(self, key):
+        with self.condition:
+            return key in self.entries
+
+    def done(self, key):
+        """Tandai pengecekan key selesai, membebaskan slot in-flight"""
+        with self.condition:
+            if key in self.in_flight:
+                group = self.in_flight.pop(key)
+                self.group_counts[group] -= 1
+                self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if not self.running:
+                    return
+                due_entry, next_due = self._pop_due()
+                if due_entry is None:
+                    # next_due None = menunggu slot in-flight kosong (done) atau jadwal baru
+                    timeout = max(0, next_due - time.monotonic()) if next_due is not None else None
+                    self.condition.wait(timeout)
+                    continue
+                key, group, callback, args = due_entry
+                if self.max_in_flight or self.group_limits:
+                    self.in_flight[key] = group
+                    self.group_counts[group] = self.group_counts.get(group, 0) + 1
+                self.fired_count += 1
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Scheduled callback failed for {key}: {e}")
+                self.done(key)
+
+    def _at_capacity(self):
+        return bool(self.max_in_flight) and len(self.in_flight) >= self.max_in_flight
+
+    def _group_full(self, group):
+        limit = self.group_limits.get(group)
+        return bool(limit) and self.group_counts.get(group, 0) >= limit
+
+    def _pop_due(self):
+        """((key, grup, callback, args) yang jatuh tempo dan boleh jalan, waktu jatuh tempo berikutnya)"""
+        now = time.monotonic()
+        skipped = []
+        result = next_due = None
+        while self.heap:
+            due, seq, key = self.heap[0]
+            entry = self.entries.get(key)
+            if entry is None or entry[1] != seq:
+                heapq.heappop(self.heap)  # Jadwal yang sudah diganti/dibatalkan
+                continue
+            if due > now:
+                next_due = due
+                break
+            if self._at_capacity():
+                self.deferred_count += 1
+                break
+            group = self.group_func(key) if self.group_func is not None else None
+            if self._group_full(group):
+                skipped.append(heapq.heappop(self.heap))
+                continue
+            heapq.heappop(self.heap)
+            del self.entries[key]
+            result = (key, group, entry[2], entry[3])
+            break
+        if skipped:
+            self.deferred_count += 1
+            for item in skipped:
+                heapq.heappush(self.heap, item)
+        return result, next_due
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                "scheduled": len(self.entries),
+                "in_flight": len(self.in_flight),
+                "in_flight_by_group": {group: count for group, count in self.group_counts.items() if count},
+                "fired": self.fired_count,
+                "deferred": self.deferred_count,
+            }
@@ -0,0 +1,314 @@
+import os
+import sys
+import time
+import logging
+import threading
+
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+from watchdog.observers import Observer
+
+from readiness import Backoff
+
+logger = logging.getLogger(__name__)
+
+NETWORK_FILESYSTEMS = ("cifs", "smb3", "smbfs", "nfs", "nfs4", "fuse.sshfs", "9p")
+
+
+def is_network_path(path):
+    """Cek apakah folder ada di share jaringan (UNC/mapped drive di Windows, cifs/nfs di Linux)"""
+    path = os.path.abspath(path)
+    if sys.platform == "win32":
+        if path.startswith("\\\\"):
+            return True
+        try:
+            import ctypes
+            DRIVE_REMOTE = 4
+            return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(path)[0] + "\\") == DRIVE_REMOTE
+        except Exception:
+            return False
+    try:
+        best_mount, best_type = "", ""
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and (path == parts[1] or path.startswith(parts[1].rstrip("/") + "/")):
+                    if len(parts[1]) > len(best_mount):
+                        best_mount, best_type = parts[1], parts[2]
+        return best_type in NETWORK_FILESYSTEMS
+    except OSError:
+        return False
+
+
+class _Watch:
+    """State snapshot satu folder"""
+
+    def __init__(self, handler, path, recursive=False):
+        self.handler = handler
+        self.path = path
+        self.recursive = recursive
+        self.children = {}     # nama subfolder -> _Watch (hanya jika recursive)
+        self.removed = False
+        self.entries = {}      # name -> (file_id, size, mtime_ns)
+        self.dir_mtime = None
+        self.hot = {}          # name -> waktu perubahan terakhir (di-stat setiap poll)
+        self.last_full_scan = 0.0
+
+
+class SnapshotPollingObserver:
+    """Observer polling berbasis os.scandir untuk folder di share SMB/NFS
+
+    Setiap poll hanya stat folder (1 round-trip). Listing ulang hanya jika mtime folder
+    berubah (file dibuat/dihapus/rename), dan hanya nama baru yang di-stat. File yang
+    masih aktif ditulis ("hot") di-stat setiap poll untuk event modified; file lain
+    dicek ulang penuh setiap full_scan_interval. Interval poll adaptif: cepat saat ada
+    aktivitas, melambat sampai max_interval saat folder diam.
+
+    API sama dengan watchdog Observer (schedule/start/stop/join), event dikirim lewat
+    handler.dispatch() sehingga handler watchdog biasa bisa dipakai. Folder recursive:
+    setiap subfolder punya snapshot sendiri, ditambah/dibuang saat listing induknya berubah.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=10, hot_timeout=30, full_scan_interval=300):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.hot_timeout = hot_timeout
+        self.full_scan_interval = full_scan_interval
+        self.watches = []
+        self.backoff = Backoff(initial=min_interval, maximum=max_interval, factor=1.5)
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stats = {"polls": 0, "listings": 0, "stat_calls": 0, "events": 0}
+
+    def schedule(self, handler, path, recursive=False):
+        """Tambah folder yang dipantau, recursive -> subfolder ikut dipantau"""
+        watch = _Watch(handler, os.path.abspath(path), recursive)
+        with self.lock:
+            self.watches.append(watch)
+        self._listing(watch, emit=False)
+        with self.lock:
+            folders = [w for w in self.watches if w is watch or w.path.startswith(watch.path.rstrip(os.sep) + os.sep)]
+        logger.info(f"Snapshot polling observer watching {watch.path} "
+                    f"({sum(len(w.entries) for w in folders)} entries in {len(folders)} folders)")
+        return watch
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="snapshot-observer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            changed = self.poll()
+            if changed:
+                self.backoff.reset()
+            self.stop_event.wait(self.backoff.next_delay())
+
+    def poll(self):
+        """Satu putaran poll semua folder, return jumlah event"""
+        with self.lock:
+            watches = list(self.watches)
+        count = 0
+        for watch in watches:
+            if watch.removed:
+                continue
+            try:
+                count += self._poll_watch(watch)
+            except OSError as e:
+                # Share putus sementara - snapshot dipertahankan, coba lagi di poll berikutnya
+                logger.warning(f"Snapshot poll failed for {watch.path}: {e}")
+        self.stats["polls"] += 1
+        self.stats["events"] += count
+        return count
+
+    def _poll_watch(self, watch):
+        now = time.time()
+        self.stats["stat_calls"] += 1
+        dir_mtime = os.stat(watch.path).st_mtime_ns
+        full_scan = now - watch.last_full_scan >= self.full_scan_interval
+        count = 0
+        if full_scan or dir_mtime != watch.dir_mtime:
+            count += self._listing(watch, emit=True, restat_all=full_scan)
+        count += self._poll_hot(watch, now)
+        return count
+
+    def _stat_key(self, entry):
+        """(file_id, size, mtime_ns) - di Windows size/mtime sudah ada dari hasil scandir"""
+        self.stats["stat_calls"] += 1
+        st = entry.stat(follow_symlinks=False)
+        return (entry.inode() or None, st.st_size, st.st_mtime_ns)
+
+    def _listing(self, watch, emit, restat_all=False):
+        """scandir folder, diff nama terhadap snapshot lama; stat hanya untuk nama baru"""
+        self.stats["listings"] += 1
+        dir_mtime = os.stat(watch.path).st_mtime_ns
+        current = {}
+        subdirs = set()
+        with os.scandir(watch.path) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        current[entry.name] = entry
+                    elif watch.recursive and entry.is_dir(follow_symlinks=False):
+                        subdirs.add(entry.name)
+                except OSError:
+                    continue
+        watch.dir_mtime = dir_mtime
+        if restat_all:
+            watch.last_full_scan = time.time()
+        if not emit:
+            watch.entries = {name: self._stat_key(entry) for name, entry in current.items()}
+            watch.last_full_scan = time.time()
+            self._sync_children(watch, subdirs, emit=False)
+            return 0
+
+        old_names = set(watch.entries)
+        new_names = set(current)
+        created = {}
+        for name in new_names - old_names:
+            try:
+                created[name] = self._stat_key(current[name])
+            except OSError:
+                continue
+        deleted = {name: watch.entries.pop(name) for name in old_names - new_names}
+
+        count = 0
+        # Rename di folder yang sama: file_id sama, nama beda
+        deleted_by_id = {key[0]: name for name, key in deleted.items() if key[0]}
+        for name, key in list(created.items()):
+            old_name = deleted_by_id.pop(key[0], None) if key[0] else None
+            if old_name is not None:
+                del deleted[old_name]
+                del created[name]
+                watch.entries[name] = key
+                watch.hot[name] = time.time()
+                watch.hot.pop(old_name, None)
+                self._emit(watch, FileMovedEvent(os.path.join(watch.path, old_name), os.path.join(watch.path, name)))
+                count += 1
+
+        for name in deleted:
+            watch.hot.pop(name, None)
+            self._emit(watch, FileDeletedEvent(os.path.join(watch.path, name)))
+            count += 1
+        for name, key in created.items():
+            watch.entries[name] = key
+            watch.hot[name] = time.time()
+            self._emit(watch, FileCreatedEvent(os.path.join(watch.path, name)))
+            count += 1
+
+        if restat_all:
+            for name in new_names & old_names:
+                if name in watch.hot or name not in watch.entries:
+                    continue
+                count += self._check_modified(watch, name, current[name])
+        if watch.recursive:
+            count += self._sync_children(watch, subdirs, emit=True)
+        return count
+
+    def _sync_children(self, watch, subdirs, emit):
+        """Samakan snapshot subfolder dengan listing: subfolder baru dipantau (isinya jadi event created)"""
+        count = 0
+        for name in set(watch.children) - subdirs:
+            count += self._remove_watch(watch.children.pop(name))
+        for name in sorted(subdirs - set(watch.children)):
+            child = _Watch(watch.handler, os.path.join(watch.path, name), recursive=True)
+            try:
+                count += self._listing(child, emit=emit)
+            except OSError as e:
+                logger.warning(f"Snapshot listing failed for {child.path}: {e}")
+                continue
+            watch.children[name] = child
+            with self.lock:
+                self.watches.append(child)
+        return count
+
+    def _remove_watch(self, watch):
+        """Subfolder hilang - event deleted untuk isinya, snapshot dibuang (termasuk turunannya)"""
+        count = 0
+        for child in watch.children.values():
+            count += self._remove_watch(child)
+        watch.children = {}
+        for name in watch.entries:
+            self._emit(watch, FileDeletedEvent(os.path.join(watch.path, name)))
+            count += 1
+        watch.removed = True
+        with self.lock:
+            if watch in self.watches:
+                self.watches.remove(watch)
+        return count
+
+    def _poll_hot(self, watch, now):
+        """Stat ulang file yang baru berubah, event modified jika size/mtime berubah"""
+        count = 0
+        for name, changed_at in list(watch.hot.items()):
+            path = os.path.join(watch.path, name)
+            try:
+                self.stats["stat_calls"] += 1
+                st = os.stat(path)
+            except OSError:
+                # Hilang - listing berikutnya (mtime folder berubah) yang mengirim event deleted
+                watch.hot.pop(name, None)
+                continue
+            old = watch.entries.get(name)
+            if old is not None and (st.st_size, st.st_mtime_ns) != old[1:]:
+                watch.entries[name] = (old[0], st.st_size, st.st_mtime_ns)
+                watch.hot[name] = now
+                self._emit(watch, FileModifiedEvent(path))
+                count += 1
+            elif now - changed_at >= self.hot_timeout:
+                del watch.hot[name]
+        return count
+
+    def _check_modified(self, watch, name, entry):
+        try:
+            key = self._stat_key(entry)
+        except OSError:
+            return 0
+        old = watch.entries.get(name)
+        if old is not None and key[1:] != old[1:]:
+            watch.entries[name] = key
+            watch.hot[name] = time.time()
+            self._emit(watch, FileModifiedEvent(os.path.join(watch.path, name)))
+            return 1
+        return 0
+
+    def _emit(self, watch, event):
+        try:
+            watch.handler.dispatch(event)
+        except Exception as e:
+            logger.error(f"Error dispatching {event.event_type} for {event.src_path}: {e}")
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["interval"] = round(self.backoff.current, 2)
+        with self.lock:
+            stats["entries"] = sum(len(watch.entries) for watch in self.watches)
+            stats["hot"] = sum(len(watch.hot) for watch in self.watches)
+        return stats
+
+
+def create_observer(watch_folder, mode="auto", **kwargs):
+    """Observer untuk watch folder: "native" (watchdog), "polling" (scandir snapshot) atau "auto"
+
+    watch_folder boleh satu path atau list path (satu observer untuk semua folder).
+    "auto" memakai polling jika ada folder di share jaringan, di mana event native tidak bisa diandalkan.
+    """
+    paths = [watch_folder] if isinstance(watch_folder, str) else list(watch_folder)
+    if mode == "auto":
+        mode = "polling" if any(is_network_path(path) for path in paths) else "native"
+    if mode == "polling":
+        logger.info(f"Using snapshot polling observer for {', '.join(paths)}")
+        return SnapshotPollingObserver(**kwargs)
+    if mode != "native":
+        raise ValueError(f"Unknown observer mode: {mode}")
+    return Observer()
@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+
+import copy_engine
+
+logger = logging.getLogger(__name__)
+
+ENTRY_FILE_NAME = "entry.json"
+
+
+class SpoolEntry:
+    """Satu file di spool: <spool_dir>/<id>/<nama file> + entry.json (tujuan final, tanggal arsip)"""
+
+    def __init__(self, spool_dir, entry_id, meta):
+        self.entry_id = entry_id
+        self.dir = os.path.join(spool_dir, entry_id)
+        self.meta = meta
+        self.path = os.path.join(self.dir, meta["file_name"])
+        self.failures = 0
+        self.not_before = 0  # Drain gagal -> jangan dicoba lagi sebelum waktu ini (monotonic)
+
+    @property
+    def size(self):
+        return self.meta.get("size") or 0
+
+    def save(self):
+        tmp_path = os.path.join(self.dir, ENTRY_FILE_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.dir, ENTRY_FILE_NAME))
+
+
+class Spool:
+    """Spool lokal terbatas untuk file terverifikasi saat share tujuan lambat/offline
+
+    put() memindahkan file ke spool (rename jika satu device, copy + verifikasi jika tidak).
+    Worker drain (drain_workers thread) menyalurkan isi spool ke tujuan lewat drain_func
+    untuk entry yang can_drain(entry) True (tujuannya sehat), urut dari yang paling lama.
+    Spool dibatasi max_bytes dan menyisakan min_free_bytes di disk supaya perekaman live
+    tidak kehabisan ruang.
+    """
+
+    def __init__(self, spool_dir, max_bytes=100 * 1024 ** 3, min_free_bytes=20 * 1024 ** 3, drain_workers=2,
+                 chunk_size=copy_engine.DEFAULT_CHUNK_SIZE, governor=None):
+        self.spool_dir = os.path.abspath(spool_dir)
+        self.max_bytes = max_bytes
+        self.min_free_bytes = min_free_bytes
+        self.drain_workers = max(1, int(drain_workers))
+        self.chunk_size = chunk_size
+        self.governor = governor
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+        self.condition = threading.Condition()
+        self.entries = {}      # entry_id -> SpoolEntry (belum tersalurkan)
+        self.draining = set()  # entry_id yang sedang disalurkan
+        self.used_bytes = 0
+        self.seq = 0
+        self.wake_seq = 0  # Naik setiap put()/wake(), supaya notify di antara cek dan wait tidak hilang
+        self.running = False
+        self.workers = []
+        self.drain_func = None
+        self.can_drain = None
+        self.spooled_count = 0
+        self.drained_count = 0
+        self.drained_bytes = 0
+        self.drain_failures = 0
+        self.rejected_count = 0
+        self.drain_window_start = time.monotonic()
+        self.drain_window_bytes = 0
+        self.drain_rate_mbps = 0.0
+        self.load()
+
+    def load(self):
+        """Baca entry dari run sebelumnya, buang staging yang tidak lengkap"""
+        for name in sorted(os.listdir(self.spool_dir)):
+            entry_dir = os.path.join(self.spool_dir, name)
+            if not os.path.isdir(entry_dir):
+                continue
+            try:
+                with open(os.path.join(entry_dir, ENTRY_FILE_NAME), "r", encoding="utf-8") as f:
+                    entry = SpoolEntry(self.spool_dir, name, json.load(f))
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None and os.path.exists(entry.path) and os.path.getsize(entry.path) == entry.size:
+                self.entries[name] = entry
+                self.used_bytes += entry.size
+            else:
+                # Staging terputus sebelum selesai - source masih ada di watch folder
+                logger.warning(f"Removing incomplete spool entry: {entry_dir}")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+        if self.entries:
+            logger.info(f"Spool loaded: {len(self.entries)} files, {self.used_bytes / 1024 ** 3:.2f} GB waiting")
+
+    def has_room(self, size, same_device=False):
+        """Cek batas spool dan sisa ruang disk (rename di device yang sama tidak memakai ruang baru)"""
+        with self.condition:
+            if self.used_bytes + size > self.max_bytes:
+                return False
+        if same_device:
+            return True
+        try:
+            return shutil.disk_usage(self.spool_dir).free - size >= self.min_free_bytes
+        except OSError:
+            return False
+
+    def is_same_device(self, file_path):
+        try:
+            return os.stat(file_path).st_dev == os.stat(self.spool_dir).st_dev
+        except OSError:
+            return False
+
+    def put(self, file_path, meta, on_staged=None):
+        """Pindahkan file ke spool, return SpoolEntry atau None (spool penuh / gagal)
+
+        meta minimal berisi file_name; size, source_path dan spooled_at diisi otomatis.
+        on_staged(entry) dipanggil setelah file aman di spool, sebelum entry terlihat worker drain;
+        jika on_staged return False entry dibuang lagi dan put() return False.
+        """
+        size = os.path.getsize(file_path)
+        same_device = self.is_same_device(file_path)
+        if not self.has_room(size, same_device):
+            with self.condition:
+                self.rejected_count += 1
+            logger.error(f"SPOOL FULL: {self.used_bytes / 1024 ** 3:.2f} GB used, "
+                         f"cannot stage {os.path.basename(file_path)}")
+            return None
+
+        with self.condition:
+            self.seq += 1
+            entry_id = f"{int(time.time() * 1000):015d}_{self.seq:06d}"
+        meta = dict(meta, size=size, source_path=file_path, spooled_at=time.time())
+        entry = SpoolEntry(self.spool_dir, entry_id, meta)
+        try:
+            os.makedirs(entry.dir)
+            # entry.json dulu - saat load, entry hanya valid jika file dengan size yang sama sudah ada
+            entry.save()
+            if same_device:
+                os.replace(file_path, entry.path)
+            else:
+                partial_path = copy_engine.partial_path_for(entry.path)
+                result = copy_engine.copy_file(file_path, partial_path, chunk_size=self.chunk_size,
+                                               governor=self.governor)
+                if not copy_engine.verify_copy(result, partial_path, self.chunk_size):
+                    raise IOError("spool copy verify failed")
+                copy_engine.publish(partial_path, entry.path)
+                # mtime sama dengan source (seperti rename) - journal copy ke tujuan tetap cocok
+                st = os.stat(file_path)
+                os.utime(entry.path, ns=(st.st_atime_ns, st.st_mtime_ns))
+                meta["checksum"] = result.checksum
+                meta["algorithm"] = result.algorithm
+                entry.save()
+        except Exception as e:
+            logger.error(f"SPOOL FAILED for {os.path.basename(file_path)}: {e}")
+            self._unstage(entry, file_path, same_device)
+            return None
+
+        if on_staged is not None and on_staged(entry) is False:
+            logger.warning(f"SPOOL CANCELLED: {os.path.basename(file_path)}")
+            self._unstage(entry, file_path, same_device)
+            return False
+        with self.condition:
+            self.entries[entry_id] = entry
+            self.used_bytes += size
+            self.spooled_count += 1
+            self.wake_seq += 1
+            self.condition.notify_all()
+        return entry
+
+    def _unstage(self, entry, file_path, same_device):
+        """Buang entry yang belum terlihat worker drain (file hasil rename dikembalikan ke asal)"""
+        try:
+            if same_device and os.path.exists(entry.path) and not os.path.exists(file_path):
+                os.replace(entry.path, file_path)
+        except OSError as e:
+            logger.error(f"Could not restore {file_path} from spool: {e}")
+            return
+        shutil.rmtree(entry.dir, ignore_errors=True)
+
+    def start(self, drain_func, can_drain):
+        """Start worker drain: drain_func(entry) -> True jika sudah tersalurkan ke tujuan,
+        can_drain(entry) -> False jika tujuan entry sedang tidak sehat (entry dilewati)"""
+        if self.running:
+            return
+        self.drain_func = drain_func
+        self.can_drain = can_drain
+        self.running = True
+        for i in range(self.drain_workers):
+            worker = threading.Thread(target=self._drain_loop, name=f"spool-drain-{i + 1}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self, timeout=5):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.join(timeout)
+        self.workers = []
+
+    def wake(self):
+        """Bangunkan worker drain (misal circuit breaker kembali closed)"""
+        with self.condition:
+            self.wake_seq += 1
+            self.condition.notify_all()
+
+    def _next_entry(self):
+        while True:
+            with self.condition:
+                if not self.running:
+                    return None
+                timeout = 5  # Jaring pengaman jika tidak ada notify
+                now = time.monotonic()
+                seq = self.wake_seq
+                candidates = []
+                for entry_id in sorted(self.entries):
+                    entry = self.entries[entry_id]
+                    if entry_id in self.draining:
+                        continue
+                    if entry.not_before > now:
+                        timeout = min(timeout, entry.not_before - now)
+                        continue
+                    candidates.append(entry)
+            # can_drain mengambil lock circuit breaker, yang listener-nya memanggil wake() -
+            # dicek tanpa memegang condition supaya urutan lock tidak pernah terbalik
+            for entry in candidates:
+                if not self.can_drain(entry):
+                    continue
+                with self.condition:
+                    if entry.entry_id in self.entries and entry.entry_id not in self.draining:
+                        self.draining.add(entry.entry_id)
+                        return entry
+            with self.condition:
+                # Tunggu entry baru / tujuan pulih (kecuali sudah ada wake sejak snapshot)
+                if self.running and self.wake_seq == seq:
+                    self.condition.wait(timeout)
+
+    def _drain_loop(self):
+        while True:
+            entry = self._next_entry()
+            if entry is None:
+                return
+            try:
+                drained = self.drain_func(entry)
+            except Exception as e:
+                logger.error(f"Spool drain error for {entry.meta['file_name']}: {e}")
+                drained = False
+            with self.condition:
+                self.draining.discard(entry.entry_id)
+                if not drained:
+                    self.drain_failures += 1
+                    entry.failures += 1
+                    entry.not_before = time.monotonic() + min(300, 5 * 2 ** (entry.failures - 1))
+                    continue
+                self.entries.pop(entry.entry_id, None)
+                self.used_bytes -= entry.size
+                self.drained_count += 1
+                self.drained_bytes += entry.size
+                self.drain_window_bytes += entry.size
+            shutil.rmtree(entry.dir, ignore_errors=True)
+            logger.info(f"SPOOL DRAINED: {entry.meta['file_name']} ({self.get_stats()['files']} left)")
+
+    def get_stats(self):
+        with self.condition:
+            now = time.monotonic()
+            elapsed = now - self.drain_window_start
+            if elapsed >= 10:
+                self.drain_rate_mbps = self.drain_window_bytes / (1024 * 1024) / elapsed
+                self.drain_window_start = now
+                self.drain_window_bytes = 0
+            return {
+                "files": len(self.entries),
+                "bytes": self.used_bytes,
+                "max_bytes": self.max_bytes,
+                "draining": len(self.draining),
+                "spooled": self.spooled_count,
+                "drained": self.drained_count,
+                "drained_bytes": self.drained_bytes,
+                "drain_failures": self.drain_failures,
+                "rejected": self.rejected_count,
+                "drain_rate_mbps": round(self.drain_rate_mbps, 1),
+            }
@@ -0,0 +1,167 @@
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+import logging.handlers
+from datetime import datetime
+
+# Atribut bawaan LogRecord, tidak ikut ditulis sebagai field
+_RESERVED = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+def log_fields(stage, **fields):
+    """Field terstruktur untuk parameter `extra` logger, misal:
+
+    logger.info("COPY DONE", extra=log_fields("copy", file=name, bytes=n, duration=t))
+    """
+    return {"stage": stage, "fields": {key: value for key, value in fields.items() if value is not None}}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Satu record = satu baris JSON (ts, level, stage, msg + field terstruktur)"""
+
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "stage": getattr(record, "stage", None),
+            "msg": record.getMessage(),
+        }
+        data.update(getattr(record, "fields", None) or {})
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and key not in ("stage", "fields") and key not in data:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class StageFilter(logging.Filter):
+    """Atur volume log per stage: level minimum dan batas record per detik
+
+    stage_levels: {"wait": "WARNING", "copy": "INFO"}
+    stage_rates:  {"wait": 5} -> maksimal 5 record/detik untuk stage wait
+    """
+
+    def __init__(self, stage_levels=None, stage_rates=None):
+        super().__init__()
+        self.stage_levels = {stage: level if isinstance(level, int) else logging.getLevelName(level.upper())
+                             for stage, level in (stage_levels or {}).items()}
+        self.stage_rates = dict(stage_rates or {})
+        self.buckets = {}  # stage -> [tokens, last_refill]
+        self.dropped = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        stage = getattr(record, "stage", None)
+        if stage is None:
+            return True
+        if record.levelno < self.stage_levels.get(stage, logging.NOTSET):
+            return False
+        rate = self.stage_rates.get(stage)
+        if not rate or record.levelno >= logging.WARNING:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            tokens, last = self.buckets.get(stage, (rate, now))
+            tokens = min(rate, tokens + (now - last) * rate)
+            if tokens < 1:
+                self.buckets[stage] = (tokens, now)
+                self.dropped[stage] = self.dropped.get(stage, 0) + 1
+                return False
+            self.buckets[stage] = (tokens - 1, now)
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler yang membuang record saat antrian penuh (tidak pernah memblok)"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingService:
+    """QueueHandler di thread pemanggil, semua I/O file/console di thread QueueListener"""
+
+    def __init__(self, listener, queue_handler, stage_filter):
+        self.listener = listener
+        self.queue_handler = queue_handler
+        self.stage_filter = stage_filter
+
+    def get_stats(self):
+        return {
+            "queued": self.queue_handler.queue.qsize(),
+            "dropped_queue_full": self.queue_handler.dropped,
+            "dropped_by_stage": dict(self.stage_filter.dropped),
+        }
+
+    def stop(self):
+        self.listener.stop()
+        logging.getLogger().removeHandler(self.queue_handler)
+
+
+def logging_settings(options):
+    """Argumen setup_logging dari options watcher (misal blok "options" watcher_config.json)
+
+    {"log_stage_levels": {"wait": "WARNING"}, "log_stage_rates": {"wait": 5}, "log_rotate_when": "midnight"}
+    """
+    settings = {}
+    for option, argument in (("log_level", "level"), ("log_json_lines", "json_lines"), ("log_max_bytes", "max_bytes"),
+                             ("log_backup_count", "backup_count"), ("log_rotate_when", "rotate_when"),
+                             ("log_stage_levels", "stage_levels"), ("log_stage_rates", "stage_rates"),
+                             ("log_queue_size", "queue_size")):
+        if options.get(option) is not None:
+            settings[argument] = options[option]
+    if isinstance(settings.get("level"), str):
+        settings["level"] = logging.getLevelName(settings["level"].upper())
+    return settings
+
+
+def setup_logging(log_path="file_watcher.log", level=logging.INFO, console=True, json_lines=True,
+                  max_bytes=10 * 1024 * 1024, backup_count=10, rotate_when=None,
+                  stage_levels=None, stage_rates=None, queue_size=10000):
+    """Konfigurasi logging async: QueueHandler -> QueueListener (file rotating + console)
+
+    rotate_when diisi (misal "midnight") untuk rotasi berdasarkan waktu, selain itu berdasarkan ukuran.
+    """
+    if rotate_when:
+        file_handler = logging.handlers.TimedRotatingFileHandler(log_path, when=rotate_when,
+                                                                 backupCount=backup_count, encoding="utf-8")
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=max_bytes,
+                                                            backupCount=backup_count, encoding="utf-8")
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else
+                              logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    handlers = [file_handler]
+
+    # Di pythonw tidak ada console (sys.stderr None)
+    if console and sys.stderr is not None:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(stream_handler)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    stage_filter = StageFilter(stage_levels, stage_rates)
+    queue_handler.addFilter(stage_filter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return LoggingService(listener, queue_handler, stage_filter)
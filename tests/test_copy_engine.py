@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+import copy_engine
+
+RANGE_SIZE = 256 * 1024
+
+
+class InterruptingGovernor:
+    """Governor palsu: copy terputus (share putus) setelah max_bytes ditulis"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.written = 0
+
+    def acquire_read(self, n):
+        return 0.0
+
+    def observe_read(self, seconds, n):
+        pass
+
+    def acquire_write(self, n):
+        self.written += n
+        if self.written > self.max_bytes:
+            raise OSError("network name no longer available")
+        return 0.0
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "KL_KHI_source.mp4"
+    path.write_bytes(os.urandom(5 * RANGE_SIZE + 12345))
+    return str(path)
+
+
+def copy_with_journal(src, dst, governor=None):
+    partial = copy_engine.partial_path_for(dst)
+    return copy_engine.copy_file(src, partial, chunk_size=64 * 1024, range_size=RANGE_SIZE,
+                                 journal_path=copy_engine.journal_path_for(dst), governor=governor), partial
+
+
+def test_interrupted_copy_resumes_from_journal(source, tmp_path):
+    dst = str(tmp_path / "out" / "BANJIR.mp4")
+    os.makedirs(os.path.dirname(dst))
+    with pytest.raises(OSError):
+        copy_with_journal(source, dst, InterruptingGovernor(3 * RANGE_SIZE + 1000))
+
+    result, partial = copy_with_journal(source, dst)
+
+    assert result.resumed_bytes == 3 * RANGE_SIZE
+    assert result.checksum == copy_engine.hash_file(source)
+    assert copy_engine.verify_copy(result, partial, 64 * 1024)
+
+
+def test_journal_ignored_when_source_changes(source, tmp_path):
+    dst = str(tmp_path / "BANJIR.mp4")
+    with pytest.raises(OSError):
+        copy_with_journal(source, dst, InterruptingGovernor(2 * RANGE_SIZE + 1000))
+    with open(source, "r+b") as f:
+        f.write(b"rewritten")
+
+    result, partial = copy_with_journal(source, dst)
+
+    assert result.resumed_bytes == 0
+    assert result.checksum == copy_engine.hash_file(source)
+
+
+def test_parallel_verify_detects_corrupt_range(source, tmp_path):
+    dst = str(tmp_path / "BANJIR.mp4")
+    result = copy_engine.copy_file_parallel(source, dst, streams=3, range_size=RANGE_SIZE, chunk_size=64 * 1024)
+    assert copy_engine.verify_copy(result, dst, 64 * 1024)
+
+    with open(dst, "r+b") as f:
+        f.seek(2 * RANGE_SIZE + 10)
+        f.write(b"\xff" * 16)
+    assert not copy_engine.verify_copy(result, dst, 64 * 1024)
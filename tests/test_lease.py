@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+
+import pytest
+
+from lease import LeaseManager
+
+
+@pytest.fixture
+def nodes(tmp_path):
+    lease_dir = str(tmp_path / "leases")
+    return (LeaseManager(lease_dir, node_id="ingest-1", ttl=1, clock_skew=0),
+            LeaseManager(lease_dir, node_id="ingest-2", ttl=1, clock_skew=0))
+
+
+def test_only_one_node_acquires(nodes):
+    first, second = nodes
+    assert first.acquire("studio/KL_KHI_a.mp4")
+    assert first.acquire("studio/KL_KHI_a.mp4")  # Lease milik sendiri
+    assert not second.acquire("studio/KL_KHI_a.mp4")
+    assert second.get_stats()["denied"] == 1
+
+    first.release("studio/KL_KHI_a.mp4")
+    assert second.acquire("studio/KL_KHI_a.mp4")
+
+
+def test_renew_keeps_lease_past_ttl(nodes):
+    first, second = nodes
+    assert first.acquire("studio/KL_KHI_a.mp4")
+    for _ in range(3):
+        time.sleep(0.5)
+        first.renew_all()
+        assert not second.acquire("studio/KL_KHI_a.mp4")
+    assert first.is_held("studio/KL_KHI_a.mp4")
+
+
+def test_takeover_of_expired_lease(nodes):
+    first, second = nodes
+    assert first.acquire("studio/KL_KHI_a.mp4")
+    time.sleep(1.2)
+
+    assert second.acquire("studio/KL_KHI_a.mp4")
+    assert second.get_stats()["takeovers"] == 1
+    first.renew_all()
+    assert not first.is_held("studio/KL_KHI_a.mp4")
+    assert first.get_stats()["lost"] == 1
+
+
+def test_takeover_backs_off_when_lease_was_renewed(nodes):
+    first, second = nodes
+    assert first.acquire("studio/KL_KHI_a.mp4")
+    path = first.lease_path("studio/KL_KHI_a.mp4")
+    before_renew = first._read(path)
+    first.renew_all()
+
+    assert not second._takeover("studio/KL_KHI_a.mp4", path, before_renew)
+    assert first.is_held("studio/KL_KHI_a.mp4")
+
+
+def test_renew_survives_lease_renamed_aside(nodes):
+    first, second = nodes
+    assert first.acquire("studio/KL_KHI_a.mp4")
+    path = first.lease_path("studio/KL_KHI_a.mp4")
+    stale_path = f"{path}.{second.node_id}.stale"
+    # Node lain sedang di tengah takeover: lease di-rename, dikembalikan sesaat kemudian
+    os.replace(path, stale_path)
+    restore = threading.Timer(0.1, lambda: (second._create(path, second._read(stale_path)), os.remove(stale_path)))
+    restore.start()
+    first.renew_all()
+    restore.join()
+
+    assert first.is_held("studio/KL_KHI_a.mp4")
+    assert first.get_stats()["lost"] == 0
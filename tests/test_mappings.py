@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+from mappings import CompiledMapping, MappingFile
+
+
+def write_mapping(path, raw):
+    path.write_text(json.dumps(raw), encoding="utf-8")
+    # mtime dimajukan supaya perubahan terdeteksi walau ditulis dalam detik yang sama
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_name_and_priority_entries():
+    mapping = CompiledMapping({"khi": {"name": "KEPRI HARI INI", "priority": 10}, "RM": "RUMAH MUSIK",
+                               "BP": {"name": "BERITA PAGI"}})
+    assert mapping.names == {"KHI": "KEPRI HARI INI", "RM": "RUMAH MUSIK", "BP": "BERITA PAGI"}
+    assert mapping.priorities == {"KHI": 10}
+    assert "KHI" in mapping and mapping.get("RM") == "RUMAH MUSIK"
+
+
+@pytest.mark.parametrize("raw", [
+    {"K_HI": "KEPRI"},
+    {"KHI": "KEPRI/HARI"},
+    {"KHI": {"name": "KEPRI", "priority": "tinggi"}},
+    {"KHI": "A", "khi": "B"},
+])
+def test_invalid_mapping_rejected(raw):
+    with pytest.raises(ValueError):
+        CompiledMapping(raw)
+
+
+def test_hot_reload_swaps_mapping(tmp_path):
+    path = tmp_path / "kegiatan_map.json"
+    write_mapping(path, {"KHI": "KEPRI HARI INI"})
+    reloaded = []
+    mapping_file = MappingFile(str(path), check_interval=0, on_reload=reloaded.append)
+    assert mapping_file.get().names == {"KHI": "KEPRI HARI INI"}
+
+    write_mapping(path, {"KHI": {"name": "KEPRI HARI INI", "priority": 5}, "RM": "RUMAH MUSIK"})
+    compiled = mapping_file.get()
+
+    assert compiled.names == {"KHI": "KEPRI HARI INI", "RM": "RUMAH MUSIK"}
+    assert compiled.priorities == {"KHI": 5}
+    assert reloaded == [mapping_file]
+    assert mapping_file.reload_count == 1
+
+
+def test_broken_file_keeps_previous_mapping(tmp_path):
+    path = tmp_path / "kegiatan_map.json"
+    write_mapping(path, {"KHI": "KEPRI HARI INI"})
+    mapping_file = MappingFile(str(path), check_interval=0)
+
+    path.write_text('{"KHI": ', encoding="utf-8")
+    assert mapping_file.get().names == {"KHI": "KEPRI HARI INI"}
+    assert mapping_file.error_count == 1
+
+    write_mapping(path, {"RM": "RUMAH MUSIK"})
+    assert mapping_file.get().names == {"RM": "RUMAH MUSIK"}
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmark import make_recording_with_header
+from media_metadata import read_metadata, recording_date
+
+CREATED = datetime(2024, 3, 15, 19, 30, 0, tzinfo=timezone.utc)
+SIZE = 64 * 1024 * 1024
+
+
+@pytest.mark.parametrize("container,moov_at_end", [("mp4", True), ("mp4", False), ("mxf", False)])
+def test_header_metadata(tmp_path, container, moov_at_end):
+    path = str(tmp_path / f"KL_KHI_rekaman.{container}")
+    make_recording_with_header(path, SIZE, CREATED, container=container, moov_at_end=moov_at_end)
+    stats = {}
+
+    metadata = read_metadata(path, stats)
+
+    assert metadata["container"] == container
+    assert (metadata["width"], metadata["height"]) == (1920, 1080)
+    assert metadata["duration"] == pytest.approx(SIZE * 8 // (50 * 1000 * 1000), abs=1)
+    # Tanggal header disimpan UTC, dibaca sebagai waktu lokal
+    assert recording_date(metadata) == CREATED.astimezone().replace(tzinfo=None)
+    # Hanya header yang dibaca, bukan isi essence
+    assert stats["bytes_read"] < 1024 * 1024
+
+
+def test_container_detected_from_content(tmp_path):
+    path = str(tmp_path / "KL_KHI_rekaman.dat")
+    make_recording_with_header(path, SIZE, CREATED, container="mxf")
+    assert read_metadata(path)["container"] == "mxf"
+
+
+def test_unknown_or_truncated_file(tmp_path):
+    text = tmp_path / "KL_KHI_catatan.txt"
+    text.write_bytes(b"bukan video")
+    assert read_metadata(str(text)) is None
+
+    truncated = tmp_path / "KL_KHI_rekaman.mp4"
+    truncated.write_bytes(b"\x00\x00\x00\x18ftypisom")
+    metadata = read_metadata(str(truncated))
+    assert recording_date(metadata) is None
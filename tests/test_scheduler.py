@@ -0,0 +1,58 @@
+import threading
+import time
+
+from scheduler import Scheduler
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_group_limit_holds_busy_folder_without_blocking_others():
+    scheduler = Scheduler(jitter=0, group_func=lambda key: key.split("/")[0], group_limits={"studio": 2})
+    started = []
+    lock = threading.Lock()
+
+    def check(key):
+        with lock:
+            started.append(key)
+
+    scheduler.start()
+    try:
+        for i in range(5):
+            scheduler.schedule(f"studio/{i}.mp4", 0, check, f"studio/{i}.mp4")
+        scheduler.schedule("obvan/0.mp4", 0, check, "obvan/0.mp4")
+
+        assert wait_until(lambda: "obvan/0.mp4" in started)
+        time.sleep(0.1)
+        studio = [key for key in started if key.startswith("studio/")]
+        assert len(studio) == 2
+        assert scheduler.get_stats()["in_flight_by_group"]["studio"] == 2
+
+        # Slot studio kosong -> jadwal studio berikutnya jalan
+        scheduler.done(studio[0])
+        assert wait_until(lambda: len([key for key in started if key.startswith("studio/")]) == 3)
+    finally:
+        scheduler.stop()
+
+
+def test_reschedule_replaces_and_cancel_drops():
+    scheduler = Scheduler(jitter=0)
+    fired = []
+    scheduler.start()
+    try:
+        scheduler.schedule("a.mp4", 10, fired.append, "a.mp4")
+        assert scheduler.reschedule("a.mp4", 0)
+        scheduler.schedule("b.mp4", 0.2, fired.append, "b.mp4")
+        assert scheduler.cancel("b.mp4")
+        assert wait_until(lambda: fired == ["a.mp4"])
+        time.sleep(0.3)
+        assert fired == ["a.mp4"]
+        assert not scheduler.reschedule("missing.mp4")
+    finally:
+        scheduler.stop()
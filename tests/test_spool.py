@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+
+import pytest
+
+import copy_engine
+from spool import Spool
+
+
+def wait_until(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def recording(tmp_path):
+    watch = tmp_path / "watch"
+    watch.mkdir()
+    path = watch / "KL_KHI_banjir.mp4"
+    path.write_bytes(os.urandom(300 * 1024))
+    return str(path)
+
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = Spool(str(tmp_path / "spool"), max_bytes=10 * 1024 * 1024, min_free_bytes=0, drain_workers=1,
+                  chunk_size=64 * 1024)
+    yield spool
+    spool.stop()
+
+
+@pytest.mark.parametrize("same_device", [True, False])
+def test_spool_then_drain_round_trip(spool, recording, tmp_path, monkeypatch, same_device):
+    monkeypatch.setattr(spool, "is_same_device", lambda path: same_device)
+    checksum = copy_engine.hash_file(recording)
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    share_up = threading.Event()
+    drained = []
+
+    def drain(entry):
+        dst = str(archive / entry.meta["new_file_name"])
+        result = copy_engine.copy_file(entry.path, dst, chunk_size=64 * 1024)
+        drained.append(entry.meta["source_path"])
+        return copy_engine.verify_copy(result, dst, 64 * 1024)
+
+    staged = []
+    entry = spool.put(recording, {"file_name": os.path.basename(recording), "new_file_name": "BANJIR.mp4"},
+                      on_staged=staged.append)
+    assert entry is not None and staged == [entry]
+    if same_device:
+        assert not os.path.exists(recording)
+    assert spool.get_stats()["files"] == 1
+
+    # Share tujuan mati: entry ditahan sampai can_drain True dan worker dibangunkan
+    spool.start(drain, lambda entry: share_up.is_set())
+    time.sleep(0.2)
+    assert drained == []
+    share_up.set()
+    spool.wake()
+
+    assert wait_until(lambda: spool.get_stats()["files"] == 0)
+    assert drained == [recording]
+    assert copy_engine.hash_file(str(archive / "BANJIR.mp4")) == checksum
+    assert not os.path.exists(entry.dir)
+    assert spool.get_stats()["bytes"] == 0
+
+
+def test_spooled_entries_survive_restart(spool, recording, tmp_path):
+    entry = spool.put(recording, {"file_name": os.path.basename(recording), "new_file_name": "BANJIR.mp4"})
+
+    reloaded = Spool(spool.spool_dir, min_free_bytes=0)
+
+    assert list(reloaded.entries) == [entry.entry_id]
+    assert reloaded.entries[entry.entry_id].meta["source_path"] == recording
+    assert reloaded.used_bytes == entry.size
+
+
+def test_cancelled_staging_leaves_source(spool, recording, monkeypatch):
+    monkeypatch.setattr(spool, "is_same_device", lambda path: False)
+
+    assert spool.put(recording, {"file_name": os.path.basename(recording)}, on_staged=lambda entry: False) is False
+    assert os.path.exists(recording)
+    assert spool.get_stats()["files"] == 0
+    assert os.listdir(spool.spool_dir) == []
+
+
+def test_spool_full_rejects(tmp_path, recording):
+    spool = Spool(str(tmp_path / "spool"), max_bytes=1024, min_free_bytes=0)
+    assert spool.put(recording, {"file_name": os.path.basename(recording)}) is None
+    assert os.path.exists(recording)
+    assert spool.get_stats()["rejected"] == 1
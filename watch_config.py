@@ -0,0 +1,169 @@
+"""Konfigurasi multi folder dari satu file (watcher_config.json)
+
+Contoh:
+
+    {
+      "options": {"metrics_port": 9108, "spool_dir": "file_watcher_spool"},
+      "folders": [
+        {"name": "studio", "path": "C:\\\\TestWatch", "processed_folder": "Z:\\\\",
+         "kegiatan_map": "kegiatan_map.json", "bahanpustaka_map": "bahanpustaka_map.json",
+         "worker_count": 4},
+        {"name": "obvan", "path": "D:\\\\OBVan", "processed_folder": "Z:\\\\OB VAN",
+         "recursive": true, "worker_count": 2, "min_file_size": 1048576}
+      ]
+    }
+
+"options" berlaku untuk seluruh proses (dan jadi default setiap folder), field lain di
+setiap folder menimpa default untuk folder itu saja.
+"""
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = "watcher_config.json"
+
+
+def _is_within(path, root):
+    """True jika path sama dengan root atau ada di bawahnya"""
+    path = os.path.normcase(os.path.abspath(path))
+    root = os.path.normcase(os.path.abspath(root))
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class WatchFolder:
+    """Satu watch folder (tenant): tujuan, mapping, threshold dan shard worker sendiri"""
+
+    def __init__(self, name, path, processed_folder=None, kegiatan_map_path=None, bahanpustaka_map_path=None,
+                 recursive=False, settings=None):
+        settings = settings or {}
+        self.name = name
+        self.path = os.path.abspath(path)
+        self.processed_folder = processed_folder or path
+        self.kegiatan_map_path = kegiatan_map_path
+        self.bahanpustaka_map_path = bahanpustaka_map_path
+        self.recursive = recursive
+        # Subfolder yang tidak ikut dipantau (folder arsip di dalam watch tree rekursif), diisi validate_folders
+        self.excluded_paths = []
+
+        self.worker_count = settings.get("worker_count", 4)  # Shard worker folder ini
+        self.min_file_size = settings.get("min_file_size", 5 * 1024 * 1024)  # Minimal 5MB
+        self.stable_window = settings.get("stable_window", 3)  # Detik size/mtime harus tetap sama
+        self.wait_delay = settings.get("wait_delay", 10)  # Delay maksimal antar pengecekan
+        self.poll_initial_delay = settings.get("poll_initial_delay", 0.2)  # Backoff awal polling fallback
+        self.max_queue_size = settings.get("max_queue_size", 10000)
+        self.backlog_queue_limit = settings.get("backlog_queue_limit", self.worker_count)
+        # Fair share: batas pengecekan tertunda yang jalan bersamaan dari folder ini
+        self.max_inflight_checks = settings.get("max_inflight_checks", self.worker_count * 2)
+        self.express_priority = settings.get("express_priority", 10)
+        self.express_workers = settings.get("express_workers", 1)
+        self.priority_seconds = settings.get("priority_seconds", 60)
+        self.sjf_bytes_per_second = settings.get("sjf_bytes_per_second", 100 * 1024 * 1024)
+
+        # Diisi watcher: mapping (MappingFile, hot reload), readiness detector dan pipeline shard
+        self.kegiatan_mapping = None
+        self.bahanpustaka_mapping = None
+        self.readiness = None
+        self.pipeline = None
+
+    @property
+    def kegiatan_map(self):
+        return self.kegiatan_mapping.get().names
+
+    @property
+    def kegiatan_priority(self):
+        return self.kegiatan_mapping.get().priorities
+
+    @property
+    def bahanpustaka_map(self):
+        return self.bahanpustaka_mapping.get().names
+
+    @property
+    def bahanpustaka_priority(self):
+        return self.bahanpustaka_mapping.get().priorities
+
+    def contains(self, file_path):
+        """True jika file ada langsung di folder ini (atau di subfolder jika recursive, kecuali excluded_paths)"""
+        directory = os.path.dirname(os.path.abspath(file_path))
+        if not self.recursive:
+            return os.path.normcase(directory) == os.path.normcase(self.path)
+        return _is_within(directory, self.path) and not self.is_excluded(directory)
+
+    def is_excluded(self, directory):
+        """True jika directory ada di dalam subfolder yang dikecualikan (misal folder arsip)"""
+        return any(_is_within(directory, excluded) for excluded in self.excluded_paths)
+
+    def __repr__(self):
+        return f"WatchFolder({self.name!r}, {self.path!r}, recursive={self.recursive})"
+
+
+def load_options(config_path=DEFAULT_CONFIG_PATH):
+    """Blok "options" saja (untuk setup logging sebelum watcher dibuat), {} jika file tidak ada/rusak
+
+    File yang rusak tetap dilaporkan saat load_config.
+    """
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("options", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def load_config(config_path=DEFAULT_CONFIG_PATH):
+    """Baca file konfigurasi, return (options, [WatchFolder])
+
+    Path mapping relatif dihitung dari folder file konfigurasi.
+    """
+    with open(config_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(config_path))
+    options = data.get("options", {})
+
+    def resolve(path):
+        return os.path.join(base_dir, path) if path and not os.path.isabs(path) else path
+
+    folders = []
+    for i, item in enumerate(data.get("folders", [])):
+        if "path" not in item:
+            raise ValueError(f"Folder #{i + 1} in {config_path} has no path")
+        settings = dict(options, **item)
+        folders.append(WatchFolder(item.get("name", f"folder{i + 1}"), item["path"],
+                                   item.get("processed_folder"),
+                                   resolve(item.get("kegiatan_map", "kegiatan_map.json")),
+                                   resolve(item.get("bahanpustaka_map", "bahanpustaka_map.json")),
+                                   recursive=item.get("recursive", False), settings=settings))
+    if not folders:
+        raise ValueError(f"No folders configured in {config_path}")
+    validate_folders(folders)
+    return options, folders
+
+
+def validate_folders(folders):
+    """Nama folder harus unik; folder yang tumpang tindih hanya diberi peringatan
+
+    Folder arsip di dalam watch tree rekursif dikecualikan dari pemantauan folder itu (file
+    yang sudah diarsipkan tidak boleh terdeteksi lagi sebagai file baru); folder arsip yang
+    sama dengan root watch folder rekursif ditolak karena tidak bisa dibedakan dari file baru.
+    """
+    names = set()
+    for folder in folders:
+        if folder.name in names:
+            raise ValueError(f"Duplicate watch folder name: {folder.name}")
+        names.add(folder.name)
+    for folder in folders:
+        if not folder.recursive:
+            continue
+        for other in folders:
+            if os.path.normcase(os.path.abspath(other.processed_folder)) == os.path.normcase(folder.path):
+                raise ValueError(f"Processed folder of {other.name} is the root of recursive watch folder "
+                                 f"{folder.name}, set a processed_folder outside {folder.path}")
+            if _is_within(other.processed_folder, folder.path) and other.processed_folder not in folder.excluded_paths:
+                logger.warning(f"Processed folder of {other.name} is inside recursive watch folder {folder.name}, "
+                               f"excluding {other.processed_folder} from watching")
+                folder.excluded_paths.append(other.processed_folder)
+    for folder in folders:
+        for other in folders:
+            if other is not folder and other.recursive and other.contains(os.path.join(folder.path, "x")):
+                logger.warning(f"Watch folder {folder.name} is inside recursive folder {other.name}, "
+                               f"files there belong to the most specific folder")